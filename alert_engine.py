@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Rule-based alert evaluator for Agent.AlertManager
+Evaluates every issue against configurable thresholds, suppresses repeats with a persistent
+cooldown table and sends all new alerts in a single notification-webhook POST per run.
+"""
+
+import json
+import os
+import sys
+import time
+import urllib.request
+from datetime import datetime, timezone
+
+import heat_map
+import status_metrics
+from event_log import METRICS_DIR
+from snapshot_store import SNAPSHOT_DIR, SnapshotReader, list_snapshots, load_snapshot
+
+STATE_FILE = "alert-state.json"
+DAY = 86_400
+
+# Thresholds from the AlertManager persona; override per run with payload["thresholds"]
+DEFAULT_THRESHOLDS = {
+    "blockedDays": 3,            # status=Blocked for >3 days
+    "stalledDays": 7,            # status=In Progress and no updates in >7 days
+    "thrashingChanges24h": 5,    # >5 status changes in 24h, capped by what the snapshot interval can show
+    "snapshotIntervalHours": 6,  # scheduler.INTERVAL_HOURS; each snapshot diff records at most one status change
+    "highPriorityIdleDays": 3,   # priority=High and no updates in >3 days
+    "cooldownHours": 24          # don't re-alert the same issue and rule within this window
+}
+
+SEVERITY = {"blocked": "high", "thrashing": "high", "highPriorityIdle": "high", "stalled": "medium"}
+SEVERITY_RANK = {"critical": 0, "high": 1, "medium": 2}
+ALERT_COLUMNS = ["issueId", "title", "status", "priority", "assignee", "updatedDate"]
+
+def load_latest_columns(snapshot_dir=SNAPSHOT_DIR):
+    """Columns needed by the rules from the newest snapshot, without decoding the rest"""
+    names = list_snapshots(snapshot_dir)
+    if not names:
+        return None, {}
+    name = names[-1]
+    if name.endswith(".snap"):
+        with SnapshotReader(os.path.join(snapshot_dir, name)) as reader:
+            return name, {column: reader.column(column) for column in ALERT_COLUMNS}
+    rows = load_snapshot(snapshot_dir, name)["rows"]
+    return name, {column: [row.get(column) for row in rows] for column in ALERT_COLUMNS}
+
+def thrashing_limit(thresholds):
+    """Status changes in 24h above which an issue is thrashing
+
+    Snapshots every snapshotIntervalHours show at most 24 / interval status changes a day (4 at 6 h),
+    so the limit is capped below that; an issue changing status at every snapshot still alerts.
+    """
+    observable = int(24 // thresholds["snapshotIntervalHours"])
+    return max(1, min(thresholds["thrashingChanges24h"], observable - 1))
+
+def evaluate(columns, status_since, status_changes_24h, now, thresholds):
+    """Return every alert condition currently true, one dict per (rule, issue)"""
+    alerts = []
+    thrashing_changes = thrashing_limit(thresholds)
+    blocked_cutoff = now - thresholds["blockedDays"] * DAY
+    stalled_cutoff = now - thresholds["stalledDays"] * DAY
+    idle_cutoff = now - thresholds["highPriorityIdleDays"] * DAY
+
+    for issue_id, title, status, priority, assignee, updated in zip(*(columns[c] for c in ALERT_COLUMNS)):
+        last_update = status_metrics.parse_time(updated) if updated else None
+        context = {"issueId": issue_id, "title": title, "status": status, "priority": priority, "assignee": assignee}
+
+        if status == "Blocked":
+            since = status_since.get(issue_id, last_update)
+            if since is not None and since < blocked_cutoff:
+                alerts.append({"rule": "blocked", "days": round((now - since) / DAY, 1), **context})
+        if status == "In Progress" and last_update is not None and last_update < stalled_cutoff:
+            alerts.append({"rule": "stalled", "days": round((now - last_update) / DAY, 1), **context})
+        if priority == "High" and status not in status_metrics.CLOSED_STATUSES and last_update is not None and last_update < idle_cutoff:
+            alerts.append({"rule": "highPriorityIdle", "days": round((now - last_update) / DAY, 1), **context})
+        changes = status_changes_24h.get(issue_id, 0)
+        if changes > thrashing_changes:
+            alerts.append({"rule": "thrashing", "statusChanges24h": changes, **context})
+
+    for alert in alerts:
+        severity = SEVERITY[alert["rule"]]
+        # Blocked high-priority work is the highest business impact
+        if alert["rule"] == "blocked" and alert["priority"] == "High":
+            severity = "critical"
+        alert["severity"] = severity
+    alerts.sort(key=lambda a: (SEVERITY_RANK[a["severity"]], -a.get("days", 0), a["issueId"]))
+    return alerts
+
+class Cooldowns:
+    """Persistent dedup table: "rule:issueId" -> epoch seconds of the last alert"""
+
+    def __init__(self, metrics_dir=METRICS_DIR):
+        self.path = os.path.join(metrics_dir, STATE_FILE)
+        try:
+            with open(self.path) as f:
+                self.sent = json.load(f)
+        except FileNotFoundError:
+            self.sent = {}
+
+    def filter(self, alerts, now, cooldown_seconds):
+        """Split alerts into (new, suppressed), expiring old entries; record() once they are delivered"""
+        self.sent = {key: at for key, at in self.sent.items() if at > now - cooldown_seconds}
+        fresh, suppressed = [], []
+        for alert in alerts:
+            (suppressed if f"{alert['rule']}:{alert['issueId']}" in self.sent else fresh).append(alert)
+        return fresh, suppressed
+
+    def record(self, alerts, now):
+        for alert in alerts:
+            self.sent[f"{alert['rule']}:{alert['issueId']}"] = now
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".tmp", "w") as f:
+            json.dump(self.sent, f)
+        os.replace(self.path + ".tmp", self.path)
+
+def notification_body(alerts, now):
+    """Slack-style body (see notification-webhook in INTEGRATION_GUIDE.md) carrying every alert"""
+    timestamp = datetime.fromtimestamp(now, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    lines = [
+        f"• *{a['severity'].upper()}* {a['rule']}: *{a['issueId']}* {a.get('title') or ''} "
+        f"({a.get('days', a.get('statusChanges24h'))}{'d' if 'days' in a else ' changes/24h'})"
+        for a in alerts
+    ]
+    return {
+        "text": f"🚨 {len(alerts)} SmartSheets alert{'s' if len(alerts) != 1 else ''}",
+        "blocks": [
+            {"type": "section", "text": {"type": "mrkdwn", "text": "\n".join(lines[:50]) or "No new alerts"}},
+            {"type": "context", "elements": [
+                {"type": "mrkdwn", "text": f"Source: SmartSheets Issue Monitor | {timestamp}"}
+            ]}
+        ]
+    }
+
+def post_webhook(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode(), method="POST",
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.status
+
+def run(snapshot_dir=SNAPSHOT_DIR, metrics_dir=METRICS_DIR, thresholds=None, webhook_url=None, now=None):
+    """Evaluate all issues, dedup against the cooldown table and send one batched notification"""
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    now = now or int(time.time())
+    snapshot, columns = load_latest_columns(snapshot_dir)
+    if snapshot is None:
+        return {"error": "No snapshots stored yet"}
+
+    status_since = {issue_id: since for issue_id, (_, since) in status_metrics.load(metrics_dir).current.items()}
+    updates = heat_map.load_event_log(metrics_dir)
+    changes = heat_map.analyze(updates.arrays(), now)["status_changes_24h"] if updates.issue_ids else []
+    status_changes_24h = {issue_id: int(count) for issue_id, count in zip(updates.issue_ids, changes) if count}
+
+    alerts = evaluate(columns, status_since, status_changes_24h, now, thresholds)
+    cooldowns = Cooldowns(metrics_dir)
+    fresh, suppressed = cooldowns.filter(alerts, now, thresholds["cooldownHours"] * 3600)
+
+    # Only delivered alerts start a cooldown: evaluating without notifying must not silence the next real run
+    notified = None
+    if fresh and webhook_url:
+        notified = post_webhook(webhook_url, notification_body(fresh, now))
+        if 200 <= notified < 300:
+            cooldowns.record(fresh, now)
+            cooldowns.save()
+
+    by_rule = {}
+    for alert in fresh:
+        by_rule[alert["rule"]] = by_rule.get(alert["rule"], 0) + 1
+    return {
+        "snapshot": snapshot,
+        "issuesEvaluated": len(columns["issueId"]),
+        "newAlerts": len(fresh),
+        "suppressed": len(suppressed),
+        "byRule": by_rule,
+        "notificationStatus": notified,
+        "alerts": fresh
+    }
+
+def handle_request(payload):
+    """Tool entry point: run the alert rules; the agent ranks and phrases the result"""
+    now = status_metrics.parse_time(payload["now"]) if payload.get("now") else None
+    webhook_url = payload.get("webhookUrl") or os.environ.get("NOTIFICATION_WEBHOOK_URL")
+    result = run(
+        payload.get("snapshotDir", SNAPSHOT_DIR),
+        payload.get("metricsDir", METRICS_DIR),
+        payload.get("thresholds"),
+        webhook_url if payload.get("notify", True) else None,
+        now
+    )
+    if "alerts" in result:
+        result["alerts"] = result["alerts"][:payload.get("limit") or 25]
+    return result
+
+if __name__ == "__main__":
+    import tempfile
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    from change_detector import diff_snapshots
+    from snapshot_store import SnapshotStore
+    from synthetic import make_snapshot, mutate_snapshot
+
+    received = []
+
+    class WebhookSink(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    sink = ThreadingHTTPServer(("127.0.0.1", 0), WebhookSink)
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+    webhook_url = f"http://127.0.0.1:{sink.server_port}/hook"
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    workdir = tempfile.mkdtemp()
+    snapshot_dir, metrics_dir = os.path.join(workdir, "snapshots"), os.path.join(workdir, "metrics")
+    store = SnapshotStore(snapshot_dir, retention_days=365_000)
+    previous = make_snapshot(n_rows, timestamp="2025-01-14T06:00:00Z")
+    current = mutate_snapshot(previous, change_rate=0.05, seed=1, timestamp="2025-01-14T12:00:00Z")
+    store.write(previous)
+    store.write(current)
+    status_metrics.record(diff_snapshots(previous, current), previous, metrics_dir)
+    now = status_metrics.parse_time("2025-01-14T12:00:00Z")
+
+    dry_run = run(snapshot_dir, metrics_dir, now=now)
+    start = time.perf_counter()
+    first = run(snapshot_dir, metrics_dir, webhook_url=webhook_url, now=now)
+    first_elapsed = time.perf_counter() - start
+    second = run(snapshot_dir, metrics_dir, webhook_url=webhook_url, now=now)
+    third = run(snapshot_dir, metrics_dir, webhook_url=webhook_url, now=now + 30 * 3600)
+
+    print(f"📊 Alert evaluation benchmark ({n_rows} issues):")
+    print(f"   Evaluate + dedup + notify: {first_elapsed * 1000:.0f} ms, {first['newAlerts']} alerts {first['byRule']}")
+    print(f"   Webhook payload: {len(json.dumps(received[0])) / 1024:.1f} KB in 1 POST")
+
+    # Validation
+    columns = {
+        "issueId": ["A", "B", "C", "D", "E"],
+        "title": ["a", "b", "c", "d", "e"],
+        "status": ["Blocked", "In Progress", "New", "Resolved", "In Progress"],
+        "priority": ["Low", "Medium", "High", "High", "Low"],
+        "assignee": [None] * 5,
+        "updatedDate": ["2025-01-10T00:00:00Z", "2025-01-06T00:00:00Z", "2025-01-10T00:00:00Z",
+                        "2025-01-01T00:00:00Z", "2025-01-14T00:00:00Z"]
+    }
+    rules = evaluate(columns, {"A": now - 4 * DAY}, {"E": 6}, now, DEFAULT_THRESHOLDS)
+    expected = {("blocked", "A"), ("stalled", "B"), ("highPriorityIdle", "C"), ("thrashing", "E")}
+    looser = evaluate(columns, {"A": now - 4 * DAY}, {"E": 6}, now, {**DEFAULT_THRESHOLDS, "blockedDays": 5})
+    every_snapshot = evaluate(columns, {}, {"E": 24 // DEFAULT_THRESHOLDS["snapshotIntervalHours"]}, now, DEFAULT_THRESHOLDS)
+
+    print(f"\n📊 Validation:")
+    print(f"   Rules fire on thresholds: {'✅' if {(a['rule'], a['issueId']) for a in rules} == expected else '❌'}")
+    print(f"   Configurable thresholds: {'✅' if not any(a['rule'] == 'blocked' for a in looser) else '❌'}")
+    print(f"   Thrashing observable at the snapshot interval: >{thrashing_limit(DEFAULT_THRESHOLDS)} changes {'✅' if any(a['rule'] == 'thrashing' for a in every_snapshot) else '❌'}")
+    print(f"   One POST per run: {len(received)} POSTs for runs with new alerts {'✅' if len(received) == 2 else '❌'}")
+    print(f"   Evaluating without notifying keeps alerts fresh: {dry_run['newAlerts']} then {first['newAlerts']} sent {'✅' if first['newAlerts'] == dry_run['newAlerts'] > 0 else '❌'}")
+    print(f"   Cooldown suppresses repeats: {second['suppressed']} suppressed, {second['newAlerts']} new {'✅' if second['newAlerts'] == 0 else '❌'}")
+    print(f"   Re-alert after cooldown: {third['newAlerts']} {'✅' if third['newAlerts'] >= first['newAlerts'] else '❌'}")
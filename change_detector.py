@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Deterministic snapshot diff engine for Agent.ChangeDetector
+Compares two SmartSheets snapshots in linear time so the agent only narrates the delta.
+"""
+
+import json
+import sys
+import time
+
+import report_facts
+import status_metrics
+import telemetry
+import trend_rollups
+from event_log import METRICS_DIR, get_log
+from snapshot_store import list_snapshots, load_snapshot
+
+SNAPSHOT_DIR = "data/snapshots"
+
+# Columns compared per row, and the change category each one reports under
+TRACKED_COLUMNS = {
+    "status": "status",
+    "assignee": "assignee",
+    "priority": "priority",
+    "title": "description",
+    "description": "description"
+}
+
+CATEGORIES = ["new", "status", "assignee", "priority", "description", "deleted"]
+
+def index_rows(snapshot, key_field="issueId"):
+    """Index snapshot rows by row ID with the tuple of their tracked cell values"""
+    index = {}
+    for row in snapshot.get("rows", []):
+        index[row[key_field]] = (row, tuple(row.get(column) for column in TRACKED_COLUMNS))
+    return index
+
+def diff_snapshots(previous, current, key_field="issueId"):
+    """Compare two snapshots and return changes grouped by category"""
+    changes = {category: [] for category in CATEGORIES}
+    previous_index = index_rows(previous, key_field)
+    columns = list(TRACKED_COLUMNS)
+
+    for row in current.get("rows", []):
+        row_id = row[key_field]
+        entry = previous_index.pop(row_id, None)
+
+        if entry is None:
+            changes["new"].append({
+                "issueId": row_id,
+                "title": row.get("title"),
+                "status": row.get("status"),
+                "assignee": row.get("assignee"),
+                "priority": row.get("priority"),
+                "createdBy": row.get("createdBy", row.get("updatedBy")),
+                "createdDate": row.get("createdDate")
+            })
+            continue
+
+        old_row, old_values = entry
+        values = tuple(row.get(column) for column in columns)
+        # Most rows are unchanged: one tuple comparison skips them
+        if values == old_values:
+            continue
+        for column, before, after in zip(columns, old_values, values):
+            if before == after:
+                continue
+            change = {
+                "issueId": row_id,
+                "field": column,
+                "from": before,
+                "to": after,
+                "updatedBy": row.get("updatedBy"),
+                "updatedDate": row.get("updatedDate")
+            }
+            if column == "status":
+                # Lets trend rollups attribute resolutions and their cycle time without a snapshot lookup
+                change["assignee"] = row.get("assignee")
+                change["createdDate"] = row.get("createdDate")
+            changes[TRACKED_COLUMNS[column]].append(change)
+
+    # Anything left in the previous index no longer exists
+    for row_id, (old_row, _) in previous_index.items():
+        changes["deleted"].append({
+            "issueId": row_id,
+            "title": old_row.get("title"),
+            "lastStatus": old_row.get("status")
+        })
+
+    return {
+        "previousTimestamp": previous.get("timestamp"),
+        "currentTimestamp": current.get("timestamp"),
+        "summary": {category: len(items) for category, items in changes.items()},
+        "totalChanges": sum(len(items) for items in changes.values()),
+        "changes": changes
+    }
+
+def latest_snapshot_files(snapshot_dir=SNAPSHOT_DIR, count=2):
+    """Return the newest snapshot file names, oldest first"""
+    return list_snapshots(snapshot_dir)[-count:]
+
+def handle_request(payload):
+    """Tool entry point: diff two named snapshots, defaulting to the two most recent
+
+    Unless record is false, the delta is also appended to the per-issue event log,
+    folded into the status-transition aggregates and trend rollups, and materialized
+    into report facts.
+    """
+    snapshot_dir = payload.get("snapshotDir", SNAPSHOT_DIR)
+    if bool(payload.get("previous")) != bool(payload.get("current")):
+        # Diffing one named snapshot against a default would silently compare the wrong pair
+        return {"error": "Pass both previous and current, or neither for the two most recent snapshots",
+                "previous": payload.get("previous") or None, "current": payload.get("current") or None}
+    if payload.get("previous"):
+        names = [payload["previous"], payload["current"]]
+    else:
+        names = latest_snapshot_files(snapshot_dir)
+        if len(names) < 2:
+            return {"error": "Need at least two snapshots to detect changes", "snapshots": names}
+
+    previous, current = (load_snapshot(snapshot_dir, name) for name in names)
+    with telemetry.span("diff") as attrs:
+        result = diff_snapshots(previous, current, payload.get("keyField", "issueId"))
+        attrs.update(rows=len(current.get("rows", [])), changes=result.get("totalChanges", 0))
+    if payload.get("record", True):
+        metrics_dir = payload.get("metricsDir", METRICS_DIR)
+        with telemetry.span("analytics.record"):
+            result["eventLog"] = get_log(metrics_dir).append(result)
+            result["statusMetrics"] = status_metrics.record(result, previous, metrics_dir)
+            result["trendRollups"] = trend_rollups.record(result, metrics_dir)
+            result["reportFacts"] = report_facts.materialize(metrics_dir, payload.get("reportsDir", report_facts.REPORTS_DIR))
+    return result
+
+if __name__ == "__main__":
+    from synthetic import make_snapshot, mutate_snapshot
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+
+    print(f"📊 Change detection benchmark:")
+    for n_rows in sizes:
+        previous = make_snapshot(n_rows, seed=0)
+        current = mutate_snapshot(previous, change_rate=0.05, seed=1, timestamp="2025-01-14T12:00:00Z")
+
+        start = time.perf_counter()
+        result = diff_snapshots(previous, current)
+        elapsed = time.perf_counter() - start
+
+        payload_kb = len(json.dumps(result)) / 1024
+        print(f"   {n_rows:>7} rows: {elapsed * 1000:8.1f} ms, {result['totalChanges']} changes, {payload_kb:.0f} KB delta")
+
+    # Validation
+    previous = make_snapshot(100, seed=0)
+    current = mutate_snapshot(previous, change_rate=0.3, seed=2, timestamp="2025-01-14T12:00:00Z")
+    result = diff_snapshots(previous, current)
+    previous_ids = {row["issueId"] for row in previous["rows"]}
+    current_ids = {row["issueId"] for row in current["rows"]}
+    new_ok = {c["issueId"] for c in result["changes"]["new"]} == current_ids - previous_ids
+    deleted_ok = {c["issueId"] for c in result["changes"]["deleted"]} == previous_ids - current_ids
+    unchanged_ok = diff_snapshots(previous, previous)["totalChanges"] == 0
+
+    print(f"\n📊 Validation:")
+    print(f"   New issues: {result['summary']['new']} {'✅' if new_ok else '❌'}")
+    print(f"   Deleted issues: {result['summary']['deleted']} {'✅' if deleted_ok else '❌'}")
+    print(f"   Identical snapshots: {'✅' if unchanged_ok else '❌'}")
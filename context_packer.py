@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Token-budgeted context packing for tool results handed to agents
+Projects row lists to the columns an agent's persona needs, factors out repeated values, and
+summarizes the tail of long lists so every tool result fits the agent's max_context_tokens.
+"""
+
+import json
+import re
+import sys
+import time
+from collections import Counter
+
+ENCODING = "o200k_base"   # gpt-4o / gpt-4o-mini
+DEFAULT_MAX_TOKENS = 4000
+ALWAYS_KEEP = ("issueId",)
+SUMMARY_TOP_VALUES = 5
+# No tokenizer packs JSON at more characters per token than this, so longer text is over budget uncounted
+MAX_CHARS_PER_TOKEN = 10
+# Pre-tokenizer split similar to the GPT BPE regex, used when tiktoken is unavailable
+APPROX_PIECE = re.compile(r"\s?[A-Za-z]+|\s?\d{1,3}|\s?[^\sA-Za-z\d]+|\s+")
+
+_encoder = None
+
+def encoder():
+    """tiktoken encoder if installed and its vocabulary is available, else False"""
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding(ENCODING)
+        except Exception:   # not installed, or the vocabulary cannot be downloaded
+            _encoder = False
+    return _encoder
+
+def count_tokens(text):
+    """Prompt tokens for text: exact with tiktoken, otherwise a BPE-style approximation"""
+    enc = encoder()
+    if enc:
+        return len(enc.encode(text, disallowed_special=()))
+    return sum(1 + len(piece.strip()) // 8 for piece in APPROX_PIECE.findall(text))
+
+def dumps(value):
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+def is_row_list(value):
+    return isinstance(value, list) and len(value) > 0 and all(isinstance(item, dict) for item in value)
+
+def to_table(rows, columns=None):
+    """Columnar form of a row list: header once, repeated constant columns factored out
+
+    Only `columns` (plus issueId) are kept when given and any of them is present.
+    """
+    present = list(dict.fromkeys(key for row in rows for key in row))
+    if columns:
+        wanted = [key for key in present if key in columns or key in ALWAYS_KEEP]
+        if any(key in columns for key in present):
+            present = wanted
+    common = {}
+    varying = []
+    for key in present:
+        first = rows[0].get(key)
+        if len(rows) > 1 and not isinstance(first, (dict, list)) and all(row.get(key) == first for row in rows):
+            common[key] = first
+        else:
+            varying.append(key)
+    table = {"columns": varying, "rows": [[row.get(key) for key in varying] for row in rows]}
+    if common:
+        table["common"] = common
+    return table
+
+def dedupe_rows(table):
+    """Collapse identical rows into one with a repeat count"""
+    seen = {}
+    for row in table["rows"]:
+        try:
+            key = tuple(row)
+            hash(key)
+        except TypeError:   # nested values
+            key = dumps(row)
+        if key in seen:
+            seen[key][1] += 1
+        else:
+            seen[key] = [row, 1]
+    if len(seen) < len(table["rows"]):
+        table["rows"] = [row + [count] if count > 1 else row for row, count in seen.values()]
+        table["repeatColumn"] = "×"   # trailing value on a collapsed row is its repeat count
+    return table
+
+def summarize_rows(columns, rows):
+    """Compact stand-in for omitted rows: count plus top values of low-cardinality columns"""
+    summary = {"omitted": len(rows)}
+    for position, column in enumerate(columns):
+        try:
+            counts = Counter(row[position] for row in rows)
+        except TypeError:   # nested values are not summarized
+            continue
+        if 1 < len(counts) <= max(20, len(rows) // 50):
+            top = counts.most_common(SUMMARY_TOP_VALUES)
+            summary.setdefault("topValues", {})[column] = {str(value): count for value, count in top}
+    return summary
+
+def find_tables(value, path=()):
+    """Paths of every packed table in a result, largest first"""
+    found = []
+    if isinstance(value, dict):
+        if "columns" in value and "rows" in value:
+            found.append(path)
+        else:
+            for key, item in value.items():
+                found.extend(find_tables(item, path + (key,)))
+    return found
+
+def resolve(value, path):
+    for key in path:
+        value = value[key]
+    return value
+
+def columnarize(value, columns):
+    if is_row_list(value):
+        return dedupe_rows(to_table(value, columns))
+    if isinstance(value, dict):
+        return {key: columnarize(item, columns) for key, item in value.items()}
+    return value
+
+def pack(result, max_tokens=DEFAULT_MAX_TOKENS, columns=None):
+    """Fit a tool result into max_tokens
+
+    Row lists anywhere in the result become projected, deduplicated tables; if that is still
+    over budget, the longest tables keep their head rows and the tail becomes a summary.
+    """
+    packed = columnarize(result, set(columns) if columns else None)
+    text = dumps(packed)
+    tokens = count_tokens(text) if len(text) <= MAX_CHARS_PER_TOKEN * max_tokens else None
+    if tokens is not None and tokens <= max_tokens:
+        return packed, tokens
+
+    tables = sorted(find_tables(packed), key=lambda path: -len(resolve(packed, path)["rows"]))
+    for path in tables:
+        table = resolve(packed, path)
+        rows = table["rows"]
+        # Size the head from the rest of the result plus a sampled per-row cost, then correct
+        table["rows"] = []
+        table["tail"] = summarize_rows(table["columns"], rows)
+        base = count_tokens(dumps(packed))
+        sample = rows[:50]
+        per_row = max(1, count_tokens(dumps(sample)) / len(sample)) * 1.05
+        keep = min(len(rows), max(0, int((max_tokens - base) / per_row)))
+        while True:
+            table["rows"] = rows[:keep]
+            if keep < len(rows):
+                table["tail"] = summarize_rows(table["columns"], rows[keep:])
+            else:
+                table.pop("tail", None)
+            tokens = count_tokens(dumps(packed))
+            if tokens <= max_tokens or keep == 0:
+                break
+            keep = max(0, min(keep - 1, int(keep - (tokens - max_tokens) / per_row)))
+        if tokens <= max_tokens:
+            break
+    return packed, tokens
+
+def handle_result(result, context):
+    """Apply an agent's context settings ({"maxTokens", "columns"}) to a tool result"""
+    if not isinstance(result, dict) or not context:
+        return result
+    packed, tokens = pack(result, context.get("maxTokens") or DEFAULT_MAX_TOKENS, context.get("columns"))
+    packed["contextTokens"] = tokens
+    return packed
+
+if __name__ == "__main__":
+    import alert_engine
+    from change_detector import diff_snapshots
+    from generate_workflow import AGENTS
+    from synthetic import make_snapshot, mutate_snapshot
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    settings = {agent["label"]: agent for agent in AGENTS}
+    tokenizer = f"tiktoken {ENCODING}" if encoder() else "approximate BPE (tiktoken vocabulary unavailable)"
+
+    def tool_results(n_rows):
+        """What each row-bearing agent's tool returns today at this sheet size"""
+        previous = make_snapshot(n_rows, seed=0, timestamp="2025-01-14T06:00:00Z")
+        current = mutate_snapshot(previous, change_rate=0.05, seed=1, timestamp="2025-01-14T12:00:00Z")
+        columns = {column: [row.get(column) for row in current["rows"]] for column in alert_engine.ALERT_COLUMNS}
+        now = alert_engine.status_metrics.parse_time(current["timestamp"])
+        return {
+            "Agent.ChangeDetector": diff_snapshots(previous, current),
+            "Agent.QueryHandler": {"snapshot": "latest", "rows": current["rows"]},
+            "Agent.AlertManager": {"alerts": alert_engine.evaluate(columns, {}, {}, now, alert_engine.DEFAULT_THRESHOLDS)},
+        }
+
+    print(f"📊 Context packing benchmark ({tokenizer}):")
+    print(f"   {'agent':<24} {'rows':>7} {'raw tokens':>11} {'packed':>7} {'budget':>7} {'ms':>7}")
+    within_budget = True
+    tails_ok = True
+    for n_rows in sizes:
+        for label, result in tool_results(n_rows).items():
+            agent = settings[label]
+            raw = count_tokens(dumps(result))
+            start = time.perf_counter()
+            packed, tokens = pack(result, agent["max_context_tokens"], agent["context_columns"])
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            within_budget &= tokens <= agent["max_context_tokens"]
+            if label == "Agent.QueryHandler" and "tail" in packed["rows"]:
+                tails_ok &= len(packed["rows"]["rows"]) + packed["rows"]["tail"]["omitted"] == len(result["rows"])
+            print(f"   {label:<24} {n_rows:>7} {raw:>11,} {tokens:>7,} {agent['max_context_tokens']:>7,} {elapsed_ms:>7.0f}")
+
+    # Validation
+    rows = [{"issueId": f"ISS{n}", "status": "Blocked", "assignee": "a@example.com", "title": "t", "extra": n} for n in range(3)]
+    small, _ = pack({"alerts": rows}, 1_000, ["status", "assignee"])
+    duplicate, _ = pack({"rows": [{"issueId": "A", "status": "New"}] * 3 + [{"issueId": "B", "status": "New"}]})
+    print(f"\n📊 Validation:")
+    print(f"   Every packed result within its agent budget: {'✅' if within_budget else '❌'}")
+    print(f"   Projection keeps issueId + persona columns: {small['alerts']['columns']} {'✅' if small['alerts']['columns'] == ['issueId'] and small['alerts']['common'] == {'status': 'Blocked', 'assignee': 'a@example.com'} else '❌'}")
+    print(f"   Identical rows collapsed: {duplicate['rows']['rows']} {'✅' if duplicate['rows']['rows'] == [['A', 3], ['B']] else '❌'}")
+    print(f"   Tail summary accounts for every omitted row: {'✅' if tails_ok else '❌'}")
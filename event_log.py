@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Append-only per-issue event log built from change-detection output
+An index from issue ID to byte offsets turns "show full history for ABC123" into a few seeks.
+"""
+
+import fcntl
+import json
+import os
+import sys
+import threading
+import time
+
+METRICS_DIR = "data/metrics"
+LOG_FILE = "events.log"
+INDEX_FILE = "events.idx"
+STATE_FILE = "events-state.json"
+LOCK_FILE = "events.lock"
+
+def change_events(delta):
+    """Flatten a change_detector result into one event per change, in category order"""
+    at = delta.get("currentTimestamp")
+    for category, items in delta["changes"].items():
+        for item in items:
+            yield {"at": at, "type": category, **item}
+
+class EventLog:
+    """Append-only NDJSON event log with an append-only issue → offsets index
+
+    The index file holds "issueId<TAB>offset" lines and is loaded incrementally; lookups then
+    seek straight to each event instead of scanning the log. The state file records the log and
+    index sizes each append committed: appends from any process run under a file lock, readers
+    pick up other processes' appends up to those sizes, and an append interrupted before its
+    state was written is truncated away by the next one.
+    """
+
+    def __init__(self, metrics_dir=METRICS_DIR):
+        self.metrics_dir = metrics_dir
+        os.makedirs(metrics_dir, exist_ok=True)
+        self.log_path = os.path.join(metrics_dir, LOG_FILE)
+        self.index_path = os.path.join(metrics_dir, INDEX_FILE)
+        self.state_path = os.path.join(metrics_dir, STATE_FILE)
+        self.lock_path = os.path.join(metrics_dir, LOCK_FILE)
+        self.lock = threading.Lock()
+        self.index = {}
+        self.index_bytes = 0          # index file bytes loaded into self.index
+        self.state_signature = None   # (mtime_ns, size) of the state file last loaded
+        self.state = {"lastTimestamp": None, "events": 0}
+        with self.lock:
+            self.refresh()
+
+    def committed_sizes(self):
+        """Log and index bytes covered by the state file (older state files: the whole files)"""
+        def size(path):
+            return os.path.getsize(path) if os.path.exists(path) else 0
+        return self.state.get("logBytes", size(self.log_path)), self.state.get("indexBytes", size(self.index_path))
+
+    def refresh(self):
+        """Reload the state if another process changed it, then load index lines it committed; call under self.lock"""
+        try:
+            stat = os.stat(self.state_path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+        if signature != self.state_signature:
+            try:
+                with open(self.state_path) as f:
+                    self.state = json.load(f)
+            except FileNotFoundError:
+                self.state = {"lastTimestamp": None, "events": 0}
+            self.state_signature = signature
+
+        _, index_bytes = self.committed_sizes()
+        if index_bytes < self.index_bytes:   # rebuilt or truncated since loaded
+            self.index, self.index_bytes = {}, 0
+        if index_bytes > self.index_bytes:
+            with open(self.index_path, "rb") as f:
+                f.seek(self.index_bytes)
+                for line in f.read(index_bytes - self.index_bytes).decode().splitlines():
+                    issue_id, offset = line.split("\t")
+                    self.index.setdefault(issue_id, []).append(int(offset))
+            self.index_bytes = index_bytes
+
+    def append(self, delta):
+        """Append one change set; change sets at or before the last appended one are skipped"""
+        at = delta.get("currentTimestamp")
+        with self.lock, open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)   # released when lock_file closes
+            self.refresh()
+            if self.state["lastTimestamp"] and at and at <= self.state["lastTimestamp"]:
+                return {"appended": 0, "skipped": True, "lastTimestamp": self.state["lastTimestamp"]}
+
+            log_bytes, index_bytes = self.committed_sizes()
+            appended = 0
+            with open(self.log_path, "ab") as log, open(self.index_path, "ab") as index:
+                # Drop anything an interrupted append wrote past the committed sizes
+                log.truncate(log_bytes)
+                index.truncate(index_bytes)
+                offset = log_bytes
+                for event in change_events(delta):
+                    line = (json.dumps(event) + "\n").encode()
+                    log.write(line)
+                    index.write(f"{event['issueId']}\t{offset}\n".encode())
+                    self.index.setdefault(event["issueId"], []).append(offset)
+                    offset += len(line)
+                    appended += 1
+                index_bytes = index.tell()
+
+            self.state = {"lastTimestamp": at, "events": self.state["events"] + appended,
+                          "logBytes": offset, "indexBytes": index_bytes}
+            with open(self.state_path + ".tmp", "w") as f:
+                json.dump(self.state, f)
+            os.replace(self.state_path + ".tmp", self.state_path)
+            stat = os.stat(self.state_path)
+            self.state_signature = (stat.st_mtime_ns, stat.st_size)
+            self.index_bytes = index_bytes
+        return {"appended": appended, "skipped": False, "lastTimestamp": at}
+
+    def history(self, issue_id, limit=None):
+        """Events for one issue, oldest first, read by seeking to each indexed offset"""
+        with self.lock:
+            self.refresh()
+            offsets = list(self.index.get(issue_id, []))
+        if limit:
+            offsets = offsets[-limit:]
+        events = []
+        with open(self.log_path, "rb") as log:
+            for offset in offsets:
+                log.seek(offset)
+                events.append(json.loads(log.readline()))
+        return events
+
+def rebuild(snapshot_dir, metrics_dir=METRICS_DIR):
+    """Backfill the log by diffing consecutive stored snapshots"""
+    from change_detector import diff_snapshots
+    from snapshot_store import list_snapshots, load_snapshot
+
+    log = EventLog(metrics_dir)
+    names = list_snapshots(snapshot_dir)
+    appended = 0
+    previous = load_snapshot(snapshot_dir, names[0]) if names else None
+    for name in names[1:]:
+        current = load_snapshot(snapshot_dir, name)
+        appended += log.append(diff_snapshots(previous, current))["appended"]
+        previous = current
+    return {"snapshots": len(names), "appended": appended}
+
+# One loaded index per metrics directory for the lifetime of the tool server
+_logs = {}
+
+def read_state(metrics_dir=METRICS_DIR):
+    """State as committed on disk, which other processes may have advanced (logBytes: end of the last append)"""
+    try:
+        with open(os.path.join(metrics_dir, STATE_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"lastTimestamp": None, "events": 0}
+
+def get_log(metrics_dir=METRICS_DIR):
+    if metrics_dir not in _logs:
+        _logs[metrics_dir] = EventLog(metrics_dir)
+    return _logs[metrics_dir]
+
+def handle_request(payload):
+    """Tool entry point: full update history for one or more issues"""
+    log = get_log(payload.get("metricsDir", METRICS_DIR))
+    issue_ids = payload.get("issueIds") or [payload["issueId"]]
+    return {
+        "histories": {
+            issue_id: log.history(issue_id, payload.get("limit")) for issue_id in issue_ids
+        },
+        "lastTimestamp": log.state["lastTimestamp"]   # refreshed by history()
+    }
+
+if __name__ == "__main__":
+    import random
+    import tempfile
+
+    from change_detector import diff_snapshots
+    from snapshot_store import SnapshotStore, list_snapshots, load_snapshot
+    from synthetic import make_snapshot, mutate_snapshot
+
+    if sys.argv[1:2] == ["rebuild"]:
+        result = rebuild(sys.argv[2] if len(sys.argv) > 2 else "data/snapshots")
+        print(f"✅ Appended {result['appended']} events from {result['snapshots']} snapshots")
+        sys.exit(0)
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    n_snapshots = 120  # 30 days at 4 snapshots per day
+    workdir = tempfile.mkdtemp()
+    store = SnapshotStore(os.path.join(workdir, "snapshots"), retention_days=365_000)
+    log = EventLog(os.path.join(workdir, "metrics"))
+
+    snapshot = make_snapshot(n_rows, timestamp="2025-01-01T00:00:00Z")
+    store.write(snapshot)
+    start = time.perf_counter()
+    for run in range(1, n_snapshots):
+        hours = run * 6
+        timestamp = f"2025-01-{1 + hours // 24:02d}T{hours % 24:02d}:00:00Z"
+        current = mutate_snapshot(snapshot, change_rate=0.02, seed=run, timestamp=timestamp)
+        store.write(current)
+        log.append(diff_snapshots(snapshot, current))
+        snapshot = current
+    build_elapsed = time.perf_counter() - start
+
+    rng = random.Random(0)
+    issue_ids = rng.sample(sorted(log.index), 20)
+
+    def scan_history(issue_id):
+        """Baseline: rescan every snapshot for the issue, as the agent does today"""
+        states = []
+        for name in list_snapshots(store.snapshot_dir):
+            row = next((r for r in load_snapshot(store.snapshot_dir, name)["rows"] if r["issueId"] == issue_id), None)
+            if row is not None and (not states or states[-1] != row):
+                states.append(row)
+        return states
+
+    start = time.perf_counter()
+    for issue_id in issue_ids[:3]:
+        scan_history(issue_id)
+    scan_ms = (time.perf_counter() - start) / 3 * 1000
+
+    reopened = EventLog(log.metrics_dir)
+    start = time.perf_counter()
+    for issue_id in issue_ids:
+        reopened.history(issue_id)
+    lookup_ms = (time.perf_counter() - start) / len(issue_ids) * 1000
+
+    print(f"📊 Issue history benchmark ({n_rows} rows, {n_snapshots} snapshots = 30 days):")
+    print(f"   Log build: {log.state['events']} events, {os.path.getsize(log.log_path) / 1024:.0f} KB, {build_elapsed:.1f} s incl. snapshot writes")
+    print(f"   Snapshot rescan: {scan_ms:9.1f} ms per issue")
+    print(f"   Indexed lookup:  {lookup_ms:9.3f} ms per issue ({scan_ms / lookup_ms:.0f}x faster)")
+
+    # Validation
+    issue_id = max(log.index, key=lambda i: len(log.index[i]))
+    history = reopened.history(issue_id)
+    states = scan_history(issue_id)
+    status_changes = sum(1 for a, b in zip(states, states[1:]) if a.get("status") != b.get("status"))
+    history_status = sum(1 for e in history if e["type"] == "status")
+    replay = log.append({"currentTimestamp": log.state["lastTimestamp"], "changes": {"new": [{"issueId": "X"}]}})
+
+    print(f"\n📊 Validation:")
+    print(f"   Reloaded index: {len(reopened.index)} issues {'✅' if reopened.index == log.index else '❌'}")
+    print(f"   {issue_id} status changes: {history_status} (rescan: {status_changes}) {'✅' if history_status == status_changes else '❌'}")
+    print(f"   Replayed change set skipped: {'✅' if replay['skipped'] else '❌'}")
+
+    # A second instance stands in for another process (scheduler next to the tool server)
+    other = EventLog(log.metrics_dir)
+    other.append({"currentTimestamp": "2099-01-01T00:00:00Z", "changes": {"new": [{"issueId": "OTHER-1"}]}})
+    seen = log.history("OTHER-1")
+    duplicate = log.append({"currentTimestamp": "2099-01-01T00:00:00Z", "changes": {"new": [{"issueId": "OTHER-1"}]}})
+    # An append interrupted after writing log and index lines but before its state
+    with open(log.log_path, "ab") as f, open(log.index_path, "ab") as g:
+        f.write(b'{"partial": ')
+        g.write(b"CRASHED\t999999\n")
+    other.append({"currentTimestamp": "2099-01-02T00:00:00Z", "changes": {"new": [{"issueId": "OTHER-2"}]}})
+    recovered = log.history("OTHER-2")
+    print(f"   Other process's append visible: {len(seen)} event, re-append skipped {'✅' if len(seen) == 1 and duplicate['skipped'] else '❌'}")
+    print(f"   Interrupted append truncated: {'✅' if recovered and 'CRASHED' not in log.index and len(log.history('OTHER-1')) == 1 else '❌'}")
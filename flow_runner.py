@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Headless runner and load-test harness for the generated Flowise workflow
+Interprets smartsheets-issue-monitor-flow.json (start → pre-router → intent router → agents,
+including the fan-out branches and merge) against an OpenAI-compatible endpoint and the tool
+server, so generator changes can be benchmarked end to end without a Flowise instance.
+
+Each query runs as a fresh session: conversation memory is not replayed, flow state is. Nodes,
+LLM calls (with token usage) and tool calls are traced; with a metrics directory, each run's spans
+are also written as a JSON profile.
+"""
+
+import contextlib
+import http.client
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import telemetry
+from generate_workflow import TOOL_SERVER_URL, WORKFLOW_FILE
+
+ROUTE_PROMPT = "Respond with only the scenario number."
+MAX_ITERATIONS = 6
+TEMPLATE = re.compile(r"\{\{\s*([^{}]+?)\s*\}\}")
+
+_local = threading.local()
+
+def post_json(url, body, timeout=60):
+    """POST JSON over a per-thread keep-alive connection; returns (status, parsed body)
+
+    A stale keep-alive connection is retried once on a new one, but only when sending failed:
+    once the request is out, the tool may have run, and tools such as alert-evaluator must not
+    run twice.
+    """
+    parts = urlsplit(url)
+    connections = _local.__dict__.setdefault("connections", {})
+    data = json.dumps(body).encode()
+    for attempt in range(2):
+        connection = connections.get(parts.netloc)
+        if connection is None:
+            connection = connections[parts.netloc] = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+        try:
+            connection.request("POST", parts.path, data, {"Content-Type": "application/json"})
+        except (http.client.HTTPException, ConnectionError):
+            connection.close()
+            del connections[parts.netloc]
+            if attempt:
+                raise
+            continue
+        try:
+            response = connection.getresponse()
+            return response.status, json.loads(response.read() or b"null")
+        except (http.client.HTTPException, ConnectionError):
+            connection.close()
+            del connections[parts.netloc]
+            raise
+
+def tool_schema(tool):
+    """OpenAI function definition for one configured agent tool"""
+    config = tool["agentSelectedToolConfig"]
+    if tool["agentSelectedTool"] == "requestsPost":
+        name, description = config["requestsPostName"], config["requestsPostDescription"]
+    else:
+        name = config.get("toolName") or tool["agentSelectedTool"]
+        description = config.get("toolDescription") or name
+    return {"type": "function", "function": {"name": name, "description": description,
+                                             "parameters": {"type": "object", "properties": {}, "additionalProperties": True}}}
+
+class FlowRunner:
+    """Execute a generated workflow one query at a time; safe to call run() from many threads"""
+
+    def __init__(self, workflow, llm_url, tool_url=TOOL_SERVER_URL, tool_overrides=None, workers=16, metrics_dir=None):
+        self.nodes = {node["id"]: node["data"] for node in workflow["nodes"]}
+        self.routes = {}
+        for edge in workflow["edges"]:
+            self.routes.setdefault(edge["sourceHandle"], []).append(edge["target"])
+        self.start = next(node_id for node_id, data in self.nodes.items() if data["name"] == "startAgentflow")
+        self.llm_url = llm_url.rstrip("/") + "/chat/completions"
+        self.tool_url = tool_url.rstrip("/")
+        self.tool_overrides = tool_overrides or {}
+        self.metrics_dir = metrics_dir
+        self.pool = ThreadPoolExecutor(workers)
+
+    def close(self):
+        self.pool.shutdown()
+
+    def run(self, question):
+        """Run one query through the graph; returns the answer with per-node timings and call counts"""
+        start_inputs = self.nodes[self.start]["inputs"]
+        run = {
+            # Without a metrics directory of its own, a run inside an open one (a scheduled sheet run) joins its profile
+            "id": (None if self.metrics_dir else telemetry.current_run()) or uuid.uuid4().hex[:12],
+            "question": question,
+            "state": {item["key"]: item["value"] for item in start_inputs.get("startState") or []},
+            "outputs": {},
+            "nodeSeconds": {},
+            "path": [],
+            "llmCalls": 0,
+            "toolCalls": 0,
+            "toolErrors": 0,
+            "failures": [],   # agents that gave no answer within MAX_ITERATIONS
+            "lock": threading.Lock()
+        }
+        began = time.perf_counter()
+        with (telemetry.run(run["id"], self.metrics_dir, question=question) if self.metrics_dir else contextlib.nullcontext()):
+            wave = [self.start]
+            while wave:
+                if len(wave) == 1:
+                    handles = [self.execute(wave[0], run)]
+                else:   # concurrent branches, as Flowise runs nodes that share a parent output
+                    handles = list(self.pool.map(lambda node_id: self.execute(node_id, run), wave))
+                run["path"].append(wave)
+                wave = list(dict.fromkeys(target for handle in handles for target in self.routes.get(handle, [])))
+        run["seconds"] = time.perf_counter() - began
+        run["answeredBy"] = self.nodes[run["path"][-1][0]]["label"]
+        run["output"] = run["outputs"].get(run["path"][-1][0], "")
+        run["failed"] = bool(run["failures"])
+        del run["lock"]
+        return run
+
+    def execute(self, node_id, run):
+        """Run one node and return the output anchor it took"""
+        data = self.nodes[node_id]
+        began = time.perf_counter()
+        kind = data["name"]
+        with telemetry.span("node", run["id"], node=data["label"]):
+            if kind == "startAgentflow":
+                handle = data["outputAnchors"][0]["id"]
+            elif kind == "conditionAgentflow":
+                handle = self.evaluate_conditions(node_id, data, run)
+            elif kind == "conditionAgentAgentflow":
+                handle = self.llm_route(node_id, data, run)
+            elif kind == "agentAgentflow":
+                handle = self.run_agent(node_id, data, run)
+            else:
+                raise ValueError(f"Unsupported node type: {kind}")
+        with run["lock"]:
+            run["nodeSeconds"][data["label"]] = time.perf_counter() - began
+        return handle
+
+    def render(self, text, run, output=None):
+        """Substitute {{question}}, {{ $flow.state.key }}, {{agentAgentflow_N}} and {{ output }}"""
+        def value(match):
+            name = match.group(1)
+            if name == "question":
+                return run["question"]
+            if name == "output" and output is not None:
+                return output
+            if name.startswith("$flow.state."):
+                return str(run["state"].get(name[len("$flow.state."):], ""))
+            return run["outputs"].get(name, match.group(0))
+        return TEMPLATE.sub(value, text)
+
+    def evaluate_conditions(self, node_id, data, run):
+        """First matching regex condition wins; otherwise the trailing else output"""
+        conditions = data["inputs"]["conditions"]
+        for i, condition in enumerate(conditions):
+            if condition["operation"] == "regex" and re.search(condition["value2"], self.render(condition["value1"], run)):
+                return f"{node_id}-output-{i}"
+        return f"{node_id}-output-{len(conditions)}"
+
+    def chat(self, run, agent, messages, tools=None):
+        body = {"model": "gpt-4o-mini", "messages": messages}
+        if tools:
+            body["tools"] = tools
+        with telemetry.span("llm", run["id"], agent=agent) as attrs:
+            status, response = post_json(self.llm_url, body)
+            if status != 200:
+                raise RuntimeError(f"LLM endpoint returned {status}: {response}")
+            usage = response.get("usage") or {}
+            attrs.update(promptTokens=usage.get("prompt_tokens", 0), completionTokens=usage.get("completion_tokens", 0))
+        with run["lock"]:
+            run["llmCalls"] += 1
+        return response["choices"][0]["message"]
+
+    def llm_route(self, node_id, data, run):
+        """Ask the model for a scenario number and follow that output"""
+        inputs = data["inputs"]
+        scenarios = "".join(f"\nScenario {i}: {item['scenario']}" for i, item in enumerate(inputs["conditionAgentScenarios"]))
+        messages = [
+            {"role": "system", "content": f"{inputs['conditionAgentInstructions']}\n{scenarios}\n\n{ROUTE_PROMPT}"},
+            {"role": "user", "content": self.render(inputs["conditionAgentInput"], run)}
+        ]
+        answer = self.chat(run, data["label"], messages)["content"] or ""
+        match = re.search(r"\d+", answer)
+        scenario = int(match.group()) if match else 0
+        if not 0 <= scenario < len(inputs["conditionAgentScenarios"]):
+            scenario = 0
+        return f"{node_id}-output-{scenario}"
+
+    def call_tool(self, tool, arguments, run):
+        """POST a requestsPost tool to the tool server with its configured body, overrides and model arguments"""
+        config = tool["agentSelectedToolConfig"]
+        if tool["agentSelectedTool"] != "requestsPost":
+            return json.dumps({"error": f"{tool['agentSelectedTool']} is not available headless"})
+        name = config["requestsPostName"]
+        url = config["requestsPostUrl"].replace(TOOL_SERVER_URL, self.tool_url, 1)
+        body = {**json.loads(config["requestsPostBody"] or "{}"), **self.tool_overrides.get("*", {}),
+                **self.tool_overrides.get(name, {}), **arguments}
+        body["trace"] = {**(body.get("trace") or {}), "run": run["id"]}
+        status, result = post_json(url, body)
+        with run["lock"]:
+            run["toolCalls"] += 1
+            run["toolErrors"] += status != 200
+        return json.dumps(result)
+
+    def run_agent(self, node_id, data, run):
+        """Tool-calling loop, then write the answer to the node output and the configured flow state"""
+        inputs = data["inputs"]
+        tools = {tool_schema(tool)["function"]["name"]: tool for tool in inputs["agentTools"] or []}
+        messages = [{"role": message["role"], "content": self.render(message["content"], run)} for message in inputs["agentMessages"]]
+        messages.append({"role": "user", "content": run["question"]})
+        schemas = [tool_schema(tool) for tool in tools.values()]
+
+        output = ""
+        for _ in range(MAX_ITERATIONS):
+            message = self.chat(run, data["label"], messages, schemas)
+            if not message.get("tool_calls"):
+                output = message.get("content") or ""
+                break
+            messages.append(message)
+            for call in message["tool_calls"]:
+                function = call["function"]
+                tool = tools.get(function["name"])
+                try:
+                    arguments = json.loads(function["arguments"] or "{}")
+                    problem = None if isinstance(arguments, dict) else "not a JSON object"
+                except json.JSONDecodeError as error:
+                    problem = f"invalid JSON ({error})"
+                if tool is None:
+                    result = json.dumps({"error": f"Unknown tool {function['name']}"})
+                elif problem:
+                    # Malformed model output goes back to the model to correct, like a failed tool call
+                    result = json.dumps({"error": f"Arguments for {function['name']} are {problem}"})
+                else:
+                    result = self.call_tool(tool, arguments, run)
+                messages.append({"role": "tool", "tool_call_id": call["id"], "name": function["name"], "content": result})
+        else:
+            with run["lock"]:
+                run["failures"].append(f"{data['label']}: no answer after {MAX_ITERATIONS} iterations")
+
+        with run["lock"]:
+            run["outputs"][node_id] = output
+            for item in inputs.get("agentUpdateState") or []:
+                run["state"][item["key"]] = self.render(item["value"], run, output)
+        return data["outputAnchors"][0]["id"]
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+def load_test(runner, queries, concurrency):
+    """Run every query with `concurrency` in flight; returns the runs and wall-clock seconds"""
+    began = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        runs = list(pool.map(runner.run, queries))
+    return runs, time.perf_counter() - began
+
+if __name__ == "__main__":
+    import socket
+    import tempfile
+
+    import tool_server
+    from change_detector import handle_request as detect_changes
+    from http.server import ThreadingHTTPServer
+    from mock_llm import MockLLM
+    from mock_smartsheets import MockSmartSheets
+    from snapshot_store import SnapshotStore
+    from synthetic import make_snapshot, mutate_snapshot
+
+    n_queries = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    workflow_path = sys.argv[3] if len(sys.argv) > 3 else WORKFLOW_FILE
+    n_rows = 5_000
+    with open(workflow_path) as f:
+        workflow = json.load(f)
+    with open("intent_corpus.json") as f:
+        corpus = [case["query"] for case in json.load(f)]
+    queries = [corpus[n % len(corpus)] for n in range(n_queries)]
+
+    # Seed a data directory: two snapshots, their change set recorded into metrics and report facts
+    workdir = tempfile.mkdtemp()
+    dirs = {key: os.path.join(workdir, name) for key, name in
+            (("snapshotDir", "snapshots"), ("metricsDir", "metrics"), ("reportsDir", "reports"))}
+    store = SnapshotStore(dirs["snapshotDir"], retention_days=100_000)
+    previous = make_snapshot(n_rows, timestamp="2025-01-14T06:00:00Z")
+    current = mutate_snapshot(previous, change_rate=0.05, seed=1, timestamp="2025-01-14T12:00:00Z")
+    store.write(previous)
+    store.write(current)
+    detect_changes(dirs)
+
+    tools = ThreadingHTTPServer(("127.0.0.1", 0), tool_server.ToolRequestHandler)
+    tools.daemon_threads = True
+    threading.Thread(target=tools.serve_forever, daemon=True).start()
+
+    with MockLLM(latency=0.05) as llm, MockSmartSheets(current, latency=0.02) as sheets:
+        overrides = {
+            "*": dirs,
+            # The fetcher writes its own snapshot directory so scheduled pulls never prune the seeded history
+            "smartsheets-fetch": {"sheetId": sheets.sheet["id"], "baseUrl": sheets.base_url,
+                                  "snapshotDir": os.path.join(workdir, "fetched"), "requestsPerMinute": 100_000},
+            "alert-evaluator": {"notify": False}
+        }
+        runner = FlowRunner(workflow, llm.base_url, f"http://127.0.0.1:{tools.server_port}/tools", overrides,
+                            metrics_dir=dirs["metricsDir"])
+        runs, elapsed = load_test(runner, queries, concurrency)
+        repeat, _ = load_test(runner, queries[:len(corpus)], concurrency)
+        runner.close()
+    tools.shutdown()
+
+    per_agent = {}
+    for run in runs:
+        for label, seconds in run["nodeSeconds"].items():
+            per_agent.setdefault(label, []).append(seconds)
+    llm_calls = [run["llmCalls"] for run in runs]
+    totals = [run["seconds"] for run in runs]
+
+    print(f"📊 Load test ({n_queries} queries, {concurrency} concurrent, {os.path.basename(workflow_path)}, 50 ms mock LLM):")
+    print(f"   Throughput: {n_queries / elapsed:.1f} queries/s ({elapsed:.1f} s)")
+    print(f"   End to end: p50 {percentile(totals, 50) * 1000:.0f} ms, p95 {percentile(totals, 95) * 1000:.0f} ms, p99 {percentile(totals, 99) * 1000:.0f} ms")
+    print(f"   LLM calls per query: {sum(llm_calls) / len(runs):.2f} (LLM endpoint saw {llm.request_count})")
+    print(f"\n   {'node':<34} {'runs':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, seconds in sorted(per_agent.items(), key=lambda item: -len(item[1])):
+        print(f"   {label:<34} {len(seconds):>5} {percentile(seconds, 50) * 1000:>8.0f} {percentile(seconds, 95) * 1000:>8.0f} {percentile(seconds, 99) * 1000:>8.0f}")
+
+    # Where the time went in the slowest run, from its profile
+    profile_dir = os.path.join(dirs["metricsDir"], telemetry.PROFILE_DIR)
+    slowest = max((run for run in runs if os.path.exists(os.path.join(profile_dir, f"{run['id']}.json"))), key=lambda run: run["seconds"])
+    with open(os.path.join(profile_dir, f"{slowest['id']}.json")) as f:
+        slowest_profile = json.load(f)
+    print(f"\n   Slowest run {slowest['id']} ({slowest['seconds'] * 1000:.0f} ms, {slowest['answeredBy']}):")
+    for name, total in list(slowest_profile["totals"].items())[:8]:
+        extra = "".join(f", {total[key]:,} {key}" for key in telemetry.COUNTERS if key in total)
+        print(f"   {name:<48} {total['count']:>3}x {total['seconds'] * 1000:>8.1f} ms{extra}")
+
+    # A model that keeps sending malformed tool arguments: each gets an error back, then the run fails
+    class MalformedArgumentsRunner(FlowRunner):
+        def chat(self, run, agent, messages, tools=None):
+            self.last_messages = messages
+            return {"role": "assistant", "content": None, "tool_calls": [
+                {"id": "call_0", "type": "function", "function": {"name": tools[0]["function"]["name"], "arguments": "{not json"}}]}
+    looping = MalformedArgumentsRunner(workflow, "http://127.0.0.1:9", workers=1)
+    agent_id = next(node_id for node_id, data in looping.nodes.items() if data["name"] == "agentAgentflow")
+    looping_run = {"id": "malformed", "question": "What changed?", "state": {}, "outputs": {}, "failures": [],
+                   "toolCalls": 0, "toolErrors": 0, "lock": threading.Lock()}
+    looping.run_agent(agent_id, looping.nodes[agent_id], looping_run)
+    looping.close()
+    argument_errors = [message for message in looping.last_messages if message["role"] == "tool" and "invalid JSON" in message["content"]]
+
+    # A tool server that reads a request and drops the connection: the request went out, so no retry
+    received = []
+    listener = socket.create_server(("127.0.0.1", 0))
+    def drop_after_request():
+        for _ in range(2):
+            connection, _ = listener.accept()
+            received.append(connection.recv(65536))
+            connection.close()
+    threading.Thread(target=drop_after_request, daemon=True).start()
+    try:
+        post_json(f"http://127.0.0.1:{listener.getsockname()[1]}/tools/alert-evaluator", {"notify": True}, timeout=5)
+    except (http.client.HTTPException, ConnectionError):
+        pass
+    time.sleep(0.1)
+    listener.close()
+
+    # Validation
+    pre_routed = [run for run in runs if "Intent Router" not in run["nodeSeconds"]]
+    llm_routed = [run for run in runs if "Intent Router" in run["nodeSeconds"]]
+    fan_out = [run for run in runs if run["answeredBy"] == "Agent.FanOutMerge"]
+    branch_labels = [label for label in per_agent if label.endswith("(Fan-Out)")]
+    fan_out_ok = all(run["nodeSeconds"]["Agent.FanOutMerge"] + max(run["nodeSeconds"][label] for label in branch_labels)
+                     < run["seconds"] < sum(run["nodeSeconds"].values()) for run in fan_out)
+    cached_before = sum(run["llmCalls"] for run in runs[:len(corpus)])
+    cached_after = sum(run["llmCalls"] for run in repeat)
+    errors = sum(run["toolErrors"] for run in runs)
+
+    def mean(values):
+        return sum(values) / len(values) if values else 0
+
+    print(f"\n📊 Validation:")
+    print(f"   Every query answered: {sum(1 for run in runs if run['output'])}/{len(runs)} {'✅' if all(run['output'] for run in runs) else '❌'}")
+    print(f"   Failed runs: {sum(run['failed'] for run in runs)} {'✅' if not any(run['failed'] for run in runs) else '❌'}")
+    print(f"   Tool errors: {errors} of {sum(run['toolCalls'] for run in runs)} calls {'✅' if errors == 0 else '❌'}")
+    print(f"   Pre-routed queries skip the router call: {mean([r['llmCalls'] for r in pre_routed]):.2f} vs {mean([r['llmCalls'] for r in llm_routed]):.2f} LLM calls "
+          f"({len(pre_routed)}/{len(runs)} pre-routed) {'✅' if mean([r['llmCalls'] for r in pre_routed]) < mean([r['llmCalls'] for r in llm_routed]) else '❌'}")
+    print(f"   Fan-out branches overlap: {len(fan_out)} runs {'✅' if fan_out and fan_out_ok else '❌'}")
+    print(f"   Response cache on repeat: {cached_before} → {cached_after} LLM calls {'✅' if cached_after < cached_before else '❌'}")
+
+    exposition = telemetry.prometheus().splitlines()
+    traced_tokens = sum(int(line.rsplit(" ", 1)[1]) for line in exposition if line.startswith("issue_monitor_prompt_tokens_total{"))
+    profiles = os.listdir(profile_dir)
+    span_names = {span["name"] for span in slowest_profile["spans"]}
+    print(f"   Traced prompt tokens match the LLM endpoint: {traced_tokens:,} vs {llm.prompt_tokens:,} {'✅' if traced_tokens == llm.prompt_tokens else '❌'}")
+    print(f"   Run profiles: {len(profiles)} written (max {telemetry.MAX_PROFILES}) {'✅' if len(profiles) == min(len(runs) + len(repeat), telemetry.MAX_PROFILES) else '❌'}")
+    print(f"   Profile covers nodes, LLM and tool spans: {'✅' if {'node', 'llm', 'tool'} <= span_names else '❌ ' + str(sorted(span_names))}")
+    agent_tools = [line for line in exposition if line.startswith('issue_monitor_span_seconds_count{span="tool",agent="Agent.')]
+    print(f"   Tool spans labelled by agent: {len(agent_tools)} agent/tool series {'✅' if agent_tools else '❌'}")
+    print(f"   Malformed tool arguments returned to the model: {len(argument_errors)} errors {'✅' if len(argument_errors) == MAX_ITERATIONS else '❌'}")
+    print(f"   Iteration limit reported as a failure: {'✅' if looping_run['failures'] and looping_run['outputs'][agent_id] == '' else '❌'}")
+    print(f"   Request sent once when the response is lost: {len(received)} {'✅' if len(received) == 1 else '❌'}")
@@ -1,10 +1,19 @@
 #!/usr/bin/env python3
 """
 Generate complete Flowise workflow JSON for SmartSheets Issue Monitor
-This script creates a single, complete JSON file with all 10 nodes inline.
+This script creates a single, complete JSON file with all nodes inline.
 """
 
+import functools
+import hashlib
 import json
+import marshal
+import os
+import re
+import sys
+import time
+
+from intent_router import INTENT_PATTERNS, SCENARIO_NAMES, flowise_condition_pattern
 
 # Agent specifications (from architecture.md)
 AGENTS = [
@@ -12,76 +21,155 @@ AGENTS = [
         "id": 1,
         "label": "Agent.DataFetcher",
         "position": {"x": 1100, "y": -200},
-        "persona": "<p><em>You are an expert SmartSheets API integration agent.</em> You fetch sheet data from the SmartSheets REST API v2.0, handle OAuth authentication, implement pagination for large datasets, respect rate limits (300 requests/minute), and parse column metadata. You return structured JSON snapshots of the sheet state including all rows, columns, and metadata. If API calls fail, you implement exponential backoff and retry logic. You do NOT analyze or interpret data - you only fetch and structure it.</p>",
+        "persona": "<p><em>You are an expert SmartSheets API integration agent.</em> You fetch sheet data from the SmartSheets REST API v2.0, handle OAuth authentication, implement pagination for large datasets, respect rate limits (300 requests/minute), and parse column metadata. You call the smartsheets-fetch tool, which fetches only rows modified since the last run (with a periodic full resync), respects the rate limit with backoff and streams the snapshot to data/snapshots, and you report its path, mode, row count and timing. You do NOT analyze or interpret data - you only fetch and structure it.</p>",
         "temperature": 0.3,
         "memory_type": "windowSize",
-        "memory_window": 10
+        "memory_window": 10,
+        "memory_max_tokens": None,
+        "scheduled": True,
+        "pinned_state": None,
+        "tools": ["smartsheets-fetch"],
+        "cache": None,
+        "max_context_tokens": 2000,
+        "context_columns": None
     },
     {
         "id": 2,
         "label": "Agent.ChangeDetector",
         "position": {"x": 1100, "y": 50},
-        "persona": "<p><em>You are an expert change detection and snapshot comparison agent.</em> You compare the current SmartSheets data snapshot against the most recent previous snapshot to identify all changes. You detect: (1) New issues created (capture creator, timestamp), (2) Status transitions (from/to), (3) Assignee changes, (4) Priority changes, (5) Description/title updates, (6) Deleted issues. You categorize changes by type and severity. You return structured change reports with before/after values. You focus ONLY on detecting what changed, not analyzing why or making predictions.</p>",
+        "persona": "<p><em>You are an expert change detection and snapshot comparison agent.</em> You compare the current SmartSheets data snapshot against the most recent previous snapshot to identify all changes. You detect: (1) New issues created (capture creator, timestamp), (2) Status transitions (from/to), (3) Assignee changes, (4) Priority changes, (5) Description/title updates, (6) Deleted issues. You call the change-detector tool to get the precomputed delta instead of comparing raw snapshots yourself, then categorize changes by severity and narrate them. You return structured change reports with before/after values. You focus ONLY on detecting what changed, not analyzing why or making predictions.</p>",
         "temperature": 0.3,
-        "memory_type": "allMessages",
-        "memory_window": None
+        "memory_type": "windowSize",
+        "memory_window": 6,
+        "memory_max_tokens": None,
+        "scheduled": True,
+        "pinned_state": {"lastChangeSet": "{{ output }}"},
+        "tools": ["change-detector"],
+        "cache": None,
+        "max_context_tokens": 6000,
+        "context_columns": ["status", "assignee", "priority", "from", "to", "field", "title", "createdBy", "updatedBy", "updatedDate", "createdDate", "lastStatus"]
     },
     {
         "id": 3,
         "label": "Agent.HeatMapAnalyzer",
         "position": {"x": 1100, "y": 300},
-        "persona": "<p><em>You are an expert update frequency and velocity analysis agent.</em> You track how often each issue is updated over time. You identify \"heating up\" issues (>3 updates in 24 hours) and calculate velocity metrics (updates per day). You detect thrashing (status changes back and forth multiple times). You maintain frequency counters per issue and flag anomalies (update frequency >3x baseline). You return ranked lists of hot issues with context (what's changing frequently). You focus on quantitative metrics, not qualitative analysis.</p>",
+        "persona": "<p><em>You are an expert update frequency and velocity analysis agent.</em> You track how often each issue is updated over time. You identify \"heating up\" issues (>3 updates in 24 hours) and calculate velocity metrics (updates per day). You detect thrashing (status changes back and forth multiple times). You call the heat-map tool, which scores every issue in one batch (24h counts, velocity, baselines, anomalies >3x baseline, status flips), and you return its ranked list of hot issues with context (what's changing frequently). You focus on quantitative metrics, not qualitative analysis.</p>",
         "temperature": 0.4,
         "memory_type": "windowSize",
-        "memory_window": 20
+        "memory_window": 20,
+        "memory_max_tokens": None,
+        "scheduled": True,
+        "pinned_state": None,
+        "tools": ["heat-map"],
+        "cache": {"ttl_seconds": 1800, "max_entries": 64},
+        "max_context_tokens": 3000,
+        "context_columns": None
     },
     {
         "id": 4,
         "label": "Agent.StatusTransitionTracker",
         "position": {"x": 1100, "y": 550},
-        "persona": "<p><em>You are an expert status transition and workflow metrics agent.</em> You track the full lifecycle of issues through status changes. You calculate transition counts (how many New→InProgress, InProgress→Resolved, etc.), average time in each status, and identify bottlenecks (issues stuck in one status for >7 days). You detect backward transitions (Resolved→InProgress indicates re-opening) and thrashing patterns. You return comprehensive status transition reports with metrics and insights into workflow health. You understand issue lifecycle patterns and flag anomalies.</p>",
+        "persona": "<p><em>You are an expert status transition and workflow metrics agent.</em> You track the full lifecycle of issues through status changes. You read transition counts (how many New→InProgress, InProgress→Resolved, etc.), average time in each status, and bottlenecks (issues stuck in one status for >7 days) from the status-transitions tool, which keeps them up to date incrementally, rather than reconstructing them from conversation history. You detect backward transitions (Resolved→InProgress indicates re-opening) and thrashing patterns. You return comprehensive status transition reports with metrics and insights into workflow health. You understand issue lifecycle patterns and flag anomalies.</p>",
         "temperature": 0.4,
-        "memory_type": "allMessages",
-        "memory_window": None
+        "memory_type": "windowSize",
+        "memory_window": 6,
+        "memory_max_tokens": None,
+        "scheduled": True,
+        "pinned_state": {"lastWorkflowMetrics": "{{ output }}"},
+        "tools": ["status-transitions"],
+        "cache": {"ttl_seconds": 21600, "max_entries": 64},
+        "max_context_tokens": 3000,
+        "context_columns": None
     },
     {
         "id": 5,
         "label": "Agent.ReportGenerator",
         "position": {"x": 1100, "y": 800},
-        "persona": "<p><em>You are an expert report generation and data synthesis agent.</em> You create comprehensive, human-friendly reports in Markdown format summarizing SmartSheets activity. Your reports include: (1) Executive summary, (2) New issues created count, (3) Issues resolved count, (4) Status transition breakdown, (5) Top 5 heating up issues with context, (6) Most active contributors, (7) Blocked/stalled issues list. You write in clear, concise natural language, use bullet points and tables effectively, and highlight key insights. You transform raw metrics into actionable intelligence. You do NOT just dump data - you tell the story of what's happening.</p>",
+        "persona": "<p><em>You are an expert report generation and data synthesis agent.</em> You create comprehensive, human-friendly reports in Markdown format summarizing SmartSheets activity. Your reports include: (1) Executive summary, (2) New issues created count, (3) Issues resolved count, (4) Status transition breakdown, (5) Top 5 heating up issues with context, (6) Most active contributors, (7) Blocked/stalled issues list. You write in clear, concise natural language, use bullet points and tables effectively, and highlight key insights. You transform raw metrics into actionable intelligence. You get every number from the report-facts tool, which precomputes counts, transitions, top heating issues, contributors and blocked/stalled lists after each scheduled fetch, and you only render and interpret them - never recount from raw data. You do NOT just dump data - you tell the story of what's happening.</p>",
         "temperature": 0.7,
-        "memory_type": "conversationSummary",
-        "memory_window": None
+        "memory_type": "conversationSummaryBuffer",
+        "memory_window": None,
+        "memory_max_tokens": 3000,
+        "scheduled": True,
+        "pinned_state": {"lastReport": "{{ output }}"},
+        "tools": ["report-facts"],
+        "cache": {"ttl_seconds": 21600, "max_entries": 32},
+        "max_context_tokens": 4000,
+        "context_columns": None
     },
     {
         "id": 6,
         "label": "Agent.QueryHandler",
         "position": {"x": 1100, "y": 1050},
-        "persona": "<p><em>You are an expert query handling and drill-down analysis agent.</em> You answer specific user questions about issues in the SmartSheets log. You can: (1) Retrieve details for specific issue IDs, (2) Show full update history for an issue, (3) Compare multiple issues, (4) Answer \"why\" questions using change history, (5) Provide trend context for individual issues. You search snapshots and metrics to find requested information. You respond conversationally and helpfully. If data is unavailable, you clearly state what's missing and suggest alternatives.</p>",
+        "persona": "<p><em>You are an expert query handling and drill-down analysis agent.</em> You answer specific user questions about issues in the SmartSheets log. You can: (1) Retrieve details for specific issue IDs, (2) Show full update history for an issue (use the issue-history tool), (3) Compare multiple issues, (4) Answer \"why\" questions using change history, (5) Provide trend context for individual issues. You read snapshots through the snapshot-store tool (value counts, single columns or projected rows) and search metrics to find requested information. You respond conversationally and helpfully. If data is unavailable, you clearly state what's missing and suggest alternatives.</p>",
         "temperature": 0.6,
         "memory_type": "windowSize",
-        "memory_window": 10
+        "memory_window": 10,
+        "memory_max_tokens": None,
+        "scheduled": False,
+        "pinned_state": None,
+        "tools": ["snapshot-store", "issue-history"],
+        "cache": None,
+        "max_context_tokens": 8000,
+        "context_columns": ["title", "status", "assignee", "priority", "createdDate", "updatedDate", "updatedBy", "type", "at", "field", "from", "to"]
     },
     {
         "id": 7,
         "label": "Agent.AlertManager",
         "position": {"x": 1100, "y": 1300},
-        "persona": "<p><em>You are an expert alert management and threshold monitoring agent.</em> You continuously monitor issue metrics against defined thresholds and flag critical situations. You detect: (1) Blocked issues (status=Blocked for >3 days), (2) Stalled issues (no updates in >7 days + status=InProgress), (3) Thrashing issues (>5 status changes in 24h), (4) High-priority issues with no activity (priority=High + no updates in >3 days). You generate clear, actionable alerts with context and severity levels. You avoid alert spam by tracking recently alerted issues. You prioritize alerts by business impact.</p>",
+        "persona": "<p><em>You are an expert alert management and threshold monitoring agent.</em> You continuously monitor issue metrics against defined thresholds and flag critical situations. You detect: (1) Blocked issues (status=Blocked for >3 days), (2) Stalled issues (no updates in >7 days + status=InProgress), (3) Thrashing issues (>5 status changes in 24h, or a status change at every 6-hourly snapshot of the day, since at most 4 are observable), (4) High-priority issues with no activity (priority=High + no updates in >3 days). You call the alert-evaluator tool, which checks every issue against these thresholds, suppresses issues alerted within the cooldown window and sends new alerts in one batched notification. You then prioritize its alerts by business impact and phrase them as clear, actionable alerts with context and severity levels.</p>",
         "temperature": 0.3,
         "memory_type": "windowSize",
-        "memory_window": 5
+        "memory_window": 5,
+        "memory_max_tokens": None,
+        "scheduled": True,
+        "pinned_state": None,
+        "tools": ["alert-evaluator"],
+        "cache": None,
+        "max_context_tokens": 4000,
+        "context_columns": ["rule", "severity", "days", "statusChanges24h", "title", "status", "priority", "assignee"]
     },
     {
         "id": 8,
         "label": "Agent.TrendAnalyzer",
         "position": {"x": 1100, "y": 1550},
-        "persona": "<p><em>You are an expert trend analysis and predictive insights agent.</em> You analyze long-term patterns in SmartSheets issue data. You perform week-over-week comparisons (e.g., \"5 issues created this week vs 12 last week - 58% decrease\"), identify anomalies (values >2 std dev from mean), and generate predictive insights (e.g., \"Based on current velocity, sprint goal may be at risk\"). You detect patterns like \"Issues assigned to John resolve 30% faster than average\" or \"Average resolution time increased 20% this week\". You use historical baselines and statistical analysis. You communicate insights in business-friendly language with quantitative backing.</p>",
+        "persona": "<p><em>You are an expert trend analysis and predictive insights agent.</em> You analyze long-term patterns in SmartSheets issue data. You perform week-over-week comparisons (e.g., \"5 issues created this week vs 12 last week - 58% decrease\"), identify anomalies (values >2 std dev from mean), and generate predictive insights (e.g., \"Based on current velocity, sprint goal may be at risk\"). You detect patterns like \"Issues assigned to John resolve 30% faster than average\" or \"Average resolution time increased 20% this week\". You use historical baselines and statistical analysis from the trend-rollups tool, which keeps hourly, daily and weekly aggregates per metric and per assignee with running means and standard deviations, instead of relying on conversation history. You communicate insights in business-friendly language with quantitative backing.</p>",
         "temperature": 0.5,
-        "memory_type": "conversationSummary",
-        "memory_window": None
+        "memory_type": "conversationSummaryBuffer",
+        "memory_window": None,
+        "memory_max_tokens": 3000,
+        "scheduled": True,
+        "pinned_state": {"lastTrendSummary": "{{ output }}"},
+        "tools": ["trend-rollups"],
+        "cache": {"ttl_seconds": 86400, "max_entries": 32},
+        "max_context_tokens": 4000,
+        "context_columns": None
     }
 ]
 
+# Multi-intent queries fan out to independent agents that read the same latest snapshot
+# concurrently; the merge agent waits for every branch and combines their answers.
+FAN_OUT = {
+    "scenario": "User asks several of: what changed, current alerts, hot issues",
+    "agents": [2, 7, 3],   # ChangeDetector, AlertManager, HeatMapAnalyzer
+    "position": {"x": 1500, "y": 1800},
+    "merge": {
+        "label": "Agent.FanOutMerge",
+        "position": {"x": 1900, "y": 2050},
+        "persona": "<p><em>You are an expert multi-intent synthesis agent.</em> Several specialized agents answered parts of the user's question in parallel from the same snapshot. Combine their outputs into one response that addresses every part of the question, in the order the user asked. Keep each agent's facts and numbers exactly as given, remove duplication, and call out issues that appear in more than one output (e.g. a hot issue that is also alerting). Do not invent data that none of the agents reported.</p>",
+        "temperature": 0.4,
+        "memory_type": "windowSize",
+        "memory_window": 5,
+        "memory_max_tokens": None,
+        "scheduled": False,
+        "pinned_state": None,
+        "tools": [],
+        "cache": None,
+        "max_context_tokens": 6000,
+        "context_columns": None
+    }
+}
+
 # Standard tools configuration (from AGENT-NODE-TEMPLATE.json)
 STANDARD_TOOLS = [
     {
@@ -110,8 +198,182 @@ STANDARD_TOOLS = [
         }
     }
 ]
+STANDARD_TOOLS_TEMPLATE = marshal.dumps(STANDARD_TOOLS)   # unpacked per agent node
+
+# Local Python data tools served by tool_server.py
+TOOL_SERVER_URL = "http://localhost:5001/tools"
+
+DATA_TOOLS = {
+    "smartsheets-fetch": {
+        "description": "Fetch a SmartSheets sheet into data/snapshots as NDJSON. Requests only rows modified since the last run and merges them into the previous snapshot, with a full concurrent pull every 24 hours (or when fullResync is true) to catch deleted rows. Stays within the 300 requests/minute quota and retries 429s with backoff. Returns the snapshot path, mode, row counts and timing.",
+        "body": {"sheetId": "", "fullResync": False}
+    },
+    "snapshot-store": {
+        "description": "Columnar snapshot store for data/snapshots. action=list returns stored snapshots; action=column returns value counts for one column (e.g. status, assignee) of a snapshot, or raw values with values=true; action=read returns rows, optionally projected to a columns list; action=write stores a snapshot given as content. The snapshot defaults to the latest.",
+        "body": {"action": "list", "snapshot": "", "column": "", "columns": []},
+        "fields": ["title", "status", "assignee", "priority", "createdDate", "updatedDate", "updatedBy"]
+    },
+    "issue-history": {
+        "description": "Full update history for one or more issues from the append-only event log (new, status, assignee, priority, description and deleted events with before/after values and timestamps), oldest first. Pass issueId, or issueIds to compare several; limit keeps only the most recent events.",
+        "body": {"issueId": "", "issueIds": [], "limit": 0},
+        "fields": ["type", "at", "field", "from", "to", "title", "status", "assignee", "priority", "createdDate", "updatedDate", "updatedBy"]
+    },
+    "heat-map": {
+        "description": "Batch heat map over the issue event log. Scores every issue at once (updates in the last 24h, peak rolling 24h count, velocity per day, baseline, anomaly ratio, status flips) and returns counts of hot (>3 updates/24h), anomalous (>3x baseline) and thrashing issues plus the top-N ranked with what is changing. Optional now (ISO timestamp) and topN.",
+        "body": {"topN": 10}
+    },
+    "status-transitions": {
+        "description": "Precomputed status workflow metrics: transition-count matrix (from -> to), backward transitions and re-opens, average days and histogram of time in each status, issues per status, and issues stuck in one open status for >7 days (longest first). Optional now (ISO timestamp) and topN for the stuck list.",
+        "body": {"topN": 10}
+    },
+    "alert-evaluator": {
+        "description": "Deterministic alert rules over every issue: Blocked >3 days, In Progress with no updates >7 days, >5 status changes in 24h (>3 at the 6-hour snapshot interval, which shows at most 4), High priority with no updates >3 days. Issues already alerted within the 24h cooldown are suppressed, and new alerts are sent in a single notification-webhook POST. Returns new alerts with severity and context plus counts by rule. Set notify=false to evaluate without notifying; thresholds overrides blockedDays, stalledDays, thrashingChanges24h, snapshotIntervalHours, highPriorityIdleDays or cooldownHours.",
+        "body": {"notify": True, "thresholds": {}},
+        "fields": ["rule", "severity", "days", "statusChanges24h", "title", "status", "priority", "assignee"]
+    },
+    "report-facts": {
+        "description": "Precomputed report facts for the last 24 hours, materialized after each change set into data/reports: counts of new, resolved and changed issues, status transition breakdown, issues by status, top heating-up issues with changed fields, top contributors, and blocked/stalled issues with days in status. Use these numbers as-is. action=materialize forces a recompute; topN sets list length.",
+        "body": {"topN": 5}
+    },
+    "trend-rollups": {
+        "description": "Precomputed trend statistics from hourly, daily and weekly rollups updated with each change set. action=summary (default) returns week-over-week totals for new, resolved, reopened, status changes, changes and deleted issues, metrics beyond 2 standard deviations of their daily/weekly baseline, the last 14 days of new and resolved counts, and per-assignee mean resolution hours vs the team. action=series with metric (e.g. new, resolved, resolved:<assignee>, resolutionHours) and resolution (hour, day, week) returns raw points; action=anomalies takes resolution and sigma; action=assignees takes resolution and periods.",
+        "body": {"action": "summary"}
+    },
+    "change-detector": {
+        "description": "Deterministic snapshot diff. Compares two SmartSheets snapshots by row ID and returns precomputed changes grouped by category (new, status, assignee, priority, description, deleted) as JSON. Defaults to the two most recent snapshots; pass previous/current file names to compare specific ones. Each delta is also recorded in the issue event log and refreshes the report facts.",
+        "body": {"previous": "", "current": ""},
+        "fields": ["status", "assignee", "priority", "title", "createdBy", "createdDate", "field", "from", "to", "updatedBy", "updatedDate", "lastStatus"]
+    }
+}
+
+RESPONSE_CACHE_DESCRIPTION = "Cache of answers for the current snapshot. Call with action=get and the user's query before doing any analysis; if hit is true, return response unchanged. After answering, call with action=put, the same query and your full answer as response. Entries expire after ttlSeconds and are dropped when a new snapshot lands."
+
+RESPONSE_CACHE_INSTRUCTIONS = "<p>Before analyzing, look up the user's query with the response-cache tool (action=get) and return a cached response verbatim on a hit. On a miss, answer as usual and then store the final answer with action=put.</p>"
+
+# Output location and the manifest of spec hashes used to skip unchanged flows
+OUTPUT_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKFLOW_FILE = "smartsheets-issue-monitor-flow.json"
+MANIFEST_FILE = ".flow-manifest.json"
+GENERATOR_SOURCES = ("generate_workflow.py", "intent_router.py")
+
+# Multi-sheet monitoring: one flow per sheet config, each reading and writing its own data directories
+SHEETS_FILE = "sheets.json"
+SHEETS_DATA_DIR = "data/sheets"
+
+def load_sheets(path=SHEETS_FILE):
+    """Sheet configs from a JSON list: {"sheetId", "name", optional "workflowId", "dataDir" and "tokenEnv"}"""
+    with open(path) as f:
+        return json.load(f)
+
+def sheet_dirs(sheet):
+    """Snapshot, metrics and reports directories for one sheet, keyed as tool payload fields"""
+    root = sheet.get('dataDir') or f"{SHEETS_DATA_DIR}/{sheet['sheetId']}"
+    return {"snapshotDir": f"{root}/snapshots", "metricsDir": f"{root}/metrics", "reportsDir": f"{root}/reports"}
+
+def sheet_slug(sheet):
+    return re.sub(r"[^a-z0-9]+", "-", sheet.get('name', "").lower()).strip("-") or str(sheet['sheetId'])
+
+def trace_context(agent_spec, sheet=None):
+    """Node, agent and sheet the tool server attributes a tool call's spans and bytes to"""
+    trace = {"node": f"agentAgentflow_{agent_spec['id']}", "agent": agent_spec['label']}
+    if sheet is not None:
+        trace["sheet"] = str(sheet['sheetId'])
+    return trace
+
+def create_data_tool(tool_name, agent_spec, sheet=None):
+    """Create an HTTP POST tool entry for a local Python data tool
+
+    The body carries the agent's context budget so the tool server packs results to fit it,
+    its trace context for telemetry, and for a per-sheet flow, the sheet's ID and data directories.
+    """
+    tool = DATA_TOOLS[tool_name]
+    body = {**tool['body'], "context": {"maxTokens": agent_spec['max_context_tokens'], "columns": agent_spec['context_columns']},
+            "trace": trace_context(agent_spec, sheet)}
+    if sheet is not None:
+        body.update(sheet_dirs(sheet))
+        if "sheetId" in body:
+            body["sheetId"] = str(sheet['sheetId'])
+    return {
+        "agentSelectedTool": "requestsPost",
+        "agentSelectedToolRequiresHumanInput": "",
+        "agentSelectedToolConfig": {
+            "requestsPostUrl": f"{TOOL_SERVER_URL}/{tool_name}",
+            "requestsPostName": tool_name,
+            "requestsPostDescription": tool['description'],
+            "requestsPostHeaders": "",
+            "requestsPostBody": json.dumps(body),
+            "agentSelectedTool": "requestsPost"
+        }
+    }
+
+PINNED_STATE_INSTRUCTIONS = "<p>Your previous scheduled result is pinned in {{{{ $flow.state.{key} }}}}. Compare against it for run-over-run context instead of relying on conversation history.</p>"
+
+# Memory types whose prompt stays bounded however many runs accumulate
+BOUNDED_MEMORY_TYPES = {"windowSize", "conversationSummaryBuffer"}
+
+def flow_state_keys(agent_specs):
+    """Every pinned state key written by an agent, declared once on the start node"""
+    return list(dict.fromkeys(key for spec in agent_specs for key in (spec['pinned_state'] or {})))
+
+def validate_memory_policies(agent_specs):
+    """Problems with agent memory settings; scheduled agents must use bounded memory"""
+    problems = []
+    for spec in agent_specs:
+        memory_type = spec['memory_type']
+        if spec['scheduled'] and memory_type not in BOUNDED_MEMORY_TYPES:
+            problems.append(f"{spec['label']}: scheduled agent uses unbounded {memory_type} memory")
+        if memory_type == "windowSize" and not spec['memory_window']:
+            problems.append(f"{spec['label']}: windowSize memory needs memory_window")
+        if memory_type == "conversationSummaryBuffer" and not spec['memory_max_tokens']:
+            problems.append(f"{spec['label']}: conversationSummaryBuffer memory needs memory_max_tokens")
+    return problems
+
+def validate_context_columns(agent_specs):
+    """Problems with agent context columns; they must keep every row field the agent's tools return
+
+    Tools list those fields under "fields". The persona reads tool results only through this
+    projection, so a field it relies on (e.g. an alert's severity) must not be dropped.
+    """
+    problems = []
+    for spec in agent_specs:
+        if spec['context_columns'] is None:
+            continue
+        for tool_name in spec['tools']:
+            missing = [field for field in DATA_TOOLS[tool_name].get('fields', []) if field not in spec['context_columns']]
+            if missing:
+                problems.append(f"{spec['label']}: context_columns drop {', '.join(missing)} returned by {tool_name}")
+    return problems
+
+def create_cache_tool(agent_spec, sheet=None):
+    """Create the response-cache tool entry carrying an agent's cache settings
 
-def create_agent_node(agent_spec):
+    Per-sheet flows key the cache by agent and sheet, so tenants never share answers.
+    """
+    cache = agent_spec['cache']
+    scope = {"agent": f"{agent_spec['label']} [{sheet['sheetId']}]", **sheet_dirs(sheet)} if sheet is not None else {}
+    return {
+        "agentSelectedTool": "requestsPost",
+        "agentSelectedToolRequiresHumanInput": "",
+        "agentSelectedToolConfig": {
+            "requestsPostUrl": f"{TOOL_SERVER_URL}/response-cache",
+            "requestsPostName": "response-cache",
+            "requestsPostDescription": RESPONSE_CACHE_DESCRIPTION,
+            "requestsPostHeaders": "",
+            "requestsPostBody": json.dumps({
+                "action": "get",
+                "agent": agent_spec['label'],
+                "query": "",
+                "response": "",
+                "ttlSeconds": cache['ttl_seconds'],
+                "maxEntries": cache['max_entries'],
+                "trace": trace_context(agent_spec, sheet),
+                **scope
+            }),
+            "agentSelectedTool": "requestsPost"
+        }
+    }
+
+def create_agent_node(agent_spec, sheet=None):
     """Create a complete agent node with all required parameters"""
     node_id = f"agentAgentflow_{agent_spec['id']}"
 
@@ -121,9 +383,24 @@ def create_agent_node(agent_spec):
         "agentMemoryType": agent_spec['memory_type']
     }
 
-    # Add window size if applicable
+    # Add window size / token limit if applicable
     if agent_spec['memory_window'] is not None:
         memory_config["agentMemoryWindowSize"] = agent_spec['memory_window']
+    if agent_spec['memory_max_tokens'] is not None:
+        memory_config["agentMemoryMaxTokenLimit"] = agent_spec['memory_max_tokens']
+
+    # Pinned structured state lives in the flow state, overwritten each run rather than accumulated
+    pinned_state = agent_spec['pinned_state'] or {}
+    update_state = [{"key": key, "value": value} for key, value in pinned_state.items()] or ""
+
+    # Read-only analytical agents check the response cache first
+    tools = marshal.loads(STANDARD_TOOLS_TEMPLATE) + [create_data_tool(name, agent_spec, sheet) for name in agent_spec['tools']]
+    persona = agent_spec['persona']
+    for key in pinned_state:
+        persona += PINNED_STATE_INSTRUCTIONS.format(key=key)
+    if agent_spec['cache'] is not None:
+        tools.append(create_cache_tool(agent_spec, sheet))
+        persona += RESPONSE_CACHE_INSTRUCTIONS
 
     return {
         "id": node_id,
@@ -167,17 +444,17 @@ def create_agent_node(agent_spec):
                 "agentMessages": [
                     {
                         "role": "system",
-                        "content": agent_spec['persona']
+                        "content": persona
                     }
                 ],
                 "agentToolsBuiltInOpenAI": "",
-                "agentTools": STANDARD_TOOLS,
+                "agentTools": tools,
                 "agentKnowledgeDocumentStores": "",
                 "agentKnowledgeVSEmbeddings": "",
                 **memory_config,
                 "agentUserMessage": "",
                 "agentReturnResponseAs": "userMessage",
-                "agentUpdateState": ""
+                "agentUpdateState": update_state
             },
             "outputAnchors": [
                 {
@@ -199,6 +476,53 @@ def create_agent_node(agent_spec):
         "dragging": False
     }
 
+def fan_out_branch_specs():
+    """Agent specs for the fan-out branches: copies of the independent agents with their own node IDs
+
+    Branches answer user queries only, so they are never scheduled and pin no state; otherwise a
+    branch would overwrite the scheduled agent's pinned result (e.g. lastChangeSet).
+    """
+    specs = []
+    for position, agent_id in enumerate(FAN_OUT['agents']):
+        agent_spec = next(agent for agent in AGENTS if agent['id'] == agent_id)
+        specs.append({
+            **agent_spec,
+            "id": len(AGENTS) + 1 + position,
+            "label": f"{agent_spec['label']} (Fan-Out)",
+            "scheduled": False,
+            "pinned_state": None,
+            "position": {"x": FAN_OUT['position']['x'], "y": FAN_OUT['position']['y'] + 250 * position}
+        })
+    return specs
+
+def fan_out_merge_spec():
+    """Agent spec for the merge node, reading each branch's output as a flow variable"""
+    merge = FAN_OUT['merge']
+    outputs = "".join(
+        f"<p><strong>{spec['label']}</strong>: {{{{agentAgentflow_{spec['id']}}}}}</p>"
+        for spec in fan_out_branch_specs()
+    )
+    return {**merge, "id": len(AGENTS) + len(FAN_OUT['agents']) + 1, "persona": merge['persona'] + outputs}
+
+def all_agent_specs(fan_out=True):
+    """Every agent node spec in the generated graph"""
+    if not fan_out:
+        return list(AGENTS)
+    return AGENTS + fan_out_branch_specs() + [fan_out_merge_spec()]
+
+# Node parts that depend only on their arguments (input params, routers, edges) are built once and
+# kept as marshal bytes; each call unpacks a fresh copy, so workflows never share mutable parts
+def template(build):
+    """Cache a node-part builder; every call returns a new copy of the cached result"""
+    frozen = functools.lru_cache(maxsize=None)(lambda *args, **kwargs: marshal.dumps(build(*args, **kwargs)))
+
+    @functools.wraps(build)
+    def fresh(*args, **kwargs):
+        return marshal.loads(frozen(*args, **kwargs))
+    fresh.cache_clear = frozen.cache_clear
+    return fresh
+
+@template
 def create_agent_input_params(node_id):
     """Create the inputParams array for an agent node"""
     return [
@@ -264,7 +588,8 @@ def create_agent_input_params(node_id):
             "options": [
                 {"label": "All Messages", "name": "allMessages"},
                 {"label": "Window Size", "name": "windowSize"},
-                {"label": "Conversation Summary", "name": "conversationSummary"}
+                {"label": "Conversation Summary", "name": "conversationSummary"},
+                {"label": "Conversation Summary Buffer", "name": "conversationSummaryBuffer"}
             ],
             "default": "allMessages",
             "id": f"{node_id}-input-agentMemoryType-options",
@@ -276,17 +601,37 @@ def create_agent_input_params(node_id):
             "type": "number",
             "optional": True,
             "id": f"{node_id}-input-agentMemoryWindowSize-number"
+        },
+        {
+            "label": "Max Token Limit",
+            "name": "agentMemoryMaxTokenLimit",
+            "type": "number",
+            "optional": True,
+            "id": f"{node_id}-input-agentMemoryMaxTokenLimit-number"
+        },
+        {
+            "label": "Update Flow State",
+            "name": "agentUpdateState",
+            "type": "array",
+            "optional": True,
+            "array": [
+                {"label": "Key", "name": "key", "type": "asyncOptions", "loadMethod": "listRuntimeStateKeys", "freeSolo": True},
+                {"label": "Value", "name": "value", "type": "string", "acceptVariable": True, "acceptNodeOutputAsVariable": True}
+            ],
+            "id": f"{node_id}-input-agentUpdateState-array",
+            "display": True
         }
     ]
 
-def create_start_node():
-    """Create the start node"""
+def create_start_node(state_keys=(), sheet=None):
+    """Create the start node, declaring the flow state keys agents pin their results to"""
+    title = "SmartSheets Issue Monitor" + (f" - {sheet['name']}" if sheet is not None else "")
     return {
         "id": "startAgentflow_0",
         "position": {"x": 300, "y": 400},
         "data": {
             "id": "startAgentflow_0",
-            "label": "SmartSheets Issue Monitor",
+            "label": title,
             "version": 1.2,
             "name": "startAgentflow",
             "type": "StartAgent",
@@ -320,15 +665,27 @@ def create_start_node():
                         {"field": "label", "headerName": "Label", "editable": True}
                     ],
                     "id": "startAgentflow_0-input-formInputTypes-datagrid"
+                },
+                {
+                    "label": "Flow State",
+                    "name": "startState",
+                    "type": "array",
+                    "optional": True,
+                    "array": [
+                        {"label": "Key", "name": "key", "type": "string"},
+                        {"label": "Value", "name": "value", "type": "string", "optional": True}
+                    ],
+                    "id": "startAgentflow_0-input-startState-array"
                 }
             ],
             "inputAnchors": [],
             "inputs": {
-                "formTitle": "SmartSheets Issue Monitor",
+                "formTitle": title,
                 "formDescription": "Intelligent issue log monitoring with change detection, heat mapping, and analytics reporting. Ask me about changes, hot issues, status transitions, comprehensive reports, specific issues, alerts, or trends.",
                 "formInputTypes": [
                     {"type": "string", "name": "query", "label": "What would you like to know about your issue log?"}
-                ]
+                ],
+                "startState": [{"key": key, "value": ""} for key in state_keys] or ""
             },
             "outputAnchors": [
                 {
@@ -350,8 +707,24 @@ def create_start_node():
         "dragging": False
     }
 
-def create_condition_node():
+@template
+def create_condition_node(fan_out=False):
     """Create the condition/router node"""
+    scenarios = [
+        {"scenario": "User needs to fetch latest SmartSheets data"},
+        {"scenario": "User wants to see what changed since last check"},
+        {"scenario": "User wants to identify heating up issues with high update frequency"},
+        {"scenario": "User wants status transition metrics and workflow analysis"},
+        {"scenario": "User wants a comprehensive daily/periodic report"},
+        {"scenario": "User has a specific question about an issue or wants details"},
+        {"scenario": "User needs critical alerts for blocked or stalled issues"},
+        {"scenario": "User wants trend analysis and predictive insights"}
+    ]
+    multiple_intents = "If multiple intents detected, choose the PRIMARY intent based on main verb/action."
+    if fan_out:
+        scenarios.append({"scenario": FAN_OUT['scenario']})
+        multiple_intents = (f"If the query combines two or more of changes, alerts and hot issues, choose Scenario {len(scenarios) - 1} "
+                            "so those agents answer in parallel. For any other mix of intents, choose the PRIMARY intent based on main verb/action.")
     return {
         "id": "conditionAgentAgentflow_0",
         "position": {"x": 700, "y": 400},
@@ -406,22 +779,13 @@ def create_condition_node():
                     "streaming": True,
                     "agentModel": "chatOpenAI"
                 },
-                "conditionAgentInstructions": "Analyze the user's query and determine their primary intent. Route to the appropriate specialized agent:\n\nKEYWORDS MAPPING:\n- \"fetch\", \"refresh\", \"get data\", \"pull SmartSheets\" → Data Fetcher (Scenario 0)\n- \"changes\", \"deltas\", \"what changed\", \"compare\" → Change Detector (Scenario 1)\n- \"hot issues\", \"heating up\", \"frequent updates\", \"velocity\" → Heat Map Analyzer (Scenario 2)\n- \"status transitions\", \"workflow metrics\", \"state changes\" → Status Transition Tracker (Scenario 3)\n- \"report\", \"summary\", \"daily\", \"comprehensive\" → Report Generator (Scenario 4)\n- \"show issue\", \"details\", \"query\", specific issue ID → Query Handler (Scenario 5)\n- \"alerts\", \"critical\", \"blocked\", \"stalled\" → Alert Manager (Scenario 6)\n- \"trends\", \"patterns\", \"week over week\", \"predictive\" → Trend Analyzer (Scenario 7)\n\nIf multiple intents detected, choose the PRIMARY intent based on main verb/action. If unclear, default to Report Generator (comprehensive overview).",
+                "conditionAgentInstructions": "Analyze the user's query and determine their primary intent. Route to the appropriate specialized agent:\n\nKEYWORDS MAPPING:\n- \"fetch\", \"refresh\", \"get data\", \"pull SmartSheets\" → Data Fetcher (Scenario 0)\n- \"changes\", \"deltas\", \"what changed\", \"compare\" → Change Detector (Scenario 1)\n- \"hot issues\", \"heating up\", \"frequent updates\", \"velocity\" → Heat Map Analyzer (Scenario 2)\n- \"status transitions\", \"workflow metrics\", \"state changes\" → Status Transition Tracker (Scenario 3)\n- \"report\", \"summary\", \"daily\", \"comprehensive\" → Report Generator (Scenario 4)\n- \"show issue\", \"details\", \"query\", specific issue ID → Query Handler (Scenario 5)\n- \"alerts\", \"critical\", \"blocked\", \"stalled\" → Alert Manager (Scenario 6)\n- \"trends\", \"patterns\", \"week over week\", \"predictive\" → Trend Analyzer (Scenario 7)\n\n" + multiple_intents + " If unclear, default to Report Generator (comprehensive overview).",
                 "conditionAgentInput": "{{question}}",
-                "conditionAgentScenarios": [
-                    {"scenario": "User needs to fetch latest SmartSheets data"},
-                    {"scenario": "User wants to see what changed since last check"},
-                    {"scenario": "User wants to identify heating up issues with high update frequency"},
-                    {"scenario": "User wants status transition metrics and workflow analysis"},
-                    {"scenario": "User wants a comprehensive daily/periodic report"},
-                    {"scenario": "User has a specific question about an issue or wants details"},
-                    {"scenario": "User needs critical alerts for blocked or stalled issues"},
-                    {"scenario": "User wants trend analysis and predictive insights"}
-                ]
+                "conditionAgentScenarios": scenarios
             },
             "outputAnchors": [
                 {"id": f"conditionAgentAgentflow_0-output-{i}", "label": i, "name": i, "description": f"Condition {i}", "type": "number"}
-                for i in range(8)
+                for i in range(len(scenarios))
             ],
             "outputs": {},
             "selected": False
@@ -434,25 +798,125 @@ def create_condition_node():
         "dragging": False
     }
 
-def create_edges():
-    """Create all edge connections"""
-    edges = []
+@template
+def create_pre_router_node():
+    """Create the keyword pre-router that resolves unambiguous queries without an LLM call"""
+    node_id = "conditionAgentflow_0"
+    return {
+        "id": node_id,
+        "position": {"x": 700, "y": 100},
+        "data": {
+            "id": node_id,
+            "label": "Keyword Pre-Router",
+            "version": 1,
+            "name": "conditionAgentflow",
+            "type": "Condition",
+            "color": "#FFB938",
+            "baseClasses": ["Condition"],
+            "category": "Agent Flows",
+            "description": "Route confident keyword or issue ID matches directly; fall back to the Intent Router otherwise",
+            "inputParams": [
+                {
+                    "label": "Conditions",
+                    "name": "conditions",
+                    "type": "array",
+                    "array": [
+                        {"label": "Type", "name": "type", "type": "options", "options": [{"label": "String", "name": "string"}]},
+                        {"label": "Value 1", "name": "value1", "type": "string", "acceptVariable": True},
+                        {"label": "Operation", "name": "operation", "type": "options", "options": [{"label": "Regex", "name": "regex"}]},
+                        {"label": "Value 2", "name": "value2", "type": "string", "acceptVariable": True}
+                    ],
+                    "id": f"{node_id}-input-conditions-array"
+                }
+            ],
+            "inputAnchors": [],
+            "inputs": {
+                "conditions": [
+                    {"type": "string", "value1": "{{question}}", "operation": "regex", "value2": flowise_condition_pattern(i)}
+                    for i in INTENT_PATTERNS
+                ]
+            },
+            "outputAnchors": [
+                {"id": f"{node_id}-output-{i}", "label": i, "name": i, "description": f"Condition {i}: {SCENARIO_NAMES[i]}"}
+                for i in INTENT_PATTERNS
+            ] + [
+                {"id": f"{node_id}-output-{len(INTENT_PATTERNS)}", "label": len(INTENT_PATTERNS), "name": len(INTENT_PATTERNS), "description": "Else: Intent Router"}
+            ],
+            "outputs": {},
+            "selected": False
+        },
+        "type": "agentFlow",
+        "width": 300,
+        "height": 500,
+        "selected": False,
+        "positionAbsolute": {"x": 700, "y": 100},
+        "dragging": False
+    }
 
-    # Edge 1: Start → Router
-    edges.append({
-        "source": "startAgentflow_0",
-        "sourceHandle": "startAgentflow_0-output-startAgentflow-StartAgent",
-        "target": "conditionAgentAgentflow_0",
-        "targetHandle": "conditionAgentAgentflow_0",
+def create_edge(source, source_handle, target, source_color, target_color, label=""):
+    """Create one edge between node anchors"""
+    return {
+        "source": source,
+        "sourceHandle": source_handle,
+        "target": target,
+        "targetHandle": target,
         "data": {
-            "sourceColor": "#81c784",
-            "targetColor": "#ff8fab",
-            "edgeLabel": "",
+            "sourceColor": source_color,
+            "targetColor": target_color,
+            "edgeLabel": label,
             "isHumanInput": False
         },
         "type": "agentFlow",
-        "id": "startAgentflow_0-startAgentflow_0-output-startAgentflow-StartAgent-conditionAgentAgentflow_0-conditionAgentAgentflow_0"
-    })
+        "id": f"{source}-{source_handle}-{target}-{target}"
+    }
+
+def create_pre_router_edges():
+    """Start → Pre-Router, Pre-Router → Agents, Pre-Router else → Intent Router"""
+    edges = [create_edge("startAgentflow_0", "startAgentflow_0-output-startAgentflow-StartAgent",
+                         "conditionAgentflow_0", "#81c784", "#FFB938")]
+    for i in INTENT_PATTERNS:
+        edges.append(create_edge("conditionAgentflow_0", f"conditionAgentflow_0-output-{i}",
+                                 f"agentAgentflow_{i + 1}", "#FFB938", "#4DD0E1", str(i)))
+    edges.append(create_edge("conditionAgentflow_0", f"conditionAgentflow_0-output-{len(INTENT_PATTERNS)}",
+                             "conditionAgentAgentflow_0", "#FFB938", "#ff8fab", "else"))
+    return edges
+
+def create_fan_out_edges():
+    """Router → every branch from one output (run concurrently), branches → merge (waits for all)"""
+    scenario = len(AGENTS)
+    merge_id = f"agentAgentflow_{fan_out_merge_spec()['id']}"
+    edges = []
+    for spec in fan_out_branch_specs():
+        branch_id = f"agentAgentflow_{spec['id']}"
+        edges.append(create_edge("conditionAgentAgentflow_0", f"conditionAgentAgentflow_0-output-{scenario}",
+                                 branch_id, "#ff8fab", "#4DD0E1", str(scenario)))
+        edges.append(create_edge(branch_id, f"{branch_id}-output-agentAgentflow-Agent|AgentExecutor",
+                                 merge_id, "#4DD0E1", "#4DD0E1"))
+    return edges
+
+@template
+def create_edges(pre_router=False, fan_out=False):
+    """Create all edge connections"""
+    edges = []
+
+    # Edge 1: Start → Router (through the keyword pre-router when enabled)
+    if pre_router:
+        edges.extend(create_pre_router_edges())
+    else:
+        edges.append({
+            "source": "startAgentflow_0",
+            "sourceHandle": "startAgentflow_0-output-startAgentflow-StartAgent",
+            "target": "conditionAgentAgentflow_0",
+            "targetHandle": "conditionAgentAgentflow_0",
+            "data": {
+                "sourceColor": "#81c784",
+                "targetColor": "#ff8fab",
+                "edgeLabel": "",
+                "isHumanInput": False
+            },
+            "type": "agentFlow",
+            "id": "startAgentflow_0-startAgentflow_0-output-startAgentflow-StartAgent-conditionAgentAgentflow_0-conditionAgentAgentflow_0"
+        })
 
     # Edges 2-9: Router → Agents
     for i in range(8):
@@ -472,39 +936,278 @@ def create_edges():
             "id": f"conditionAgentAgentflow_0-conditionAgentAgentflow_0-output-{i}-agentAgentflow_{agent_id}-agentAgentflow_{agent_id}"
         })
 
+    # Multi-intent fan-out: Router → branches → merge
+    if fan_out:
+        edges.extend(create_fan_out_edges())
+
     return edges
 
-def generate_workflow():
-    """Generate the complete Flowise workflow JSON"""
+def validate_dag(workflow):
+    """Check the graph is a DAG rooted at the start node: no cycles, nothing unreachable
+
+    Returns the topological order (Kahn's algorithm) with any problems found.
+    """
+    node_ids = [n['id'] for n in workflow['nodes']]
+    successors = {node_id: [] for node_id in node_ids}
+    in_degree = {node_id: 0 for node_id in node_ids}
+    for edge in workflow['edges']:
+        if edge['source'] in successors and edge['target'] in in_degree:
+            successors[edge['source']].append(edge['target'])
+            in_degree[edge['target']] += 1
+
+    roots = [node_id for node_id in node_ids if in_degree[node_id] == 0]
+    order = []
+    ready = list(roots)
+    remaining = dict(in_degree)
+    while ready:
+        node_id = ready.pop()
+        order.append(node_id)
+        for target in successors[node_id]:
+            remaining[target] -= 1
+            if remaining[target] == 0:
+                ready.append(target)
+
+    reachable = set()
+    stack = ["startAgentflow_0"]
+    while stack:
+        node_id = stack.pop()
+        if node_id in successors and node_id not in reachable:
+            reachable.add(node_id)
+            stack.extend(successors[node_id])
+
+    return {
+        "order": order,
+        "roots": roots,
+        "cyclic": sorted(set(node_ids) - set(order)),
+        "unreachable": sorted(set(node_ids) - reachable),
+        "inDegree": in_degree
+    }
+
+def critical_path(workflow, order, latency):
+    """Longest path latency through the DAG: concurrent branches cost their slowest member"""
+    finish = {}
+    predecessors = {n['id']: [] for n in workflow['nodes']}
+    for edge in workflow['edges']:
+        predecessors[edge['target']].append(edge['source'])
+    for node_id in order:
+        finish[node_id] = max((finish[p] for p in predecessors[node_id]), default=0) + latency(node_id)
+    return finish
+
+def generate_workflow(pre_router=True, fan_out=True, sheet=None):
+    """Generate the complete Flowise workflow JSON, optionally scoped to one sheet config"""
     workflow = {
         "nodes": [],
         "edges": []
     }
 
     # Add start node
-    workflow["nodes"].append(create_start_node())
+    workflow["nodes"].append(create_start_node(flow_state_keys(all_agent_specs(fan_out)), sheet))
+
+    # Add keyword pre-router ahead of the LLM router
+    if pre_router:
+        workflow["nodes"].append(create_pre_router_node())
 
     # Add condition router
-    workflow["nodes"].append(create_condition_node())
+    workflow["nodes"].append(create_condition_node(fan_out))
 
-    # Add all 8 specialized agents
-    for agent_spec in AGENTS:
-        workflow["nodes"].append(create_agent_node(agent_spec))
+    # Add all 8 specialized agents, plus the fan-out branches and merge agent
+    for agent_spec in all_agent_specs(fan_out):
+        workflow["nodes"].append(create_agent_node(agent_spec, sheet))
 
     # Add all edges
-    workflow["edges"] = create_edges()
+    workflow["edges"] = create_edges(pre_router, fan_out)
 
     return workflow
 
+def clear_templates():
+    """Drop the shared node templates (after editing specs at runtime, or to time cold generation)"""
+    for template in (create_agent_input_params, create_condition_node, create_pre_router_node, create_edges,
+                     generator_fingerprint, base_spec_hash):
+        template.cache_clear()
+
+NODE_KEYS = ("id", "position", "data", "type", "width", "height")
+NODE_DATA_KEYS = ("id", "label", "name", "inputs", "outputAnchors")
+EDGE_KEYS = ("id", "source", "sourceHandle", "target", "targetHandle", "type", "data")
+NODE_NAMES = {"startAgentflow", "conditionAgentflow", "conditionAgentAgentflow", "agentAgentflow"}
+
+def validate_schema(workflow):
+    """Problems with the Flowise node/edge structure: missing keys, duplicate IDs, anchor IDs that do not
+    belong to their node, and edges whose source, handle or target does not exist"""
+    problems = []
+    anchors = {}
+    for node in workflow.get('nodes', []):
+        node_id = node.get('id')
+        data = node.get('data', {})
+        missing = [key for key in NODE_KEYS if key not in node] + [f"data.{key}" for key in NODE_DATA_KEYS if key not in data]
+        if missing:
+            problems.append(f"node {node_id}: missing {', '.join(missing)}")
+            continue
+        if node_id in anchors:
+            problems.append(f"node {node_id}: duplicate id")
+        if data['id'] != node_id or node['type'] != "agentFlow" or data['name'] not in NODE_NAMES:
+            problems.append(f"node {node_id}: data.id {data['id']}, type {node['type']}, name {data['name']}")
+        if not all(isinstance(node['position'].get(axis), (int, float)) for axis in ("x", "y")):
+            problems.append(f"node {node_id}: position needs numeric x and y")
+        output_ids = [anchor.get('id') for anchor in data['outputAnchors']]
+        foreign = [anchor_id for anchor_id in output_ids if not str(anchor_id).startswith(f"{node_id}-output-")]
+        foreign += [param.get('id') for param in data.get('inputParams', []) if not str(param.get('id')).startswith(f"{node_id}-input-")]
+        if foreign:
+            problems.append(f"node {node_id}: anchor ids of another node {foreign}")
+        if len(set(output_ids)) != len(output_ids):
+            problems.append(f"node {node_id}: duplicate output anchors")
+        anchors[node_id] = set(output_ids)
+
+    edge_ids = set()
+    for edge in workflow.get('edges', []):
+        missing = [key for key in EDGE_KEYS if key not in edge]
+        if missing:
+            problems.append(f"edge {edge.get('id')}: missing {', '.join(missing)}")
+            continue
+        if edge['id'] in edge_ids:
+            problems.append(f"edge {edge['id']}: duplicate id")
+        edge_ids.add(edge['id'])
+        if edge['source'] not in anchors:
+            problems.append(f"edge {edge['id']}: dangling source {edge['source']}")
+        elif edge['sourceHandle'] not in anchors[edge['source']]:
+            problems.append(f"edge {edge['id']}: dangling sourceHandle {edge['sourceHandle']}")
+        if edge['target'] not in anchors:
+            problems.append(f"edge {edge['id']}: dangling target {edge['target']}")
+        elif edge['targetHandle'] != edge['target']:
+            problems.append(f"edge {edge['id']}: targetHandle {edge['targetHandle']} is not its target node")
+    return problems
+
+@functools.lru_cache(maxsize=None)
+def generator_fingerprint():
+    """Hash of the generator's own code, so any change to it regenerates every flow"""
+    digest = hashlib.sha256()
+    for name in GENERATOR_SOURCES:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+@functools.lru_cache(maxsize=None)
+def base_spec_hash(pre_router=True, fan_out=True):
+    """Hash of the generator code plus the agent and tool specs shared by every sheet's flow"""
+    spec = {"preRouter": pre_router, "fanOut": fan_out, "agents": all_agent_specs(fan_out), "tools": DATA_TOOLS}
+    digest = hashlib.sha256(generator_fingerprint().encode())
+    digest.update(json.dumps(spec, sort_keys=True).encode())
+    return digest
+
+def spec_hash(pre_router=True, fan_out=True, sheet=None):
+    """Content hash of everything a flow is generated from: generator code, agent and tool specs, sheet config"""
+    digest = base_spec_hash(pre_router, fan_out).copy()
+    digest.update(json.dumps(sheet, sort_keys=True).encode())
+    return digest.hexdigest()
+
+def write_flows(variants, output_dir=OUTPUT_DIR, compact=True, force=False):
+    """Generate, validate and write the flows whose spec hash changed since the last run
+
+    `variants` maps file names to generate_workflow() keyword arguments. Compact output uses the
+    one-shot C JSON encoder; indented output is kept for the checked-in flow's readable diffs.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {}
+
+    result = {"written": [], "skipped": 0, "bytes": 0}
+    for name, options in variants.items():
+        digest = f"{spec_hash(**options)}-{'compact' if compact else 'indent'}"
+        path = os.path.join(output_dir, name)
+        if not force and manifest.get(name) == digest and os.path.exists(path):
+            result["skipped"] += 1
+            continue
+        workflow = generate_workflow(**options)
+        problems = validate_schema(workflow)
+        if problems:
+            raise ValueError(f"{name}: {problems[0]} ({len(problems)} schema problems)")
+        data = json.dumps(workflow, separators=(",", ":")) if compact else json.dumps(workflow, indent=2)
+        with open(path + ".tmp", "w") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        manifest[name] = digest
+        result["written"].append(name)
+        result["bytes"] += len(data)
+
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return result
+
+def benchmark(n_variants=1000):
+    """Time cold, templated, unchanged and one-changed generation of n per-sheet flows into a temp dir"""
+    import tempfile
+
+    variants = {f"flow-{n}.json": {"sheet": {"sheetId": str(n), "name": f"Sheet {n}"}} for n in range(n_variants)}
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        for name, options in variants.items():
+            clear_templates()
+            with open(os.path.join(output_dir, name), "w") as f:
+                json.dump(generate_workflow(**options), f, indent=2)
+        cold = time.perf_counter() - start
+        cold_bytes = sum(os.path.getsize(os.path.join(output_dir, name)) for name in variants)
+
+        runs = {}
+        for run, force in (("templated + compact", True), ("unchanged rerun", False)):
+            start = time.perf_counter()
+            runs[run] = write_flows(variants, output_dir, force=force)
+            runs[run]["seconds"] = time.perf_counter() - start
+        variants["flow-0.json"] = {"sheet": {"sheetId": "0", "name": "Sheet 0 (renamed)"}}
+        start = time.perf_counter()
+        runs["one sheet changed"] = write_flows(variants, output_dir)
+        runs["one sheet changed"]["seconds"] = time.perf_counter() - start
+
+        with open(os.path.join(output_dir, "flow-1.json")) as f:
+            compact_flow = json.load(f)
+        problems = sum(len(validate_schema(generate_workflow(**options))) for options in variants.values())
+        nested = os.path.join(output_dir, "new", "dir")
+        nested_written = len(write_flows({"flow.json": variants["flow-1.json"]}, nested)["written"])
+
+    edited, untouched = generate_workflow(), generate_workflow()
+    edited["edges"][0]["id"] = "edited"
+    edited["nodes"][-1]["data"]["inputParams"][0]["label"] = "edited"
+    edited["nodes"][-1]["data"]["inputs"]["agentTools"][0]["agentSelectedTool"] = "edited"
+    shared = generate_workflow() != untouched or "edited" in json.dumps(untouched)
+
+    print(f"📊 Generation benchmark ({n_variants:,} flows):")
+    print(f"   {'cold + indent=2':<22} {cold:>7.2f}s   {n_variants / cold:>7,.0f} flows/s   {cold_bytes / n_variants / 1024:>6.0f} KB/flow")
+    for run, result in runs.items():
+        written = len(result['written'])
+        print(f"   {run:<22} {result['seconds']:>7.2f}s   {written:>5} written {result['skipped']:>5} skipped   "
+              f"{result['bytes'] / max(written, 1) / 1024:>6.0f} KB/flow")
+
+    speedup = cold / runs["templated + compact"]["seconds"]
+    print(f"\n📊 Validation:")
+    print(f"   Schema: {problems} problems across {n_variants:,} flows {'✅' if not problems else '❌'}")
+    print(f"   Compact output parses to the same flow: {'✅' if compact_flow == generate_workflow(**variants['flow-1.json']) else '❌'}")
+    print(f"   Templated + compact speedup: {speedup:.1f}x {'✅' if speedup > 1 else '❌'}")
+    print(f"   Unchanged rerun skipped all: {runs['unchanged rerun']['skipped']}/{n_variants} {'✅' if not runs['unchanged rerun']['written'] else '❌'}")
+    print(f"   Workflows share no mutable parts: {'✅' if not shared else '❌'}")
+    print(f"   Writes into a new output directory: {'✅' if nested_written == 1 else '❌'}")
+    print(f"   One changed sheet rewrote one flow: {runs['one sheet changed']['written']} {'✅' if runs['one sheet changed']['written'] == ['flow-0.json'] else '❌'}")
+
 if __name__ == "__main__":
-    workflow = generate_workflow()
+    if len(sys.argv) > 1 and sys.argv[1] == "benchmark":
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
+        sys.exit(0)
+
+    # Reject unbounded memory on scheduled agents, or context columns that drop tool fields, before writing anything
+    problems = validate_memory_policies(all_agent_specs()) + validate_context_columns(all_agent_specs())
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        sys.exit(1)
 
-    # Write to file with nice formatting
-    with open("/Users/name/homelab/smartsheets-issue-monitor/smartsheets-issue-monitor-flow.json", "w") as f:
-        json.dump(workflow, f, indent=2)
+    # Write to file with nice formatting, skipped when nothing it is generated from changed
+    written = write_flows({WORKFLOW_FILE: {}}, compact=False)
+    workflow = generate_workflow()
 
     print(f"✅ Generated workflow with {len(workflow['nodes'])} nodes and {len(workflow['edges'])} edges")
-    print(f"✅ File: smartsheets-issue-monitor-flow.json")
+    print(f"✅ File: {WORKFLOW_FILE} {'(written)' if written['written'] else '(unchanged, skipped)'}")
 
     # Validation
     node_count = len(workflow['nodes'])
@@ -512,12 +1215,88 @@ if __name__ == "__main__":
     agent_count = sum(1 for n in workflow['nodes'] if n['data']['name'] == 'agentAgentflow')
 
     print(f"\n📊 Validation:")
-    print(f"   Nodes: {node_count} (expected: 10) {'✅' if node_count == 10 else '❌'}")
-    print(f"   Edges: {edge_count} (expected: 9) {'✅' if edge_count == 9 else '❌'}")
-    print(f"   Agents: {agent_count} (expected: 8) {'✅' if agent_count == 8 else '❌'}")
+    agent_specs = all_agent_specs()
+    branches = len(FAN_OUT['agents'])
+    expected_nodes = 2 + len(agent_specs) + 1
+    expected_edges = 1 + len(AGENTS) + len(INTENT_PATTERNS) + 1 + 2 * branches
+    print(f"   Nodes: {node_count} (expected: {expected_nodes}) {'✅' if node_count == expected_nodes else '❌'}")
+    print(f"   Edges: {edge_count} (expected: {expected_edges}) {'✅' if edge_count == expected_edges else '❌'}")
+    print(f"   Agents: {agent_count} (expected: {len(agent_specs)}) {'✅' if agent_count == len(agent_specs) else '❌'}")
+    schema_problems = validate_schema(workflow)
+    print(f"   Schema: {len(schema_problems)} problems {'✅' if not schema_problems else '❌ ' + '; '.join(schema_problems[:3])}")
 
     # Check standard tools in all agents
     agents_with_tools = sum(1 for n in workflow['nodes']
                            if n['data']['name'] == 'agentAgentflow'
-                           and len(n['data']['inputs'].get('agentTools', [])) == 2)
-    print(f"   Standard Tools: {agents_with_tools}/8 agents {'✅' if agents_with_tools == 8 else '❌'}")
+                           and n['data']['inputs'].get('agentTools', [])[:2] == STANDARD_TOOLS)
+    print(f"   Standard Tools: {agents_with_tools}/{agent_count} agents {'✅' if agents_with_tools == agent_count else '❌'}")
+
+    # Check every edge connects existing nodes
+    node_ids = {n['id'] for n in workflow['nodes']}
+    dangling = [e['id'] for e in workflow['edges'] if e['source'] not in node_ids or e['target'] not in node_ids]
+    print(f"   Dangling Edges: {len(dangling)} (expected: 0) {'✅' if not dangling else '❌'}")
+
+    # Check data tools match the agent specs
+    expected_data_tools = sum(len(agent['tools']) + (agent['cache'] is not None) for agent in agent_specs)
+    data_tool_count = sum(len(n['data']['inputs'].get('agentTools', [])) - 2 for n in workflow['nodes']
+                          if n['data']['name'] == 'agentAgentflow')
+    print(f"   Data Tools: {data_tool_count} (expected: {expected_data_tools}) {'✅' if data_tool_count == expected_data_tools else '❌'}")
+
+    # Check cache settings reached the analytical agents
+    cached_agents = sum(1 for n in workflow['nodes'] if n['data']['name'] == 'agentAgentflow'
+                        and any(t['agentSelectedToolConfig']['requestsPostName'] == 'response-cache'
+                                for t in n['data']['inputs']['agentTools'][2:]))
+    expected_cached = sum(1 for agent in agent_specs if agent['cache'] is not None)
+    print(f"   Cached Agents: {cached_agents} (expected: {expected_cached}) {'✅' if cached_agents == expected_cached else '❌'}")
+
+    # Check every data tool carries its agent's context budget
+    budgeted = sum(1 for n in workflow['nodes'] if n['data']['name'] == 'agentAgentflow'
+                   for t in n['data']['inputs']['agentTools'][2:]
+                   if json.loads(t['agentSelectedToolConfig']['requestsPostBody']).get('context', {}).get('maxTokens'))
+    expected_budgeted = sum(len(agent['tools']) for agent in agent_specs)
+    print(f"   Context Budgets: {budgeted} (expected: {expected_budgeted}) {'✅' if budgeted == expected_budgeted else '❌'}")
+    projected = [spec for spec in agent_specs if spec['context_columns'] is not None]
+    print(f"   Context Columns: {len(projected)} projecting agents keep their tools' fields {'✅' if not validate_context_columns(agent_specs) else '❌'}")
+
+    # Check every data tool reports spans under its own node
+    traced = sum(1 for n in workflow['nodes'] if n['data']['name'] == 'agentAgentflow'
+                 for t in n['data']['inputs']['agentTools'][2:]
+                 if json.loads(t['agentSelectedToolConfig']['requestsPostBody']).get('trace', {}).get('node') == n['id'])
+    print(f"   Traced Tools: {traced} (expected: {expected_data_tools}) {'✅' if traced == expected_data_tools else '❌'}")
+
+    # Check memory stays bounded and pinned state is declared
+    scheduled = [spec for spec in agent_specs if spec['scheduled']]
+    bounded = sum(1 for spec in scheduled if spec['memory_type'] in BOUNDED_MEMORY_TYPES)
+    start_state = {item['key'] for item in workflow['nodes'][0]['data']['inputs']['startState'] or []}
+    undeclared = [item['key'] for n in workflow['nodes'] if n['data']['name'] == 'agentAgentflow'
+                  for item in n['data']['inputs']['agentUpdateState'] or [] if item['key'] not in start_state]
+    print(f"   Bounded Memory: {bounded}/{len(scheduled)} scheduled agents {'✅' if bounded == len(scheduled) else '❌'}")
+    print(f"   Pinned State Keys: {len(start_state)} declared, {len(undeclared)} undeclared {'✅' if not undeclared else '❌'}")
+
+    # Check the graph is a DAG and the merge agent waits on every branch
+    dag = validate_dag(workflow)
+    merge_id = f"agentAgentflow_{fan_out_merge_spec()['id']}"
+    print(f"   DAG: {len(dag['order'])}/{node_count} nodes ordered, roots {dag['roots']} {'✅' if not dag['cyclic'] and dag['roots'] == ['startAgentflow_0'] else '❌'}")
+    print(f"   Unreachable Nodes: {len(dag['unreachable'])} (expected: 0) {'✅' if not dag['unreachable'] else '❌'}")
+    print(f"   Merge Inputs: {dag['inDegree'][merge_id]} (expected: {branches}) {'✅' if dag['inDegree'][merge_id] == branches else '❌'}")
+
+    # Fan-out latency is the slowest branch, not the sum (illustrative per-agent seconds)
+    branch_latency = {f"agentAgentflow_{spec['id']}": seconds for spec, seconds in zip(fan_out_branch_specs(), (6.0, 4.0, 5.0))}
+    latency = {**branch_latency, merge_id: 3.0}
+    finish = critical_path(workflow, dag['order'], lambda node_id: latency.get(node_id, 0.0))
+    expected_finish = max(branch_latency.values()) + latency[merge_id]
+    print(f"   Fan-Out Latency: {finish[merge_id]:.0f}s critical path vs {sum(latency.values()):.0f}s sequential {'✅' if finish[merge_id] == expected_finish else '❌'}")
+
+    # One flow per configured sheet, every data tool scoped to that sheet's directories
+    sheets_path = sys.argv[1] if len(sys.argv) > 1 else SHEETS_FILE
+    if os.path.exists(sheets_path):
+        sheets = load_sheets(sheets_path)
+        written = write_flows({f"smartsheets-issue-monitor-{sheet_slug(sheet)}-flow.json": {"sheet": sheet} for sheet in sheets})
+        scoped = 0
+        for sheet in sheets:
+            sheet_flow = generate_workflow(sheet=sheet)
+            bodies = [json.loads(t['agentSelectedToolConfig']['requestsPostBody']) for n in sheet_flow['nodes']
+                      if n['data']['name'] == 'agentAgentflow' for t in n['data']['inputs']['agentTools'][2:]]
+            scoped += all(body.get('snapshotDir') == sheet_dirs(sheet)['snapshotDir'] for body in bodies)
+        print(f"   Sheet Flows: {len(sheets)} from {sheets_path} ({len(written['written'])} written, {written['skipped']} unchanged), "
+              f"{scoped} scoped to their sheet's data {'✅' if scoped == len(sheets) else '❌'}")
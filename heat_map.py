@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Vectorized heat-map and velocity engine for Agent.HeatMapAnalyzer
+Loads every update timestamp into NumPy arrays and scores all issues in one pass:
+rolling 24h counts, per-issue baselines, anomaly ratios and status flip counts.
+Requires NumPy (pip install numpy).
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from event_log import LOG_FILE, METRICS_DIR, read_state
+
+DAY = 86_400
+HOT_UPDATES_24H = 3       # "heating up": >3 updates in 24 hours
+ANOMALY_RATIO = 3.0       # update frequency >3x baseline
+THRASHING_FLIPS = 2       # status changed back and forth at least twice
+BASELINE_DAYS = 7         # baseline window before the last 24 hours
+MIN_BASELINE = 1 / BASELINE_DAYS  # floor: one update per baseline window
+FIELDS = ["status", "assignee", "priority", "title", "description"]
+
+def to_epoch(timestamps):
+    """ISO-8601 strings (with or without Z, or date-only) to int64 epoch seconds"""
+    return np.array([t[:19] for t in timestamps], dtype="datetime64[s]").astype(np.int64)
+
+class UpdateArrays:
+    """Columnar update history: one entry per event, issues as integer codes"""
+
+    def __init__(self):
+        self.clear()
+        # Guards incremental loads and array snapshots; concurrent tool calls share one instance
+        self.lock = threading.Lock()
+
+    def clear(self):
+        self.issue_ids = []
+        self.codes = {}
+        self.issue, self.ts, self.field, self.status_from, self.status_to = [], [], [], [], []
+        self.statuses = {None: 0}
+        self.offset = 0   # event-log bytes parsed so far
+
+    def add(self, issue_id, timestamp, field=None, status_from=None, status_to=None):
+        code = self.codes.get(issue_id)
+        if code is None:
+            code = self.codes[issue_id] = len(self.issue_ids)
+            self.issue_ids.append(issue_id)
+        self.issue.append(code)
+        self.ts.append(timestamp)
+        self.field.append(FIELDS.index(field) if field in FIELDS else -1)
+        self.status_from.append(self.statuses.setdefault(status_from, len(self.statuses)))
+        self.status_to.append(self.statuses.setdefault(status_to, len(self.statuses)))
+
+    def arrays(self):
+        with self.lock:
+            return {
+                "issue": np.asarray(self.issue, dtype=np.int32),
+                "ts": to_epoch(self.ts) if self.ts else np.zeros(0, dtype=np.int64),
+                "field": np.asarray(self.field, dtype=np.int8),
+                "status_from": np.asarray(self.status_from, dtype=np.int32),
+                "status_to": np.asarray(self.status_to, dtype=np.int32),
+                "n_issues": len(self.issue_ids)
+            }
+
+# Parsed event log per path, extended with newly appended events on each call
+_loaded = {}
+_loaded_guard = threading.Lock()
+
+def load_event_log(metrics_dir=METRICS_DIR):
+    """Read update events from the event log, parsing only bytes appended since the last call
+
+    Reads stop at the log size the last append committed (logBytes in the event-log state), so
+    bytes of an append still in progress, or of one that failed and will be truncated, are never
+    counted.
+    """
+    path = os.path.join(metrics_dir, LOG_FILE)
+    with _loaded_guard:
+        updates = _loaded.setdefault(path, UpdateArrays())
+    if not os.path.exists(path):
+        return updates
+    # One loader at a time per log, so the same new bytes are never parsed (and counted) twice
+    with updates.lock, open(path, "rb") as log:
+        end = read_state(metrics_dir).get("logBytes")
+        if end is None:   # state written before logBytes was recorded: whole lines up to EOF
+            end = os.fstat(log.fileno()).st_size
+        if end < updates.offset:   # rebuilt since the last load
+            updates.clear()
+        log.seek(updates.offset)
+        for line in log.read(end - updates.offset).splitlines(keepends=True):
+            if not line.endswith(b"\n"):   # an append still in progress; picked up next call
+                break
+            updates.offset += len(line)   # every line read, including skipped deletions
+            event = json.loads(line)
+            if event["type"] == "deleted":
+                continue
+            timestamp = event.get("updatedDate") or event.get("createdDate") or event["at"]
+            if event["type"] == "status":
+                updates.add(event["issueId"], timestamp, "status", event.get("from"), event.get("to"))
+            else:
+                updates.add(event["issueId"], timestamp, event.get("field"))
+    return updates
+
+def analyze(data, now, top_n=10):
+    """Score every issue at once and return the top-N hottest with context
+
+    `data` is UpdateArrays.arrays(); `now` is epoch seconds.
+    """
+    n = data["n_issues"]
+    issue, ts = data["issue"], data["ts"]
+    recent = ts > now - DAY
+    baseline_window = (ts > now - (BASELINE_DAYS + 1) * DAY) & ~recent & (ts <= now)
+    recent &= ts <= now
+
+    updates_24h = np.bincount(issue[recent], minlength=n)
+    baseline = np.maximum(np.bincount(issue[baseline_window], minlength=n) / BASELINE_DAYS, MIN_BASELINE)
+    anomaly_ratio = updates_24h / baseline
+    velocity = (updates_24h + np.bincount(issue[baseline_window], minlength=n)) / (BASELINE_DAYS + 1)
+
+    # Peak rolling 24h count: events sorted by a packed (issue, ts) key, then a searchsorted per event
+    key = issue.astype(np.int64) * (1 << 40) + ts
+    order = np.argsort(key)
+    key = key[order]
+    window_counts = np.arange(len(key)) - np.searchsorted(key, key - DAY, side="right") + 1
+    sorted_issue = issue[order]
+    starts = np.flatnonzero(np.r_[True, sorted_issue[1:] != sorted_issue[:-1]]) if len(key) else np.zeros(0, dtype=np.int64)
+    peak_24h = np.zeros(n, dtype=np.int64)
+    if len(key):
+        peak_24h[sorted_issue[starts]] = np.maximum.reduceat(window_counts, starts)
+
+    # Status flips: a status change that reverts the issue's previous status change (A→B, B→A)
+    sorted_ts = ts[order]
+    is_status = (data["field"][order] == 0) & (sorted_ts > now - (BASELINE_DAYS + 1) * DAY) & (sorted_ts <= now)
+    s_order = order[is_status]
+    s_issue = sorted_issue[is_status]
+    s_from, s_to = data["status_from"][s_order], data["status_to"][s_order]
+    s_recent = sorted_ts[is_status] > now - DAY
+    flip = np.zeros(len(s_issue), dtype=bool)
+    flip[1:] = (s_issue[1:] == s_issue[:-1]) & (s_to[1:] == s_from[:-1])
+    flips = np.bincount(s_issue[flip], minlength=n)
+    status_changes_24h = np.bincount(s_issue[s_recent], minlength=n)
+
+    tracked = recent & (data["field"] >= 0)
+    field_counts = np.bincount(
+        issue[tracked].astype(np.int64) * len(FIELDS) + data["field"][tracked], minlength=n * len(FIELDS)
+    ).reshape(n, len(FIELDS))
+
+    is_hot = updates_24h > HOT_UPDATES_24H
+    is_anomaly = (anomaly_ratio > ANOMALY_RATIO) & (updates_24h > 1)
+    thrashing = flips >= THRASHING_FLIPS
+
+    # Rank by 24h updates, then anomaly ratio; only the top candidates are fully sorted
+    score = updates_24h + anomaly_ratio / (anomaly_ratio.max() + 1) if n else anomaly_ratio
+    candidates = np.argpartition(-score, min(top_n, n) - 1)[:top_n] if n > top_n else np.arange(n)
+    ranked = candidates[np.argsort(-score[candidates], kind="stable")]
+    return {
+        "ranked": ranked,
+        "updates_24h": updates_24h,
+        "peak_24h": peak_24h,
+        "baseline": baseline,
+        "anomaly_ratio": anomaly_ratio,
+        "velocity": velocity,
+        "flips": flips,
+        "status_changes_24h": status_changes_24h,
+        "field_counts": field_counts,
+        "is_hot": is_hot,
+        "is_anomaly": is_anomaly,
+        "thrashing": thrashing
+    }
+
+def hot_issues(updates, now=None, top_n=10):
+    """Ranked hot-issue report for all issues in an UpdateArrays"""
+    now_ts = int((now or datetime.now(timezone.utc)).timestamp())
+    result = analyze(updates.arrays(), now_ts, top_n)
+    issues = []
+    for code in result["ranked"]:
+        if result["updates_24h"][code] == 0:
+            break
+        fields = result["field_counts"][code]
+        issues.append({
+            "issueId": updates.issue_ids[code],
+            "updates24h": int(result["updates_24h"][code]),
+            "peak24h": int(result["peak_24h"][code]),
+            "velocityPerDay": round(float(result["velocity"][code]), 2),
+            "baselinePerDay": round(float(result["baseline"][code]), 2),
+            "anomalyRatio": round(float(result["anomaly_ratio"][code]), 1),
+            "statusChanges24h": int(result["status_changes_24h"][code]),
+            "statusFlips": int(result["flips"][code]),
+            "changing": {FIELDS[i]: int(count) for i, count in enumerate(fields) if count},
+            "hot": bool(result["is_hot"][code]),
+            "anomaly": bool(result["is_anomaly"][code]),
+            "thrashing": bool(result["thrashing"][code])
+        })
+    return {
+        "asOf": datetime.fromtimestamp(now_ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "issuesScored": len(updates.issue_ids),
+        "hotCount": int(result["is_hot"].sum()),
+        "anomalyCount": int(result["is_anomaly"].sum()),
+        "thrashingCount": int(result["thrashing"].sum()),
+        "topIssues": issues
+    }
+
+def handle_request(payload):
+    """Tool entry point: rank hot issues from the event log, or from a batch of update timestamps
+
+    The batch form {"updates": {issueId: [iso timestamps]}} replaces the per-issue
+    frequency-calculator endpoint with one call for every issue.
+    """
+    now = datetime.fromisoformat(payload["now"].replace("Z", "+00:00")) if payload.get("now") else None
+    if payload.get("updates"):
+        updates = UpdateArrays()
+        for issue_id, timestamps in payload["updates"].items():
+            for timestamp in timestamps:
+                updates.add(issue_id, timestamp)
+    else:
+        updates = load_event_log(payload.get("metricsDir", METRICS_DIR))
+    return hot_issues(updates, now, payload.get("topN") or 10)
+
+def naive_frequency(updates, now):
+    """Per-issue list filter over ISO strings, as in the frequency-calculator sample"""
+    yesterday = now - DAY
+    results = {}
+    for issue_id, timestamps in updates.items():
+        recent = [t for t in timestamps if datetime.fromisoformat(t[:19]).replace(tzinfo=timezone.utc).timestamp() > yesterday]
+        results[issue_id] = len(recent)
+    return results
+
+if __name__ == "__main__":
+    import random
+
+    n_issues = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = np.random.default_rng(0)
+    now = datetime(2025, 1, 14, 12, tzinfo=timezone.utc)
+    now_ts = int(now.timestamp())
+
+    # Synthetic history: ~8 updates per issue over 8 days, a few bursty issues
+    per_issue = rng.poisson(8, n_issues)
+    hot = rng.random(n_issues) < 0.01
+    per_issue[hot] += 10
+    issue = np.repeat(np.arange(n_issues, dtype=np.int32), per_issue)
+    ts = now_ts - rng.integers(0, 8 * DAY, len(issue))
+    ts[np.isin(issue, np.flatnonzero(hot))] = now_ts - rng.integers(0, DAY, int(np.isin(issue, np.flatnonzero(hot)).sum()))
+    field = rng.integers(0, len(FIELDS), len(issue)).astype(np.int8)
+    data = {
+        "issue": issue,
+        "ts": ts,
+        "field": field,
+        "status_from": rng.integers(1, 4, len(issue)).astype(np.int32),
+        "status_to": rng.integers(1, 4, len(issue)).astype(np.int32),
+        "n_issues": n_issues
+    }
+
+    analyze(data, now_ts)  # warm-up
+    start = time.perf_counter()
+    result = analyze(data, now_ts, top_n=10)
+    vector_elapsed = time.perf_counter() - start
+
+    sample = 2_000
+    iso = np.datetime_as_string(ts.astype("datetime64[s]")).tolist()
+    sample_updates = {}
+    for code, timestamp in zip(issue.tolist(), iso):
+        if code < sample:
+            sample_updates.setdefault(f"ISS{code:06d}", []).append(timestamp)
+    start = time.perf_counter()
+    naive = naive_frequency(sample_updates, now_ts)
+    naive_elapsed = (time.perf_counter() - start) * n_issues / sample
+
+    print(f"📊 Heat map benchmark ({n_issues} issues, {len(issue)} updates):")
+    print(f"   Vectorized batch: {vector_elapsed * 1000:8.1f} ms (all metrics, top-10)")
+    print(f"   Per-issue filter: {naive_elapsed * 1000:8.1f} ms (24h counts only, extrapolated from {sample})")
+    print(f"   Hot: {int(result['is_hot'].sum())}, anomalies: {int(result['is_anomaly'].sum())}, thrashing: {int(result['thrashing'].sum())}")
+
+    # Validation against a straightforward per-issue computation
+    py_rng = random.Random(1)
+    updates = UpdateArrays()
+    expected = {}
+    for i in range(200):
+        issue_id = f"ISS{i:06d}"
+        times = sorted(now_ts - py_rng.randint(0, 8 * DAY - 1) for _ in range(py_rng.randint(1, 12)))
+        statuses = ["New"]
+        for t in times:
+            to = py_rng.choice(["New", "In Progress", "Blocked"])
+            updates.add(issue_id, datetime.fromtimestamp(t, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"), "status", statuses[-1], to)
+            statuses.append(to)
+        recent = [t for t in times if t > now_ts - DAY]
+        peak = max(sum(1 for u in times if t - DAY < u <= t) for t in times)
+        flips = sum(1 for j in range(2, len(statuses)) if statuses[j] == statuses[j - 2])
+        expected[issue_id] = (len(recent), peak, flips)
+
+    check = analyze(updates.arrays(), now_ts, top_n=200)
+    actual = {
+        updates.issue_ids[code]: (int(check["updates_24h"][code]), int(check["peak_24h"][code]), int(check["flips"][code]))
+        for code in range(len(updates.issue_ids))
+    }
+
+    print(f"\n📊 Validation:")
+    print(f"   24h counts match per-issue loop: {'✅' if all(actual[k][0] == v[0] for k, v in expected.items()) else '❌'}")
+    print(f"   Rolling 24h peaks match: {'✅' if all(actual[k][1] == v[1] for k, v in expected.items()) else '❌'}")
+    print(f"   Status flips match: {'✅' if all(actual[k][2] == v[2] for k, v in expected.items()) else '❌'}")
+    print(f"   Under one second at {n_issues} issues: {'✅' if vector_elapsed < 1 else '❌'}")
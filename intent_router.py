@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Local keyword pre-router for the Intent Router
+Resolves queries that match exactly one scenario's keywords (or an issue ID) without a model
+call, and leaves ambiguous or unmatched queries to the LLM router.
+"""
+
+import json
+import os
+import re
+import sys
+import time
+
+# Keyword patterns per router scenario, mirroring the KEYWORDS MAPPING in the router instructions.
+# Plain regex shared by Python (re) and the generated Flowise condition (JavaScript RegExp).
+INTENT_PATTERNS = {
+    0: [r"\bfetch", r"\brefresh", r"\bget (?:the )?(?:latest |new |fresh )?data\b", r"\bpull\b", r"\bre-?sync"],
+    1: [r"(?<!state )(?<!status )\bchang(?:es|ed)\b", r"\bdeltas?\b", r"\bcompare", r"\bdiff\b", r"\bsince (?:the )?last\b"],
+    2: [r"\bhot\b", r"\bheating\b", r"\bfrequent(?:ly)? updat", r"\bvelocity\b", r"\bmost active issues?\b"],
+    3: [r"\b(?:status|state) (?:transitions?|changes)\b", r"\bworkflow metrics\b", r"\btransitions?\b", r"\btime in (?:each )?status\b", r"\bbottlenecks?\b"],
+    4: [r"\breport\b", r"\bsummary\b", r"\bsummari[sz]e\b", r"\bdaily\b", r"\bcomprehensive\b", r"\boverview\b"],
+    5: [r"\bshow (?:me )?issue\b", r"\bdetails?\b", r"\bquery\b", r"\bhistory of\b", r"\btell me about\b"],
+    6: [r"\balerts?\b", r"\bcritical\b", r"\bblocked\b", r"\bstalled\b", r"\bstuck\b"],
+    7: [r"\btrends?\b", r"\bpatterns?\b", r"\bweek[- ]over[- ]week\b", r"\bpredict", r"\bforecast"]
+}
+
+# Specific issue IDs such as ABC123 or ISS-000123 route to the Query Handler (scenario 5)
+ISSUE_ID_PATTERN = r"\b[A-Z]{2,5}-?\d{2,}\b"
+ISSUE_ID_SCENARIO = 5
+
+SCENARIO_NAMES = [
+    "Data Fetcher", "Change Detector", "Heat Map Analyzer", "Status Transition Tracker",
+    "Report Generator", "Query Handler", "Alert Manager", "Trend Analyzer"
+]
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_corpus.json")
+
+def scenario_pattern(scenario):
+    """Alternation of a scenario's keyword patterns"""
+    return "(?:" + "|".join(INTENT_PATTERNS[scenario]) + ")"
+
+COMPILED = {scenario: re.compile(scenario_pattern(scenario), re.IGNORECASE) for scenario in INTENT_PATTERNS}
+ISSUE_ID = re.compile(ISSUE_ID_PATTERN)
+
+def matched_scenarios(query):
+    """Every scenario whose keywords appear in the query"""
+    matched = {scenario for scenario, pattern in COMPILED.items() if pattern.search(query)}
+    if ISSUE_ID.search(query):
+        matched.add(ISSUE_ID_SCENARIO)
+    return matched
+
+def route(query):
+    """Scenario index when exactly one scenario matches, otherwise None (use the LLM router)"""
+    matched = matched_scenarios(query)
+    return matched.pop() if len(matched) == 1 else None
+
+def case_insensitive(pattern):
+    """Rewrite letters outside character classes as [xX] (JavaScript RegExp has no inline flags)"""
+    out = []
+    i = 0
+    in_class = False
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            out.append(pattern[i:i + 2])
+            i += 2
+            continue
+        if char == "[":
+            in_class = True
+        elif char == "]":
+            in_class = False
+        elif char.isalpha() and not in_class:
+            char = f"[{char.lower()}{char.upper()}]"
+        out.append(char)
+        i += 1
+    return "".join(out)
+
+def flowise_condition_pattern(scenario):
+    """Regex that matches only when this scenario, and no other, is present in the query
+
+    Equivalent to route(query) == scenario, expressed as lookaheads for a single RegExp.test().
+    """
+    own = [case_insensitive(scenario_pattern(scenario))]
+    others = [case_insensitive(scenario_pattern(s)) for s in INTENT_PATTERNS if s != scenario]
+    if scenario == ISSUE_ID_SCENARIO:
+        own.append(ISSUE_ID_PATTERN)
+    else:
+        others.append(ISSUE_ID_PATTERN)
+    return "^(?![\\s\\S]*(?:" + "|".join(others) + "))(?=[\\s\\S]*(?:" + "|".join(own) + "))"
+
+def load_corpus(path=CORPUS_FILE):
+    with open(path) as f:
+        return json.load(f)
+
+def handle_request(payload):
+    """Tool entry point: route a query locally, reporting all matched scenarios"""
+    query = payload["query"]
+    matched = sorted(matched_scenarios(query))
+    scenario = matched[0] if len(matched) == 1 else None
+    return {
+        "scenario": scenario,
+        "agent": SCENARIO_NAMES[scenario] if scenario is not None else None,
+        "matched": matched,
+        "fallback": scenario is None
+    }
+
+if __name__ == "__main__":
+    corpus = load_corpus(sys.argv[1] if len(sys.argv) > 1 else CORPUS_FILE)
+
+    latencies = []
+    confident = correct = 0
+    mistakes = []
+    for _ in range(50):
+        for item in corpus:
+            start = time.perf_counter_ns()
+            scenario = route(item["query"])
+            latencies.append(time.perf_counter_ns() - start)
+    for item in corpus:
+        scenario = route(item["query"])
+        if scenario is not None:
+            confident += 1
+            if scenario == item["scenario"]:
+                correct += 1
+            else:
+                mistakes.append((item["query"], scenario, item["scenario"]))
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] / 1000
+    p99 = latencies[int(len(latencies) * 0.99)] / 1000
+
+    print(f"📊 Pre-router benchmark ({len(corpus)} labeled queries):")
+    print(f"   Resolved locally: {confident}/{len(corpus)} ({confident / len(corpus):.0%}), the rest fall back to the LLM router")
+    print(f"   Accuracy when resolved: {correct}/{confident} ({correct / max(confident, 1):.0%})")
+    print(f"   Latency: p50 {p50:.1f} µs, p99 {p99:.1f} µs")
+    for query, got, expected in mistakes:
+        print(f"   ❌ {query!r}: routed to {got}, labeled {expected}")
+
+    # Validation: the generated Flowise regexes agree with the Python router
+    flowise = {scenario: re.compile(flowise_condition_pattern(scenario)) for scenario in INTENT_PATTERNS}
+    agree = all(
+        [s for s, pattern in flowise.items() if pattern.search(item["query"])] == ([route(item["query"])] if route(item["query"]) is not None else [])
+        for item in corpus
+    )
+    print(f"\n📊 Validation:")
+    print(f"   Flowise condition regexes match Python router: {'✅' if agree else '❌'}")
+    print(f"   Accuracy ≥ 95% on resolved queries: {'✅' if correct >= 0.95 * confident else '❌'}")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Memory growth simulation for scheduled agents
+Replays N scheduled runs through each Flowise memory type and reports how prompt size and
+modeled latency grow, using real change sets packed to the agent's context budget.
+
+Model, per run: the prompt is persona + memory + pinned state + scheduled query + tool result.
+Memory keeps the user/assistant messages of earlier runs (tool results are not persisted).
+conversationSummary re-summarizes the whole history before every call, and the summary keeps
+SUMMARY_RATIO of what it covers; conversationSummaryBuffer keeps recent messages up to its
+token limit and folds only the overflow into a summary of at most SUMMARY_MAX_TOKENS. Latency is
+one round trip plus prefill and generation time for every model call made in the run.
+"""
+
+import sys
+
+from change_detector import diff_snapshots
+from context_packer import count_tokens, pack
+from generate_workflow import AGENTS, BOUNDED_MEMORY_TYPES
+from synthetic import make_snapshot, mutate_snapshot
+
+SCHEDULED_QUERY = "Scheduled run: what changed since the last check?"
+SUMMARY_RATIO = 0.15
+SUMMARY_MAX_TOKENS = 500
+ROUND_TRIP_SECONDS = 0.4
+PREFILL_TOKENS_PER_SECOND = 10_000
+OUTPUT_TOKENS_PER_SECOND = 80
+CONTEXT_WINDOW = 128_000   # gpt-4o-mini
+
+def call_seconds(input_tokens, output_tokens):
+    return ROUND_TRIP_SECONDS + input_tokens / PREFILL_TOKENS_PER_SECOND + output_tokens / OUTPUT_TOKENS_PER_SECOND
+
+def narrate(delta):
+    """Stand-in for the agent's answer: counts plus the first status changes"""
+    lines = [f"## Changes since {delta['previousTimestamp']}"]
+    lines += [f"- {category}: {count}" for category, count in delta["summary"].items()]
+    lines += [f"- {item['issueId']}: {item['from']} → {item['to']} ({item['updatedBy']})" for item in delta["changes"]["status"][:15]]
+    return "\n".join(lines)
+
+def scheduled_runs(n_runs, n_rows, max_context_tokens):
+    """(tool result tokens, user tokens, assistant tokens) for each replayed run"""
+    snapshot = make_snapshot(n_rows, timestamp="2025-01-01T00:00:00Z")
+    runs = []
+    user_tokens = count_tokens(SCHEDULED_QUERY)
+    for run in range(1, n_runs + 1):
+        hours = run * 6
+        timestamp = f"2025-{1 + hours // 24 // 28:02d}-{1 + hours // 24 % 28:02d}T{hours % 24:02d}:00:00Z"
+        current = mutate_snapshot(snapshot, change_rate=0.02, seed=run, timestamp=timestamp)
+        delta = diff_snapshots(snapshot, current)
+        _, tool_tokens = pack(delta, max_context_tokens)
+        runs.append((tool_tokens, user_tokens, count_tokens(narrate(delta))))
+        snapshot = current
+    return runs
+
+def simulate(runs, persona_tokens, memory_type, window=None, max_tokens=None, pinned=False):
+    """Prompt tokens and modeled seconds for every run under one memory policy"""
+    history = []          # message token counts, oldest first
+    summary = 0
+    results = []
+    last_output = 0
+    for tool_tokens, user_tokens, output_tokens in runs:
+        seconds = 0.0
+        if memory_type == "allMessages":
+            memory = sum(history)
+        elif memory_type == "windowSize":
+            memory = sum(history[-window:])
+        elif memory_type == "conversationSummary":
+            if history:
+                covered = sum(history)
+                summary = int(covered * SUMMARY_RATIO)
+                seconds += call_seconds(covered, summary)
+            memory = summary
+        elif memory_type == "conversationSummaryBuffer":
+            overflow = []
+            while sum(history) > max_tokens:
+                overflow.append(history.pop(0))
+            if overflow:
+                new_summary = min(SUMMARY_MAX_TOKENS, summary + int(sum(overflow) * SUMMARY_RATIO))
+                seconds += call_seconds(summary + sum(overflow), new_summary)
+                summary = new_summary
+            memory = summary + sum(history)
+        else:
+            raise ValueError(f"Unknown memory type: {memory_type}")
+
+        prompt = persona_tokens + memory + (last_output if pinned else 0) + user_tokens + tool_tokens
+        seconds += call_seconds(prompt, output_tokens)
+        results.append((prompt, seconds))
+        history += [user_tokens, output_tokens]
+        last_output = output_tokens
+    return results
+
+if __name__ == "__main__":
+    n_runs = int(sys.argv[1]) if len(sys.argv) > 1 else 120   # 30 days at 4 runs per day
+    n_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    agent = next(spec for spec in AGENTS if spec["label"] == "Agent.ChangeDetector")
+    persona_tokens = count_tokens(agent["persona"])
+    runs = scheduled_runs(n_runs, n_rows, agent["max_context_tokens"])
+    checkpoints = sorted({1, n_runs // 4, n_runs // 2, n_runs})
+
+    policies = {
+        "allMessages": ("allMessages", {}),
+        "conversationSummary": ("conversationSummary", {}),
+        "windowSize (10)": ("windowSize", {"window": 10}),
+        "windowSize (6) + pinned": ("windowSize", {"window": 6, "pinned": True}),
+        "summaryBuffer (2000)": ("conversationSummaryBuffer", {"max_tokens": 2000}),
+        "summaryBuffer (2000) + pinned": ("conversationSummaryBuffer", {"max_tokens": 2000, "pinned": True}),
+    }
+    print(f"📊 Memory simulation ({n_runs} scheduled runs of {agent['label']}, {n_rows} rows):")
+    print(f"   {'memory':<30}" + "".join(f"{'run ' + str(run):>10}" for run in checkpoints) + f"{'latency':>10}")
+    results = {}
+    for name, (memory_type, options) in policies.items():
+        results[name] = simulate(runs, persona_tokens, memory_type, **options)
+        prompts = [results[name][run - 1][0] for run in checkpoints]
+        print(f"   {name:<30}" + "".join(f"{tokens:>10,}" for tokens in prompts) + f"{results[name][-1][1]:>9.1f}s")
+
+    # Every agent's configured policy, replayed against the same runs
+    print(f"\n   Configured agents (run {n_runs} prompt tokens):")
+    for spec in AGENTS:
+        configured = simulate(runs, count_tokens(spec["persona"]), spec["memory_type"], spec["memory_window"],
+                              spec["memory_max_tokens"], bool(spec["pinned_state"]))
+        flag = "scheduled" if spec["scheduled"] else "interactive"
+        print(f"   {spec['label']:<30} {spec['memory_type']:<26} {configured[-1][0]:>8,} ({flag})")
+
+    # Validation
+    def growth(name):
+        return results[name][-1][0] - results[name][n_runs // 2 - 1][0]
+
+    overflow_run = next((run for run, (prompt, _) in enumerate(results["allMessages"], 1) if prompt > CONTEXT_WINDOW), None)
+    bounded_flat = all(abs(growth(name)) <= 500 for name in policies if policies[name][0] in BOUNDED_MEMORY_TYPES)
+    print(f"\n📊 Validation:")
+    print(f"   allMessages grows every run: +{growth('allMessages'):,} tokens over the second half {'✅' if growth('allMessages') > 0 else '❌'}")
+    print(f"   allMessages exceeds {CONTEXT_WINDOW:,}-token context at run: {overflow_run or 'not within ' + str(n_runs)}")
+    print(f"   Bounded policies flat over the second half (±500 tokens): {'✅' if bounded_flat else '❌'}")
+    fastest = min(results, key=lambda name: results[name][-1][1])
+    below = all(results[name][-1][0] < results["allMessages"][-1][0] for name in policies if policies[name][0] in BOUNDED_MEMORY_TYPES)
+    print(f"   Bounded prompts below allMessages at run {n_runs}: {'✅' if below else '❌'}")
+    print(f"   Lowest latency at run {n_runs}: {fastest} ({results[fastest][-1][1]:.1f}s; summary memories pay a summarization call per run)")
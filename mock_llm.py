@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Local mock of an OpenAI-compatible chat completions endpoint for tests and benchmarks
+Routes with the keyword router, drives agents through their tools deterministically, and
+sleeps for a configurable round trip plus prefill/generation time so load tests see LLM-like latency.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from generate_workflow import DATA_TOOLS
+from intent_router import matched_scenarios
+
+ROUTE_PROMPT = "Respond with only the scenario number."
+FAN_OUT_SCENARIOS = {1, 2, 6}
+DEFAULT_SCENARIO = 4   # Report Generator, as the router instructions specify
+
+def approx_tokens(text):
+    return len(text) // 4 + 1
+
+def route(query, n_scenarios):
+    """Scenario the router would pick: the single keyword match, fan-out for several, else default"""
+    matched = matched_scenarios(query)
+    if len(matched) == 1:
+        return matched.pop()
+    if len(matched) > 1 and n_scenarios > 8 and len(matched & FAN_OUT_SCENARIOS) >= 2:
+        return 8
+    return min(matched) if matched else DEFAULT_SCENARIO
+
+def agent_turn(messages, tools):
+    """Next assistant message for an agent: cache lookup, data tools, cache store, then answer"""
+    names = [tool["function"]["name"] for tool in tools or []]
+    question = next(message["content"] for message in reversed(messages) if message["role"] == "user")
+    called = [call["function"]["name"] for message in messages if message["role"] == "assistant"
+              for call in message.get("tool_calls") or []]
+    results = {message["name"]: message["content"] for message in messages if message["role"] == "tool"}
+
+    def calls(*pairs):
+        return {"role": "assistant", "content": None, "tool_calls": [
+            {"id": f"call_{len(called) + n}", "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+            for n, (name, arguments) in enumerate(pairs)
+        ]}
+
+    cached = "response-cache" in names
+    if cached and "response-cache" not in called:
+        return calls(("response-cache", {"action": "get", "query": question}))
+    if cached and called == ["response-cache"]:
+        lookup = json.loads(results.get("response-cache") or "{}")
+        if lookup.get("hit"):
+            return {"role": "assistant", "content": lookup["response"]}
+
+    data_tools = [name for name in names if name in DATA_TOOLS]
+    pending = [name for name in data_tools if name not in called]
+    if pending:
+        return calls(*((name, {}) for name in pending))
+
+    sizes = ", ".join(f"{name} {len(results.get(name) or '')} bytes" for name in data_tools)
+    answer = f"Answer to {question!r} from {len(data_tools)} tool result(s){': ' + sizes if sizes else ''}."
+    if cached and called.count("response-cache") == 1:
+        return calls(("response-cache", {"action": "put", "query": question, "response": answer}))
+    return {"role": "assistant", "content": answer}
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """POST /v1/chat/completions"""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        mock = self.server.mock
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        messages = request.get("messages", [])
+        prompt_tokens = sum(approx_tokens(json.dumps(message)) for message in messages) + approx_tokens(json.dumps(request.get("tools") or []))
+
+        system = messages[0]["content"] if messages and messages[0]["role"] == "system" else ""
+        if ROUTE_PROMPT in system:
+            n_scenarios = system.count("\nScenario ")
+            message = {"role": "assistant", "content": str(route(messages[-1]["content"], n_scenarios))}
+        else:
+            message = agent_turn(messages, request.get("tools"))
+        completion_tokens = approx_tokens(json.dumps(message))
+
+        with mock.lock:
+            mock.request_count += 1
+            mock.prompt_tokens += prompt_tokens
+            mock.in_flight += 1
+            mock.peak_in_flight = max(mock.peak_in_flight, mock.in_flight)
+        time.sleep(mock.latency + prompt_tokens / mock.prefill_tokens_per_second + completion_tokens / mock.output_tokens_per_second)
+        with mock.lock:
+            mock.in_flight -= 1
+
+        body = {
+            "id": f"chatcmpl-mock-{mock.request_count}",
+            "object": "chat.completion",
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if message.get("tool_calls") else "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+        }
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+class MockLLM:
+    """Background mock server; use as a context manager"""
+
+    def __init__(self, latency=0.05, prefill_tokens_per_second=50_000, output_tokens_per_second=2_000):
+        self.latency = latency
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.output_tokens_per_second = output_tokens_per_second
+        self.request_count = 0
+        self.prompt_tokens = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), MockLLMHandler)
+        self.server.daemon_threads = True
+        self.server.mock = self
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+if __name__ == "__main__":
+    with MockLLM() as mock:
+        print(f"✅ Mock OpenAI-compatible API on {mock.base_url}/chat/completions (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
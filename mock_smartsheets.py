@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Local mock of the SmartSheets REST API v2.0 for tests and benchmarks
+Serves a synthetic snapshot in the API's sheet/columns/rows shape with configurable latency.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Sheet column titles and the snapshot field each one holds
+COLUMNS = [
+    ("Issue ID", "issueId"),
+    ("Title", "title"),
+    ("Status", "status"),
+    ("Assignee", "assignee"),
+    ("Priority", "priority"),
+    ("Created Date", "createdDate"),
+    ("Modified", "updatedDate"),
+    ("Modified By", "updatedBy")
+]
+
+def to_api_sheet(snapshot):
+    """Convert a data/snapshots style snapshot into SmartSheets API columns and rows"""
+    metadata = snapshot.get("columnMetadata") or {}
+    columns = [
+        {"id": 1000 + i, "index": i, "title": title, "type": "PICKLIST" if field in metadata else "TEXT_NUMBER", "primary": i == 0}
+        for i, (title, field) in enumerate(COLUMNS)
+    ]
+    for column, (_, field) in zip(columns, COLUMNS):
+        if field in metadata:
+            column["options"] = metadata[field]
+    rows = []
+    for number, row in enumerate(snapshot["rows"], start=1):
+        rows.append({
+            "id": 5_000_000 + int(row["issueId"][3:]),
+            "rowNumber": number,
+            "modifiedAt": row.get("updatedDate"),
+            "cells": [
+                {"columnId": column["id"], "value": row.get(field), "displayValue": row.get(field)}
+                for column, (_, field) in zip(columns, COLUMNS)
+            ]
+        })
+    return {
+        "id": int(snapshot["sheetId"]),
+        "name": snapshot["sheetName"],
+        "version": 1,
+        "columns": columns,
+        "rows": rows
+    }
+
+class MockSmartSheetsHandler(BaseHTTPRequestHandler):
+    """GET /sheets/{id}, /sheets/{id}/columns with page/pageSize pagination and rowsModifiedSince"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        mock = self.server.mock
+        with mock.lock:
+            mock.in_flight += 1
+            mock.peak_in_flight = max(mock.peak_in_flight, mock.in_flight)
+        try:
+            self.respond(mock)
+        finally:
+            with mock.lock:
+                mock.in_flight -= 1
+
+    def respond(self, mock):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = url.path.strip("/").split("/")
+
+        with mock.lock:
+            mock.request_count += 1
+            throttled = mock.throttle_every and mock.request_count % mock.throttle_every == 0
+        if mock.latency:
+            time.sleep(mock.latency)
+        if throttled:
+            return self.send_json(429, {"errorCode": 4003, "message": "Rate limit exceeded."}, {"Retry-After": "0"})
+
+        sheet = mock.sheets.get(parts[1]) if len(parts) >= 2 and parts[0] == "sheets" else None
+        if sheet is None:
+            return self.send_json(404, {"errorCode": 1006, "message": "Not Found"})
+        if parts[2:] == ["columns"]:
+            return self.send_json(200, {"pageNumber": 1, "totalCount": len(sheet["columns"]), "data": sheet["columns"]})
+
+        rows = sheet["rows"]
+        if "rowsModifiedSince" in query:
+            rows = [row for row in rows if row["modifiedAt"] >= query["rowsModifiedSince"]]
+        page_size = int(query.get("pageSize", 100))
+        page = int(query.get("page", 1))
+        body = {
+            "id": sheet["id"],
+            "name": sheet["name"],
+            "version": sheet["version"],
+            "totalRowCount": len(sheet["rows"]),
+            "columns": sheet["columns"],
+            "rows": rows[(page - 1) * page_size:page * page_size]
+        }
+        self.send_json(200, body)
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+class MockSmartSheets:
+    """Background mock server; use as a context manager"""
+
+    def __init__(self, snapshot, latency=0.0, throttle_every=0):
+        self.sheet = to_api_sheet(snapshot)
+        self.sheets = {str(self.sheet["id"]): self.sheet}
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.request_count = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), MockSmartSheetsHandler)
+        self.server.daemon_threads = True
+        self.server.mock = self
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def add(self, snapshot):
+        """Serve another sheet alongside the first, keyed by its sheetId"""
+        sheet = to_api_sheet(snapshot)
+        self.sheets[str(sheet["id"])] = sheet
+        return sheet
+
+    def update(self, snapshot):
+        """Replace the served contents of the snapshot's sheet, bumping its version"""
+        sheet_id = str(int(snapshot["sheetId"]))
+        version = self.sheets[sheet_id]["version"] + 1
+        self.sheets[sheet_id] = {**to_api_sheet(snapshot), "version": version}
+        if sheet_id == str(self.sheet["id"]):
+            self.sheet = self.sheets[sheet_id]
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+if __name__ == "__main__":
+    from synthetic import make_snapshot
+
+    with MockSmartSheets(make_snapshot(250)) as mock:
+        print(f"✅ Mock SmartSheets API on {mock.base_url}/sheets/{mock.sheet['id']} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Report facts materialization for Agent.ReportGenerator
+After each change set, one streaming pass over the last 24h of the event log produces a compact
+JSON document of counts, top-N lists and contributor tallies, so the agent only renders it.
+"""
+
+import fcntl
+import heapq
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import status_metrics
+from event_log import LOG_FILE, METRICS_DIR, read_state
+
+REPORTS_DIR = "data/reports"
+FACTS_FILE = "report-facts.json"
+LOCK_FILE = "report-facts.lock"
+WINDOW_HOURS = 24
+TOP_N = 5
+HOT_THRESHOLD = 3   # updates in the window, matching the heat-map definition of heating up
+
+def window_start_offset(log, since):
+    """Byte offset of the first event after `since`, by binary search over line starts
+
+    Events are appended in timestamp order, so only the window is read rather than the whole log.
+    """
+    log.seek(0, os.SEEK_END)
+    low, high = 0, log.tell()
+    while low < high:
+        middle = (low + high) // 2
+        log.seek(middle)
+        if middle:
+            log.readline()   # skip to the next line start
+        start = log.tell()
+        line = log.readline()
+        if not line or json.loads(line)["at"] > since:
+            high = middle
+        else:
+            low = start + len(line)
+    return low
+
+def stream_window(log_path, since, end=None):
+    """Yield events from the log whose timestamp is after `since`, up to byte `end` if given"""
+    if not os.path.exists(log_path):
+        return
+    with open(log_path, "rb") as log:
+        offset = window_start_offset(log, since)
+        log.seek(offset)
+        for line in log:
+            offset += len(line)
+            if end is not None and offset > end:   # past what the last append committed
+                return
+            yield json.loads(line)
+
+def iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def compute_facts(events, metrics, now, window_hours=WINDOW_HOURS, top_n=TOP_N):
+    """Fold a stream of events into bounded report facts"""
+    counts = {"new": 0, "resolved": 0, "status": 0, "assignee": 0, "priority": 0, "description": 0, "deleted": 0}
+    transitions = {}
+    updates = {}        # issueId -> [count, fields changed, last status]
+    contributors = {}
+    for event in events:
+        kind = event["type"]
+        counts[kind] = counts.get(kind, 0) + 1
+        if kind == "status":
+            key = f"{event['from']}→{event['to']}"
+            transitions[key] = transitions.get(key, 0) + 1
+            if event["to"] in status_metrics.CLOSED_STATUSES and event["from"] not in status_metrics.CLOSED_STATUSES:
+                counts["resolved"] += 1
+        person = event.get("updatedBy") or event.get("createdBy")
+        if person:
+            contributors[person] = contributors.get(person, 0) + 1
+        if kind not in ("new", "deleted"):
+            entry = updates.setdefault(event["issueId"], [0, set(), None])
+            entry[0] += 1
+            entry[1].add(event["field"])
+            if kind == "status":
+                entry[2] = event["to"]
+
+    hot = heapq.nlargest(top_n, ((entry[0], issue_id) for issue_id, entry in updates.items() if entry[0] > HOT_THRESHOLD))
+    blocked = sorted((since, issue_id) for issue_id, (status, since) in metrics.current.items() if status == "Blocked")
+    stuck = metrics.stuck(now)
+    by_status = {}
+    for status, _ in metrics.current.values():
+        by_status[str(status)] = by_status.get(str(status), 0) + 1
+
+    return {
+        "window": {"from": iso(now - window_hours * 3600), "to": iso(now), "hours": window_hours},
+        "counts": counts,
+        "statusTransitions": dict(sorted(transitions.items(), key=lambda item: -item[1])),
+        "issuesByStatus": by_status,
+        "heatingUpCount": sum(1 for entry in updates.values() if entry[0] > HOT_THRESHOLD),
+        "heatingUp": [
+            {"issueId": issue_id, "updates": count, "fields": sorted(updates[issue_id][1]), "status": updates[issue_id][2] or metrics.current.get(issue_id, [None])[0]}
+            for count, issue_id in hot
+        ],
+        "topContributors": [{"name": name, "changes": count} for name, count in heapq.nlargest(top_n, contributors.items(), key=lambda item: item[1])],
+        "activeContributors": len(contributors),
+        "blockedCount": len(blocked),
+        "blocked": [{"issueId": issue_id, "days": round((now - since) / status_metrics.DAY, 1)} for since, issue_id in blocked[:top_n]],
+        "stalledCount": len(stuck),
+        "stalled": stuck[:top_n]
+    }
+
+def materialize(metrics_dir=METRICS_DIR, reports_dir=REPORTS_DIR, now=None, window_hours=WINDOW_HOURS, top_n=TOP_N):
+    """Compute report facts for the window ending at the last change set and write them to reports_dir
+
+    Facts already written for a newer change set (by another process or thread) are kept.
+    """
+    state = read_state(metrics_dir)
+    source = state["lastTimestamp"]
+    if now is None:
+        now = status_metrics.parse_time(source) if source else int(time.time())
+    since = iso(now - window_hours * 3600)
+
+    facts = compute_facts(stream_window(os.path.join(metrics_dir, LOG_FILE), since, state.get("logBytes")),
+                          status_metrics.load(metrics_dir), now, window_hours, top_n)
+    facts = {"generatedAt": iso(time.time()), "sourceTimestamp": source, **facts}
+
+    os.makedirs(reports_dir, exist_ok=True)
+    path = os.path.join(reports_dir, FACTS_FILE)
+    data = json.dumps(facts, separators=(",", ":"))
+    with open(os.path.join(reports_dir, LOCK_FILE), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)   # released when lock_file closes
+        current = load_facts(reports_dir)
+        if current and current["sourceTimestamp"] and (source is None or current["sourceTimestamp"] > source):
+            return {"path": path, "bytes": 0, "sourceTimestamp": current["sourceTimestamp"], "kept": True}
+        with open(path + ".tmp", "w") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+    return {"path": path, "bytes": len(data), "sourceTimestamp": source}
+
+def load_facts(reports_dir=REPORTS_DIR):
+    try:
+        with open(os.path.join(reports_dir, FACTS_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def handle_request(payload):
+    """Tool entry point: the latest report facts, rematerialized if the event log has moved on"""
+    metrics_dir = payload.get("metricsDir", METRICS_DIR)
+    reports_dir = payload.get("reportsDir", REPORTS_DIR)
+    facts = load_facts(reports_dir)
+    if (payload.get("action") == "materialize" or facts is None
+            or facts["sourceTimestamp"] != read_state(metrics_dir)["lastTimestamp"]):
+        materialize(metrics_dir, reports_dir, top_n=payload.get("topN") or TOP_N)
+        facts = load_facts(reports_dir)
+    return facts
+
+if __name__ == "__main__":
+    import tempfile
+
+    from change_detector import diff_snapshots
+    from event_log import EventLog
+    from synthetic import make_snapshot, mutate_snapshot
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    n_runs = 8   # two days at 4 runs per day
+    token_budget = 2_000
+
+    print(f"📊 Report facts benchmark ({n_runs} runs per size, 24h window):")
+    results = {}
+    for n_rows in sizes:
+        workdir = tempfile.mkdtemp()
+        metrics_dir = os.path.join(workdir, "metrics")
+        log = EventLog(metrics_dir)
+        snapshots = [make_snapshot(n_rows, timestamp="2025-01-01T00:00:00Z")]
+        metrics = status_metrics.StatusMetrics()
+        metrics.seed(snapshots[0])
+        deltas = []
+        for run in range(1, n_runs + 1):
+            hours = run * 6
+            timestamp = f"2025-01-{1 + hours // 24:02d}T{hours % 24:02d}:00:00Z"
+            snapshots.append(mutate_snapshot(snapshots[-1], change_rate=0.03, seed=run, timestamp=timestamp))
+            deltas.append(diff_snapshots(snapshots[-2], snapshots[-1]))
+            log.append(deltas[-1])
+            metrics.apply(deltas[-1])
+        status_metrics.save(metrics, metrics_dir)
+
+        start = time.perf_counter()
+        result = materialize(metrics_dir, os.path.join(workdir, "reports"))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        raw_bytes = sum(len(json.dumps(delta)) for delta in deltas[-4:])
+        results[n_rows] = (result, deltas, load_facts(os.path.join(workdir, "reports")))
+        print(f"   {n_rows:>7} rows: {elapsed_ms:7.1f} ms, facts {result['bytes'] / 1024:5.1f} KB (~{result['bytes'] // 4} tokens) vs raw 24h deltas {raw_bytes / 1024:8.0f} KB")
+
+    # Freshness against appends made elsewhere, and never going back to older facts
+    smallest = min(sizes)
+    workdir = tempfile.mkdtemp()
+    metrics_dir, reports_dir = os.path.join(workdir, "metrics"), os.path.join(workdir, "reports")
+    base = make_snapshot(smallest, timestamp="2025-01-01T00:00:00Z")
+    later = mutate_snapshot(base, change_rate=0.03, seed=1, timestamp="2025-01-01T06:00:00Z")
+    status_metrics.save(status_metrics.StatusMetrics(), metrics_dir)
+    EventLog(metrics_dir).append(diff_snapshots(base, later))
+    first = handle_request({"metricsDir": metrics_dir, "reportsDir": reports_dir})
+    EventLog(metrics_dir).append(diff_snapshots(later, mutate_snapshot(later, change_rate=0.03, seed=2, timestamp="2025-01-01T12:00:00Z")))
+    refreshed = handle_request({"metricsDir": metrics_dir, "reportsDir": reports_dir})
+    with open(os.path.join(reports_dir, FACTS_FILE), "w") as f:
+        json.dump({**refreshed, "sourceTimestamp": "2025-01-02T00:00:00Z"}, f)
+    stale = materialize(metrics_dir, reports_dir)
+
+    # Validation
+    largest = max(sizes)
+    result, deltas, facts = results[largest]
+    expected_status = sum(delta["summary"]["status"] for delta in deltas[-4:])
+    expected_new = sum(delta["summary"]["new"] for delta in deltas[-4:])
+    sizes_bytes = [results[n][0]["bytes"] for n in sizes]
+
+    print(f"\n📊 Validation:")
+    print(f"   Status changes in window: {facts['counts']['status']} (deltas: {expected_status}) {'✅' if facts['counts']['status'] == expected_status else '❌'}")
+    print(f"   New issues in window: {facts['counts']['new']} (deltas: {expected_new}) {'✅' if facts['counts']['new'] == expected_new else '❌'}")
+    print(f"   Prompt bounded: ≤{token_budget} tokens at every size {'✅' if max(sizes_bytes) // 4 <= token_budget else '❌'}")
+    print(f"   Growth {min(sizes)}→{largest} rows: {max(sizes_bytes) / min(sizes_bytes):.2f}x {'✅' if max(sizes_bytes) < 2 * min(sizes_bytes) else '❌'}")
+    print(f"   Facts follow appends from another log instance: {'✅' if first['sourceTimestamp'] == '2025-01-01T06:00:00Z' and refreshed['sourceTimestamp'] == '2025-01-01T12:00:00Z' else '❌'}")
+    print(f"   Newer facts never replaced: {'✅' if stale.get('kept') and load_facts(reports_dir)['sourceTimestamp'] == '2025-01-02T00:00:00Z' else '❌'}")
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Response cache for the read-only analytical agents
+Answers are keyed on (normalized query, agent, snapshot ID), evicted LRU with a TTL, and
+dropped as soon as a new snapshot lands, so repeated questions between two snapshots skip
+the agent's tool calls and reasoning.
+"""
+
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from snapshot_store import list_snapshots
+
+SNAPSHOT_DIR = "data/snapshots"
+DEFAULT_TTL_SECONDS = 6 * 3600   # one snapshot interval
+DEFAULT_MAX_ENTRIES = 128
+
+def normalize_query(query):
+    """Lowercase, drop punctuation and collapse whitespace so trivial rewordings share a key"""
+    return " ".join(re.sub(r"[^\w\s-]", " ", query.lower()).split())
+
+def current_snapshot_id(snapshot_dir=SNAPSHOT_DIR):
+    """Name of the latest stored snapshot, or None when there is none yet"""
+    names = list_snapshots(snapshot_dir)
+    return names[-1] if names else None
+
+class ResponseCache:
+    """LRU + TTL cache of agent responses for one agent
+
+    Every entry belongs to the snapshot it was computed from; the first lookup against a newer
+    snapshot clears the cache instead of letting stale entries age out. Safe to share between
+    tool-server threads: get, put, observe and stats hold the cache's lock.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()   # (query, snapshot ID) -> (expires at, response)
+        self.snapshot_id = None
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+        self.lock = threading.RLock()
+
+    def observe(self, snapshot_id):
+        """Invalidate everything when the snapshot changes"""
+        with self.lock:
+            self.invalidate_if_changed(snapshot_id)
+
+    def invalidate_if_changed(self, snapshot_id):
+        if snapshot_id != self.snapshot_id:
+            if self.entries:
+                self.counters["invalidations"] += 1
+                self.entries.clear()
+            self.snapshot_id = snapshot_id
+
+    def get(self, query, snapshot_id, now=None):
+        now = time.time() if now is None else now
+        key = (normalize_query(query), snapshot_id)
+        with self.lock:
+            return self.lookup(key, snapshot_id, now)
+
+    def lookup(self, key, snapshot_id, now):
+        self.invalidate_if_changed(snapshot_id)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] <= now:
+            del self.entries[key]
+            self.counters["expirations"] += 1
+            entry = None
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.counters["hits"] += 1
+        return entry[1]
+
+    def put(self, query, snapshot_id, response, now=None):
+        now = time.time() if now is None else now
+        key = (normalize_query(query), snapshot_id)
+        with self.lock:
+            self.invalidate_if_changed(snapshot_id)
+            self.entries[key] = (now + self.ttl_seconds, response)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def stats(self):
+        with self.lock:
+            return self.summary()
+
+    def summary(self):
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hitRate": round(self.counters["hits"] / lookups, 3) if lookups else None,
+            "size": len(self.entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "snapshotId": self.snapshot_id
+        }
+
+# One cache per agent for the lifetime of the tool server
+_caches = {}
+_caches_guard = threading.Lock()
+
+def get_cache(agent, max_entries=None, ttl_seconds=None):
+    """Cache for an agent, adopting the settings passed by its generated tool body"""
+    with _caches_guard:
+        cache = _caches.get(agent)
+        if cache is None:
+            cache = _caches[agent] = ResponseCache(max_entries or DEFAULT_MAX_ENTRIES, ttl_seconds or DEFAULT_TTL_SECONDS)
+        else:
+            cache.max_entries = max_entries or cache.max_entries
+            cache.ttl_seconds = ttl_seconds or cache.ttl_seconds
+    return cache
+
+def handle_request(payload):
+    """Tool entry point: action=get looks up a cached answer, put stores one, stats reports counters"""
+    action = payload.get("action") or "get"
+    if action == "stats":
+        agents = [payload["agent"]] if payload.get("agent") else sorted(_caches)
+        return {"caches": {agent: _caches[agent].stats() for agent in agents if agent in _caches}}
+
+    cache = get_cache(payload["agent"], payload.get("maxEntries"), payload.get("ttlSeconds"))
+    snapshot_id = current_snapshot_id(payload.get("snapshotDir", SNAPSHOT_DIR))
+    if action == "put":
+        cache.put(payload["query"], snapshot_id, payload["response"])
+        return {"stored": True, "snapshotId": snapshot_id}
+    if action == "get":
+        response = cache.get(payload["query"], snapshot_id)
+        return {"hit": response is not None, "response": response, "snapshotId": snapshot_id}
+    raise ValueError(f"Unknown action: {action}")
+
+if __name__ == "__main__":
+    import random
+
+    n_queries = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    agents = ["Agent.HeatMapAnalyzer", "Agent.StatusTransitionTracker", "Agent.ReportGenerator", "Agent.TrendAnalyzer"]
+    questions = [
+        "Show hot issues", "show hot issues!", "Which issues are heating up?", "daily report",
+        "Daily report please", "Give me a summary", "status transitions this week", "where are the bottlenecks",
+        "trends week over week", "any patterns in resolution time?"
+    ] + [f"report for team {n}" for n in range(200)]
+    weights = [1 / (rank + 1) for rank in range(len(questions))]   # Zipf-like popularity
+
+    rng = random.Random(0)
+    caches = {agent: ResponseCache() for agent in agents}
+    queries_per_snapshot = n_queries // 4   # four 6-hourly snapshots
+    elapsed = 0.0
+    now = 0.0
+    for n in range(n_queries):
+        now += 4 * 21_600 / n_queries
+        snapshot_id = f"snapshot_{n // queries_per_snapshot}.snap"
+        agent = rng.choice(agents)
+        query = rng.choices(questions, weights)[0]
+        start = time.perf_counter()
+        if caches[agent].get(query, snapshot_id, now) is None:
+            caches[agent].put(query, snapshot_id, f"answer to {query}", now)
+        elapsed += time.perf_counter() - start
+
+    hits = sum(cache.counters["hits"] for cache in caches.values())
+    print(f"📊 Response cache benchmark ({n_queries} queries, {len(agents)} agents, 4 snapshots):")
+    print(f"   Hit rate: {hits / n_queries:.1%} (agent chain skipped on hits)")
+    print(f"   Lookup + store: {elapsed / n_queries * 1e6:.2f} µs per query")
+    for agent, cache in caches.items():
+        stats = cache.stats()
+        print(f"   {agent}: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions, {stats['invalidations']} invalidations")
+
+    # Validation
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.put("Show hot issues", "a.snap", "first", now=0)
+    normalized_hit = cache.get("  show HOT issues? ", "a.snap", now=1) == "first"
+    cache.put("daily report", "a.snap", "second", now=2)
+    cache.get("show hot issues", "a.snap", now=3)
+    cache.put("trends", "a.snap", "third", now=4)
+    lru_evicted = cache.get("daily report", "a.snap", now=5) is None and cache.get("show hot issues", "a.snap", now=5) == "first"
+    ttl_expired = cache.get("trends", "a.snap", now=64) is None
+    cache.put("trends", "a.snap", "third", now=70)
+    invalidated = cache.get("trends", "b.snap", now=71) is None and not cache.entries
+
+    print(f"\n📊 Validation:")
+    print(f"   Normalized query hit: {'✅' if normalized_hit else '❌'}")
+    print(f"   LRU eviction keeps recently used entry: {'✅' if lru_evicted else '❌'}")
+    print(f"   TTL expiry: {'✅' if ttl_expired else '❌'}")
+    print(f"   New snapshot invalidates cache: {'✅' if invalidated else '❌'}")
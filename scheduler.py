@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Shared scheduler for monitoring many sheets
+Staggers each sheet's run across the schedule interval instead of firing every sheet at once,
+draws all SmartSheets requests from one account-wide rate-limit budget, and runs sheets through
+a bounded worker pool, recording fetch, diff and agent time per sheet. Diffs go through the tool
+server, so they share its per-directory write locks and caches with agent tool calls. Each sheet run is traced
+into a JSON profile in the sheet's metrics directory, and every cycle refreshes the Prometheus file.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import telemetry
+from event_log import METRICS_DIR
+from flow_runner import post_json
+from generate_workflow import SHEETS_FILE, TOOL_SERVER_URL, load_sheets, sheet_dirs
+from smartsheets_fetcher import API_BASE, REQUESTS_PER_MINUTE, SmartSheetsClient, fetch_and_store, shared_limiter
+from trend_rollups import Welford
+
+INTERVAL_HOURS = 6   # matches the former cron schedule, 0 */6 * * *
+WORKERS = 4
+METRICS_FILE = "scheduler-metrics.json"
+STAGES = ("fetchSeconds", "diffSeconds", "agentSeconds")
+SCHEDULED_QUESTION = "Generate daily report and check for alerts"
+
+def stagger(sheets, interval_seconds):
+    """(offset seconds, sheet) pairs spread evenly across the interval, in config order"""
+    step = interval_seconds / len(sheets) if sheets else 0
+    return [(i * step, sheet) for i, sheet in enumerate(sheets)]
+
+def flowise_agent(flowise_url, api_key=None):
+    """Agent step that runs a sheet's flow through the Flowise prediction API (sheet["workflowId"])"""
+    headers = {"Content-Type": "application/json"}
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+
+    def run(sheet, dirs):
+        if not sheet.get("workflowId"):
+            return None
+        request = urllib.request.Request(f"{flowise_url.rstrip('/')}/api/v1/prediction/{sheet['workflowId']}",
+                                         json.dumps({"question": SCHEDULED_QUESTION}).encode(), headers)
+        with urllib.request.urlopen(request, timeout=600) as response:
+            return json.load(response)
+    return run
+
+class SheetMetrics:
+    """Per-sheet run and error counts, the last run, and mean/std/max of each stage's seconds"""
+
+    def __init__(self, sheets=None):
+        self.sheets = sheets or {}
+        self.lock = threading.Lock()
+
+    def record(self, sheet, run):
+        with self.lock:
+            entry = self.sheets.setdefault(str(sheet["sheetId"]), {"name": sheet.get("name"), "runs": 0, "errors": 0, "stages": {}})
+            entry["runs"] += 1
+            entry["errors"] += bool(run.get("error"))
+            entry["last"] = run
+            for stage in STAGES:
+                if run.get(stage) is None:
+                    continue
+                count, mean, m2, peak = entry["stages"].get(stage, [0, 0.0, 0.0, 0.0])
+                stats = Welford(count, mean, m2)
+                stats.add(run[stage])
+                entry["stages"][stage] = stats.to_list() + [max(peak, run[stage])]
+
+    def summary(self, sheet_id):
+        """{stage: {"mean", "std", "max"}} for one sheet"""
+        summary = {}
+        for stage, (count, mean, m2, peak) in self.sheets[str(sheet_id)]["stages"].items():
+            summary[stage] = {"mean": round(mean, 3), "std": round(Welford(count, mean, m2).std, 3), "max": round(peak, 3)}
+        return summary
+
+def load_metrics(metrics_dir=METRICS_DIR):
+    try:
+        with open(os.path.join(metrics_dir, METRICS_FILE)) as f:
+            return SheetMetrics(json.load(f))
+    except FileNotFoundError:
+        return SheetMetrics()
+
+def save_metrics(metrics, metrics_dir=METRICS_DIR):
+    os.makedirs(metrics_dir, exist_ok=True)
+    path = os.path.join(metrics_dir, METRICS_FILE)
+    with metrics.lock:
+        data = json.dumps(metrics.sheets, separators=(",", ":"))
+    with open(path + ".tmp", "w") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+class Scheduler:
+    """Run every configured sheet once per interval: fetch, diff, then an optional agent step
+
+    The diff is a change-detector call to the tool server at `tool_url`. `agent(sheet, dirs)` is
+    called after the diff, e.g. to run the sheet's flow with a scheduled query.
+    """
+
+    def __init__(self, sheets, interval_seconds=INTERVAL_HOURS * 3600, workers=WORKERS,
+                 requests_per_minute=REQUESTS_PER_MINUTE, base_url=API_BASE, agent=None,
+                 metrics_dir=METRICS_DIR, fetch_workers=4, tool_url=TOOL_SERVER_URL):
+        self.sheets = sheets
+        self.interval_seconds = interval_seconds
+        self.base_url = base_url
+        self.agent = agent
+        self.tool_url = tool_url.rstrip("/")
+        self.metrics_dir = metrics_dir
+        self.fetch_workers = fetch_workers
+        # One budget for the whole account, shared with fetches made through tool calls
+        self.limiter = shared_limiter(requests_per_minute)
+        self.clients = {}
+        self.clients_lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(workers)
+        self.metrics = load_metrics(metrics_dir)
+
+    def client(self, sheet):
+        """Shared-budget client per API token; sheets name their token's variable in tokenEnv"""
+        token_env = sheet.get("tokenEnv") or "SMARTSHEET_API_TOKEN"
+        with self.clients_lock:
+            if token_env not in self.clients:
+                self.clients[token_env] = SmartSheetsClient(os.environ.get(token_env), self.base_url, limiter=self.limiter)
+            return self.clients[token_env]
+
+    def run_sheet(self, sheet, now=None):
+        """One scheduled run for one sheet; errors are recorded rather than raised"""
+        dirs = sheet_dirs(sheet)
+        run = {"sheetId": str(sheet["sheetId"]), "at": (now or datetime.now(timezone.utc)).strftime("%Y-%m-%dT%H:%M:%SZ")}
+        stage = "fetchSeconds"
+        with telemetry.run(f"{run['sheetId']}-{run['at']}", dirs["metricsDir"], sheetId=run["sheetId"], name=sheet.get("name")):
+            try:
+                start = time.perf_counter()
+                fetched = fetch_and_store(sheet["sheetId"], self.client(sheet), dirs["snapshotDir"], now=now, workers=self.fetch_workers)
+                run.update(fetchSeconds=time.perf_counter() - start, mode=fetched["mode"], rows=fetched["rows"], requests=fetched["requests"])
+
+                stage = "diffSeconds"
+                start = time.perf_counter()
+                status, delta = post_json(f"{self.tool_url}/change-detector", {**dirs, "trace": {"run": telemetry.current_run()}})
+                if status != 200:
+                    raise RuntimeError(f"change-detector returned {status}: {(delta or {}).get('error')}")
+                run.update(diffSeconds=time.perf_counter() - start, changes=delta.get("totalChanges", 0))
+
+                if self.agent is not None:
+                    stage = "agentSeconds"
+                    start = time.perf_counter()
+                    with telemetry.span("agent", sheet=run["sheetId"]):
+                        self.agent(sheet, dirs)
+                    run["agentSeconds"] = time.perf_counter() - start
+            except Exception as error:   # one failing sheet must not stop the others
+                run["error"] = f"{stage}: {type(error).__name__}: {error}"
+        self.metrics.record(sheet, run)
+        return run
+
+    def run_cycle(self, now=None):
+        """Submit each sheet at its staggered offset; returns every sheet's run once all finish"""
+        start = time.monotonic()
+        futures = []
+        for offset, sheet in stagger(self.sheets, self.interval_seconds):
+            delay = start + offset - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(self.pool.submit(self.run_sheet, sheet, now and now + timedelta(seconds=offset)))
+        runs = [future.result() for future in futures]
+        save_metrics(self.metrics, self.metrics_dir)
+        telemetry.write_prometheus(self.metrics_dir)
+        return runs
+
+    def serve(self):
+        """Run cycles back to back, one per interval, until interrupted"""
+        while True:
+            start = time.monotonic()
+            runs = self.run_cycle()
+            failed = [run for run in runs if run.get("error")]
+            print(f"✅ Cycle: {len(runs)} sheets, {len(failed)} failed, {time.monotonic() - start:.0f} s")
+            time.sleep(max(0, self.interval_seconds - (time.monotonic() - start)))
+
+    def close(self):
+        self.pool.shutdown()
+        for client in self.clients.values():
+            client.close()
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["serve"]:
+        flowise_url = os.environ.get("FLOWISE_URL")
+        scheduler = Scheduler(load_sheets(sys.argv[2] if len(sys.argv) > 2 else SHEETS_FILE),
+                              agent=flowise_agent(flowise_url, os.environ.get("FLOWISE_API_KEY")) if flowise_url else None,
+                              tool_url=os.environ.get("TOOL_SERVER_URL", TOOL_SERVER_URL))
+        try:
+            scheduler.serve()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            scheduler.close()
+        sys.exit(0)
+
+    import tempfile
+    from http.server import ThreadingHTTPServer
+
+    import tool_server
+    from flow_runner import FlowRunner, percentile
+    from generate_workflow import generate_workflow
+    from mock_llm import MockLLM
+    from mock_smartsheets import MockSmartSheets
+    from synthetic import make_snapshot, mutate_snapshot
+
+    n_sheets = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    n_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    interval = 5.0                   # seconds standing in for the 6h interval
+    requests_per_minute = 12_000     # scaled with the interval so a cycle fits in seconds
+    workers = 8
+
+    snapshots = [{**make_snapshot(n_rows, seed=i), "sheetId": str(20_000_000 + i), "sheetName": f"Tracker {i}"}
+                 for i in range(n_sheets)]
+    tools = ThreadingHTTPServer(("127.0.0.1", 0), tool_server.ToolRequestHandler)
+    tools.daemon_threads = True
+    threading.Thread(target=tools.serve_forever, daemon=True).start()
+    tool_url = f"http://127.0.0.1:{tools.server_port}/tools"
+
+    def simulate(interval_seconds, pool_size):
+        """Two cycles (full pull, then incremental + diff + report agent) against fresh stubs"""
+        workdir = tempfile.mkdtemp()
+        sheets = [{"sheetId": s["sheetId"], "name": s["sheetName"], "dataDir": os.path.join(workdir, s["sheetId"])} for s in snapshots]
+        with MockSmartSheets(snapshots[0], latency=0.02) as api, MockLLM(latency=0.05) as llm:
+            for snapshot in snapshots[1:]:
+                api.add(snapshot)
+            runners = {sheet["sheetId"]: FlowRunner(generate_workflow(sheet=sheet), llm.base_url, tool_url, workers=2) for sheet in sheets}
+
+            def agent(sheet, dirs):
+                return runners[sheet["sheetId"]].run(SCHEDULED_QUESTION)
+
+            scheduler = Scheduler(sheets, interval_seconds, pool_size, requests_per_minute, api.base_url, agent,
+                                  os.path.join(workdir, "metrics"), tool_url=tool_url)
+            now = datetime.now(timezone.utc)
+            scheduler.run_cycle(now)
+            for snapshot in snapshots:
+                api.update(mutate_snapshot(snapshot, change_rate=0.02, seed=1, timestamp="2025-01-14T12:00:00Z"))
+            api.peak_in_flight = llm.peak_in_flight = 0
+            started = time.perf_counter()
+            runs = scheduler.run_cycle(now + timedelta(hours=INTERVAL_HOURS))
+            elapsed = time.perf_counter() - started
+            result = {"runs": runs, "elapsed": elapsed, "apiPeak": api.peak_in_flight, "llmPeak": llm.peak_in_flight,
+                      "metrics": load_metrics(os.path.join(workdir, "metrics")),
+                      "sharedBudget": all(client.limiter is scheduler.limiter for client in scheduler.clients.values()),
+                      "workdir": workdir}
+            scheduler.close()
+            for runner in runners.values():
+                runner.close()
+        return result
+
+    print(f"📊 Scheduler benchmark ({n_sheets} sheets × {n_rows} rows, {requests_per_minute:,} req/min shared, 20 ms API, 50 ms LLM):")
+    burst = simulate(0, n_sheets)
+    staggered = simulate(interval, workers)
+    for name, result in (("all at once", burst), (f"staggered {interval:.0f}s, {workers} workers", staggered)):
+        print(f"   {name:<28} cycle {result['elapsed']:5.2f} s, peak API requests in flight {result['apiPeak']:>3}, peak LLM calls in flight {result['llmPeak']:>3}")
+
+    print(f"\n   Per-sheet stage times, staggered incremental cycle (across {n_sheets} sheets):")
+    print(f"   {'stage':<14} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for stage in STAGES:
+        values = [run[stage] for run in staggered["runs"] if run.get(stage) is not None]
+        print(f"   {stage:<14} {percentile(values, 50) * 1000:>8.0f} {percentile(values, 95) * 1000:>8.0f} {max(values) * 1000:>8.0f}")
+    tools.shutdown()
+
+    # Span totals across every sheet's run profiles (both staggered cycles)
+    profiles = []
+    for sheet_id in (snapshot["sheetId"] for snapshot in snapshots):
+        profile_dir = os.path.join(staggered["workdir"], sheet_id, "metrics", telemetry.PROFILE_DIR)
+        for name in os.listdir(profile_dir):
+            with open(os.path.join(profile_dir, name)) as f:
+                profiles.append(json.load(f))
+    span_totals = {}
+    for profile in profiles:
+        for key, total in profile["totals"].items():
+            name = key.split(" ", 1)[0]
+            entry = span_totals.setdefault(name, {"seconds": 0.0, "count": 0})
+            entry["seconds"] += total["seconds"]
+            entry["count"] += total["count"]
+            for counter in telemetry.COUNTERS:
+                entry[counter] = entry.get(counter, 0) + total.get(counter, 0)
+    print(f"\n   Span totals from {len(profiles)} run profiles:")
+    for name, total in sorted(span_totals.items(), key=lambda item: -item[1]["seconds"]):
+        extra = "".join(f", {total[key] / 1e6:.1f} MB {key[5:].lower()}" if key.startswith("bytes") else f", {total[key]:,} {key}"
+                        for key in telemetry.COUNTERS if total.get(key))
+        print(f"   {name:<18} {total['count']:>6}x {total['seconds']:>8.2f} s{extra}")
+
+    # Validation
+    errors = [run["error"] for result in (burst, staggered) for run in result["runs"] if run.get("error")]
+    recorded = staggered["metrics"].sheets
+    first = snapshots[0]["sheetId"]
+    offsets = [offset for offset, _ in stagger(snapshots, interval)]
+
+    print(f"\n📊 Validation:")
+    print(f"   Every sheet ran without errors: {'✅' if not errors else '❌ ' + errors[0]}")
+    print(f"   Incremental cycle changed every sheet: {sum(1 for run in staggered['runs'] if run.get('changes'))}/{n_sheets} {'✅' if all(run.get('changes') for run in staggered['runs']) else '❌'}")
+    print(f"   Offsets spread over the interval: {offsets[1]:.2f} s apart, last at {offsets[-1]:.1f} s {'✅' if offsets[-1] < interval else '❌'}")
+    print(f"   Worker pool bounds concurrency: {staggered['apiPeak']} ≤ {workers * 4} API requests in flight {'✅' if staggered['apiPeak'] <= workers * 4 else '❌'}")
+    print(f"   Staggering lowers peak LLM load: {burst['llmPeak']} → {staggered['llmPeak']} {'✅' if staggered['llmPeak'] < burst['llmPeak'] else '❌'}")
+    print(f"   Clients share one rate-limit budget: {'✅' if staggered['sharedBudget'] else '❌'}")
+    stages = {"smartsheets.fetch", "diff", "agent", "llm", "tool", "snapshot.write"}
+    print(f"   Run profiles: {len(profiles)} (expected: {2 * n_sheets}), covering {len(stages & set(span_totals))}/{len(stages)} stages "
+          f"{'✅' if len(profiles) == 2 * n_sheets and stages <= set(span_totals) else '❌ ' + str(sorted(span_totals))}")
+    served = sum(1 for profile in profiles if "tool change-detector" in profile["totals"])
+    print(f"   Diffs served by the tool server: {served}/{len(profiles)} runs {'✅' if served == len(profiles) else '❌'}")
+    prometheus_path = os.path.join(staggered["workdir"], "metrics", telemetry.PROMETHEUS_FILE)
+    with open(prometheus_path) as f:
+        exported = 'issue_monitor_span_seconds_count{span="agent",sheet="' in f.read()
+    print(f"   Prometheus file written with per-sheet agent spans: {'✅' if exported else '❌'}")
+    print(f"   Per-sheet metrics recorded: {len(recorded)} sheets, {first} {staggered['metrics'].summary(first)['agentSeconds']} "
+          f"{'✅' if len(recorded) == n_sheets and all(entry['runs'] == 2 for entry in recorded.values()) else '❌'}")
@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Streaming, paginated SmartSheets fetcher for Agent.DataFetcher
+Pulls pages concurrently over keep-alive connections under the 300 req/min quota
+and streams rows to disk as NDJSON instead of holding the whole sheet in memory.
+"""
+
+import http.client
+import json
+import os
+import random
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote, urlparse
+
+import telemetry
+from row_decoder import get_schema
+from snapshot_store import SnapshotStore, read_ndjson
+
+API_BASE = "https://api.smartsheet.com/2.0"
+SNAPSHOT_DIR = "data/snapshots"
+PAGE_SIZE = 100
+REQUESTS_PER_MINUTE = 300
+BURST = 10  # Back-to-back requests allowed; the refill rate is trimmed so burst + 60 s of refill fits the quota
+MAX_RETRIES = 5
+
+# Per-sheet high-water marks, stored alongside the snapshots
+FETCH_STATE_FILE = "fetch-state.json"
+FULL_RESYNC_HOURS = 24  # Full pulls catch deleted rows, which rowsModifiedSince never reports
+
+# Sheet column titles mapped to snapshot fields (see Snapshot Format in INTEGRATION_GUIDE.md)
+COLUMN_FIELDS = {
+    "Issue ID": "issueId",
+    "Title": "title",
+    "Status": "status",
+    "Assignee": "assignee",
+    "Priority": "priority",
+    "Created Date": "createdDate",
+    "Modified": "updatedDate",
+    "Modified By": "updatedBy"
+}
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursting up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def quota_bucket(requests_per_minute, burst=BURST):
+    """Token bucket that never lets more than `requests_per_minute` through in any 60 s window"""
+    capacity = max(1, min(burst, requests_per_minute // 2))
+    return TokenBucket((requests_per_minute - capacity) / 60, capacity)
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def shared_limiter(requests_per_minute=REQUESTS_PER_MINUTE):
+    """Process-wide bucket per quota, so tool calls and the scheduler draw from one budget"""
+    with _limiters_lock:
+        if requests_per_minute not in _limiters:
+            _limiters[requests_per_minute] = quota_bucket(requests_per_minute)
+        return _limiters[requests_per_minute]
+
+def retry_after_seconds(retry_after, attempt):
+    """Seconds to wait: Retry-After as delta-seconds or an HTTP date, else exponential backoff"""
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    return min(60, 2 ** attempt)
+
+class SmartSheetsError(Exception):
+    """Non-retryable SmartSheets API error"""
+
+    def __init__(self, status, body):
+        super().__init__(f"SmartSheets API returned {status}: {body[:200]}")
+        self.status = status
+
+class SmartSheetsClient:
+    """Rate-limited API client with one keep-alive connection per worker thread"""
+
+    def __init__(self, token=None, base_url=API_BASE, requests_per_minute=REQUESTS_PER_MINUTE, limiter=None):
+        url = urlparse(base_url)
+        self.scheme, self.host, self.prefix = url.scheme, url.netloc, url.path.rstrip("/")
+        self.headers = {"Accept": "application/json", "Connection": "keep-alive"}
+        token = token or os.environ.get("SMARTSHEET_API_TOKEN")
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+        # Clients share the process-wide bucket for their quota unless given their own limiter
+        self.limiter = limiter or shared_limiter(requests_per_minute)
+        self.local = threading.local()
+        self.connections = []
+        self.request_count = 0
+        self.retry_count = 0
+        self.bytes_received = 0
+        self.lock = threading.Lock()
+
+    def connection(self):
+        """Return this thread's pooled connection, opening it on first use"""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            conn = self.local.conn = conn_class(self.host, timeout=60)
+            with self.lock:
+                self.connections.append(conn)
+        return conn
+
+    def get(self, path):
+        """GET a JSON resource, backing off on 429 and 5xx responses"""
+        for attempt in range(MAX_RETRIES + 1):
+            self.limiter.acquire()
+            conn = self.connection()
+            try:
+                with telemetry.span("smartsheets.get") as attrs:
+                    conn.request("GET", self.prefix + path, headers=self.headers)
+                    response = conn.getresponse()
+                    body = response.read()
+                    attrs.update(bytesRead=len(body), status=response.status)
+            except (http.client.HTTPException, OSError):
+                # Server closed the keep-alive connection; reconnect and retry
+                conn.close()
+                self.local.conn = None
+                if attempt == MAX_RETRIES:
+                    raise
+                continue
+            finally:
+                with self.lock:
+                    self.request_count += 1
+
+            with self.lock:
+                self.bytes_received += len(body)
+            if response.status == 200:
+                return json.loads(body)
+            if response.status != 429 and response.status < 500:
+                raise SmartSheetsError(response.status, body.decode(errors="replace"))
+            if attempt == MAX_RETRIES:
+                raise SmartSheetsError(response.status, body.decode(errors="replace"))
+
+            # Exponential backoff with jitter, honouring Retry-After when present
+            delay = retry_after_seconds(response.getheader("Retry-After"), attempt)
+            with self.lock:
+                self.retry_count += 1
+            time.sleep(delay + random.uniform(0, 0.1))
+
+    def close(self):
+        for conn in self.connections:
+            conn.close()
+
+def snapshot_name(timestamp, extension="ndjson"):
+    """smartsheet-YYYY-MM-DD-HH-MM file name for a snapshot timestamp"""
+    return f"smartsheet-{timestamp:%Y-%m-%d-%H-%M}.{extension}"
+
+def fetch_sheet(sheet_id, client, output_path, page_size=PAGE_SIZE, workers=8):
+    """Fetch every page of a sheet and stream rows to output_path as NDJSON
+
+    The first line is a header with the snapshot metadata; each following line is one row.
+    Pages after the first are fetched concurrently and each worker writes its page as it lands.
+    """
+    start = time.perf_counter()
+    first = client.get(f"/sheets/{sheet_id}?page=1&pageSize={page_size}")
+    schema = get_schema(sheet_id, first.get("version"), first["columns"], COLUMN_FIELDS)
+    total_rows = first["totalRowCount"]
+    page_count = max(1, -(-total_rows // page_size))
+    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    rows_written = 0
+    with open(output_path, "w") as out:
+        header = {
+            "timestamp": timestamp,
+            "sheetId": str(first["id"]),
+            "sheetName": first["name"],
+            "version": first.get("version"),
+            "totalRows": total_rows,
+            "columnMetadata": schema.metadata
+        }
+        out.write(json.dumps(header) + "\n")
+
+        write_lock = threading.Lock()
+        high_water = [""]
+
+        def write_page(page):
+            to_snapshot = schema.to_snapshot
+            lines = "".join(json.dumps(to_snapshot(row)) + "\n" for row in page["rows"])
+            page_high = max((row.get("modifiedAt") or "" for row in page["rows"]), default="")
+            with write_lock:
+                out.write(lines)
+                high_water[0] = max(high_water[0], page_high)
+            return len(page["rows"])
+
+        run = telemetry.current_run()
+
+        def fetch_page(number):
+            # Each worker writes its own page so only in-flight pages are held in memory
+            with telemetry.attach(run):
+                return write_page(client.get(f"/sheets/{sheet_id}?page={number}&pageSize={page_size}"))
+
+        rows_written += write_page(first)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            rows_written += sum(pool.map(fetch_page, range(2, page_count + 1)))
+
+    return {
+        "path": output_path,
+        "sheetId": header["sheetId"],
+        "timestamp": timestamp,
+        "rows": rows_written,
+        "pages": page_count,
+        "highWaterMark": high_water[0] or None,
+        "requests": client.request_count,
+        "retries": client.retry_count,
+        "bytes": client.bytes_received,
+        "elapsedSeconds": round(time.perf_counter() - start, 3)
+    }
+
+def load_fetch_state(snapshot_dir):
+    """Load per-sheet fetch state ({sheetId: {highWaterMark, lastFullSync, snapshot}})"""
+    try:
+        with open(os.path.join(snapshot_dir, FETCH_STATE_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_fetch_state(snapshot_dir, state):
+    """Atomically replace the fetch state file"""
+    path = os.path.join(snapshot_dir, FETCH_STATE_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+def fetch_modified_rows(sheet_id, client, since, page_size=PAGE_SIZE):
+    """Fetch only rows modified since the high-water mark, paging until a short page"""
+    records = {}
+    high_water = since
+    page = 1
+    while True:
+        body = client.get(f"/sheets/{sheet_id}?rowsModifiedSince={quote(since)}&page={page}&pageSize={page_size}")
+        if page == 1:
+            sheet = body
+            schema = get_schema(sheet_id, body.get("version"), body["columns"], COLUMN_FIELDS)
+        for row in body["rows"]:
+            records[row["id"]] = schema.to_snapshot(row)
+            high_water = max(high_water, row.get("modifiedAt") or "")
+        if len(body["rows"]) < page_size:
+            return sheet, records, high_water
+        page += 1
+
+def merge_snapshot(previous_path, modified, output_path, header):
+    """Stream the previous NDJSON snapshot, replacing modified rows (keyed by rowId) and appending new ones
+
+    Rows go to a side file first so the header's totalRows can be the merged count.
+    """
+    modified = dict(modified)
+    rows_written = updated = 0
+    with open(previous_path) as previous, open(output_path + ".rows", "w") as out:
+        previous.readline()  # Previous header, superseded by `header`
+        for line in previous:
+            if not line.strip():
+                continue
+            record = modified.pop(json.loads(line)["rowId"], None)
+            if record is not None:
+                line = json.dumps(record) + "\n"
+                updated += 1
+            out.write(line)
+            rows_written += 1
+        for record in modified.values():
+            out.write(json.dumps(record) + "\n")
+            rows_written += 1
+    with open(output_path + ".rows") as rows, open(output_path + ".tmp", "w") as out:
+        out.write(json.dumps({**header, "totalRows": rows_written}) + "\n")
+        shutil.copyfileobj(rows, out, 1 << 20)
+    os.remove(output_path + ".rows")
+    os.replace(output_path + ".tmp", output_path)
+    return {"rows": rows_written, "updatedRows": updated, "newRows": len(modified)}
+
+def fetch_incremental(sheet_id, client, snapshot_dir=SNAPSHOT_DIR, full_resync_hours=FULL_RESYNC_HOURS,
+                      page_size=PAGE_SIZE, workers=8, now=None):
+    """Produce a new snapshot from rows modified since the sheet's high-water mark
+
+    Falls back to a full fetch when there is no previous snapshot or the last full
+    sync is older than full_resync_hours, so deleted rows eventually drop out.
+    """
+    now = now or datetime.now(timezone.utc)
+    state = load_fetch_state(snapshot_dir)
+    sheet_state = state.get(str(sheet_id))
+    output_path = os.path.join(snapshot_dir, snapshot_name(now))
+    previous_path = sheet_state and os.path.join(snapshot_dir, sheet_state["snapshot"])
+
+    full_sync_due = (
+        not sheet_state
+        or not sheet_state.get("highWaterMark")
+        or not os.path.exists(previous_path)
+        or now - datetime.fromisoformat(sheet_state["lastFullSync"]) >= timedelta(hours=full_resync_hours)
+    )
+
+    start = time.perf_counter()
+    requests_before, bytes_before = client.request_count, client.bytes_received
+    if full_sync_due:
+        result = fetch_sheet(sheet_id, client, output_path, page_size=page_size, workers=workers)
+        result["mode"] = "full"
+        sheet_state = {"lastFullSync": now.isoformat()}
+    else:
+        with open(previous_path) as f:
+            previous_header = json.loads(f.readline())
+        sheet, modified, high_water = fetch_modified_rows(sheet_id, client, sheet_state["highWaterMark"], page_size)
+        header = {
+            **previous_header,
+            "timestamp": now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "version": sheet.get("version")
+        }
+        merged = merge_snapshot(previous_path, modified, output_path, header)
+        result = {
+            "path": output_path,
+            "sheetId": str(sheet_id),
+            "timestamp": header["timestamp"],
+            "mode": "incremental",
+            "modifiedRows": len(modified),
+            **merged,
+            "highWaterMark": high_water
+        }
+
+    result["requests"] = client.request_count - requests_before
+    result["bytes"] = client.bytes_received - bytes_before
+    result["elapsedSeconds"] = round(time.perf_counter() - start, 3)
+    sheet_state["highWaterMark"] = result["highWaterMark"] or sheet_state.get("highWaterMark")
+    sheet_state["snapshot"] = os.path.basename(output_path)
+    state[str(sheet_id)] = sheet_state
+    save_fetch_state(snapshot_dir, state)
+    return result
+
+def handle_request(payload):
+    """Tool entry point: incrementally fetch a sheet and store it in data/snapshots"""
+    client = SmartSheetsClient(
+        token=payload.get("token"),
+        base_url=payload.get("baseUrl", API_BASE),
+        requests_per_minute=payload.get("requestsPerMinute", REQUESTS_PER_MINUTE)
+    )
+    try:
+        return fetch_and_store(
+            payload["sheetId"], client,
+            snapshot_dir=payload.get("snapshotDir", SNAPSHOT_DIR),
+            full_resync_hours=0 if payload.get("fullResync") else payload.get("fullResyncHours", FULL_RESYNC_HOURS),
+            page_size=payload.get("pageSize", PAGE_SIZE),
+            workers=payload.get("workers", 8)
+        )
+    finally:
+        client.close()
+
+def fetch_and_store(sheet_id, client, snapshot_dir=SNAPSHOT_DIR, now=None, **options):
+    """Incremental fetch, then import the snapshot into the columnar store and prune"""
+    with telemetry.span("smartsheets.fetch", sheet=str(sheet_id)) as attrs:
+        result = fetch_incremental(sheet_id, client, snapshot_dir, now=now, **options)
+        attrs.update(mode=result["mode"], rows=result["rows"], requests=result["requests"])
+    # The columnar store keeps history; only the newest NDJSON stays as the next merge base
+    store = SnapshotStore(snapshot_dir)
+    result["stored"] = os.path.basename(store.import_file(os.path.basename(result["path"]))["path"])
+    result["pruned"] = store.prune(now) + store.drop_working_copies(keep=os.path.basename(result["path"]))
+    return result
+
+if __name__ == "__main__":
+    import tempfile
+
+    from mock_smartsheets import MockSmartSheets
+    from synthetic import make_snapshot, mutate_snapshot
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    snapshot = make_snapshot(n_rows)
+    output_path = os.path.join(tempfile.mkdtemp(), snapshot_name(datetime.now(timezone.utc)))
+
+    print(f"📊 Fetch benchmark ({n_rows} rows, {PAGE_SIZE}-row pages, 20 ms mock latency):")
+    for workers in (1, 8, 16):
+        with MockSmartSheets(snapshot, latency=0.02) as mock:
+            client = SmartSheetsClient(base_url=mock.base_url, requests_per_minute=100_000)
+            result = fetch_sheet(snapshot["sheetId"], client, output_path, workers=workers)
+            client.close()
+        rows_per_sec = result["rows"] / result["elapsedSeconds"]
+        print(f"   {workers:>2} workers: {result['elapsedSeconds']:6.2f} s, {result['pages']} pages, "
+              f"{rows_per_sec:8.0f} rows/s, {len(client.connections)} connections, {result['bytes'] / 1e6:.1f} MB")
+
+    print(f"\n📊 Incremental benchmark ({n_rows} rows, 1% modified between runs):")
+    snapshot_dir = tempfile.mkdtemp()
+    current = mutate_snapshot(snapshot, change_rate=0.01, seed=1, timestamp="2025-01-14T12:00:00Z")
+    with MockSmartSheets(snapshot) as mock:
+        client = SmartSheetsClient(base_url=mock.base_url, requests_per_minute=100_000)
+        full = fetch_incremental(snapshot["sheetId"], client, snapshot_dir, now=datetime(2025, 1, 14, 6, tzinfo=timezone.utc))
+        mock.update(current)
+        delta = fetch_incremental(snapshot["sheetId"], client, snapshot_dir, now=datetime(2025, 1, 14, 12, tzinfo=timezone.utc))
+        merged = read_ndjson(delta["path"])
+        resync = fetch_incremental(snapshot["sheetId"], client, snapshot_dir, now=datetime(2025, 1, 15, 6, tzinfo=timezone.utc))
+        client.close()
+    for run in (full, delta):
+        print(f"   {run['mode']:>11}: {run['requests']:>4} requests, {run['bytes'] / 1e3:9.1f} KB, {run['elapsedSeconds']:.2f} s")
+    print(f"   Reduction: {full['requests'] / delta['requests']:.0f}x requests, {full['bytes'] / delta['bytes']:.0f}x bytes")
+
+    # Validation
+    current_rows = {row["issueId"]: row for row in current["rows"]}
+    merged_rows = {row["issueId"]: {k: v for k, v in row.items() if k != "rowId"} for row in merged["rows"]}
+    deleted_ids = {row["issueId"] for row in snapshot["rows"]} - set(current_rows)
+    merged_ok = all(merged_rows[issue_id] == row for issue_id, row in current_rows.items())
+    stale_ok = set(merged_rows) - set(current_rows) == deleted_ids
+    resync_rows = {row["issueId"] for row in read_ndjson(resync["path"])["rows"]}
+
+    with MockSmartSheets(make_snapshot(1_000), throttle_every=7) as mock:
+        client = SmartSheetsClient(base_url=mock.base_url)
+        result = fetch_sheet("12345678", client, output_path, workers=4)
+        client.close()
+    fetched = read_ndjson(output_path)
+    expected_ids = {row["issueId"] for row in make_snapshot(1_000)["rows"]}
+    fetched_ids = {row["issueId"] for row in fetched["rows"]}
+
+    limiter = TokenBucket(rate=50, capacity=5)
+    start = time.perf_counter()
+    for _ in range(15):
+        limiter.acquire()
+    limited_elapsed = time.perf_counter() - start
+
+    quota = quota_bucket(3_000)
+    start = time.perf_counter()
+    for _ in range(60):
+        quota.acquire()
+    quota_elapsed = time.perf_counter() - start
+    quota_minute = quota.capacity + quota.rate * 60
+
+    print(f"\n📊 Validation:")
+    print(f"   Incremental merge matches sheet: {'✅' if merged_ok else '❌'}")
+    print(f"   Deleted rows kept until resync: {len(deleted_ids)} {'✅' if stale_ok else '❌'}")
+    print(f"   Merged header totalRows: {merged['totalRows']} (rows: {len(merged['rows'])}) {'✅' if merged['totalRows'] == len(merged['rows']) else '❌'}")
+    print(f"   Full resync after 24h drops them: {resync['mode']} {'✅' if resync_rows == set(current_rows) else '❌'}")
+    print(f"   Rows streamed: {result['rows']} (expected: 1000) {'✅' if fetched_ids == expected_ids else '❌'}")
+    print(f"   429 retries: {result['retries']} {'✅' if result['retries'] > 0 else '❌'}")
+    print(f"   Token bucket (15 tokens, burst 5 @ 50/s): {limited_elapsed:.2f} s {'✅' if limited_elapsed >= 0.19 else '❌'}")
+    print(f"   Quota bucket (3,000/min): burst {quota.capacity}, {quota_minute:,.0f} per 60 s, 60 tokens in {quota_elapsed:.2f} s {'✅' if quota_minute <= 3_000 and quota_elapsed >= 0.9 else '❌'}")
+    print(f"   Tool calls share one limiter: {'✅' if SmartSheetsClient().limiter is shared_limiter() else '❌'}")
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Columnar, compressed snapshot store for data/snapshots
+Each snapshot is one .snap file of dictionary-encoded, zlib-compressed column segments,
+so a single column (Status, Assignee, ...) is read through mmap without parsing the rest.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from datetime import datetime, timedelta, timezone
+
+import telemetry
+
+SNAPSHOT_DIR = "data/snapshots"
+RETENTION_DAYS = 30
+NoneType = type(None)
+MAGIC = b"SSNAP1\n"
+FOOTER = struct.Struct("<Q")  # Footer length, stored in the last 8 bytes
+COMPRESSION_LEVEL = 6
+
+# Preferred format when one snapshot exists in several (e.g. NDJSON working copy + .snap)
+EXTENSIONS = (".snap", ".ndjson", ".json")
+
+def code_typecode(dictionary_size):
+    """Smallest unsigned array typecode that can index the dictionary"""
+    if dictionary_size <= 0xFF:
+        return "B"
+    if dictionary_size <= 0xFFFF:
+        return "H"
+    return "I"
+
+def encode_columns(rows):
+    """Dictionary-encode rows column by column: {column: (lookup, values, codes)}"""
+    columns = {}
+    for position, row in enumerate(rows):
+        for column in row:
+            if column not in columns:
+                # Code 0 is always None, so rows before a column first appears decode as missing
+                columns[column] = ({(NoneType, None): 0}, [None], array("I", [0] * position))
+        for column, (lookup, values, codes) in columns.items():
+            value = row.get(column)
+            # Keyed by type too: 1, 1.0 and True are equal dict keys, and a list must not match its JSON string
+            key = (value.__class__, json.dumps(value) if isinstance(value, (dict, list)) else value)
+            code = lookup.get(key)
+            if code is None:
+                code = lookup[key] = len(values)
+                values.append(value)
+            codes.append(code)
+    return columns
+
+def write_snapshot(path, header, rows):
+    """Write rows (any iterable of dicts) and header metadata as a columnar .snap file"""
+    start = time.perf_counter()
+    columns = encode_columns(rows)
+    row_count = len(next(iter(columns.values()))[2]) if columns else 0
+    footer = {"header": header, "rowCount": row_count, "columns": {}}
+
+    with open(path + ".tmp", "wb") as out:
+        out.write(MAGIC)
+        offset = len(MAGIC)
+        for column, (_, values, codes) in columns.items():
+            typecode = code_typecode(len(values))
+            packed = array(typecode, codes)
+            if sys.byteorder != "little":
+                packed.byteswap()
+            segments = {
+                "dictionary": zlib.compress(json.dumps(values).encode(), COMPRESSION_LEVEL),
+                "codes": zlib.compress(packed.tobytes(), COMPRESSION_LEVEL)
+            }
+            entry = {"typecode": typecode}
+            for segment, data in segments.items():
+                out.write(data)
+                entry[segment] = [offset, len(data)]
+                offset += len(data)
+            footer["columns"][column] = entry
+        footer_bytes = json.dumps(footer).encode()
+        out.write(footer_bytes)
+        out.write(FOOTER.pack(len(footer_bytes)))
+    os.replace(path + ".tmp", path)
+    size = offset + len(footer_bytes) + FOOTER.size
+    telemetry.record("snapshot.write", time.perf_counter() - start, attrs={"bytesWritten": size, "rows": row_count})
+    return {"path": path, "rows": row_count, "columns": len(columns), "bytes": size}
+
+class SnapshotReader:
+    """Memory-mapped reader for a single .snap file; use as a context manager"""
+
+    def __init__(self, path):
+        self.opened = time.perf_counter()
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Not a snapshot store file: {path}")
+        (footer_length,) = FOOTER.unpack_from(self.map, len(self.map) - FOOTER.size)
+        footer_start = len(self.map) - FOOTER.size - footer_length
+        footer = json.loads(self.map[footer_start:footer_start + footer_length])
+        # Compressed bytes actually touched through the mmap, reported as one span on close
+        self.bytes_read = len(MAGIC) + footer_length + FOOTER.size
+        self.header = footer["header"]
+        self.row_count = footer["rowCount"]
+        self.columns = footer["columns"]
+
+    def segment(self, column, name):
+        offset, length = self.columns[column][name]
+        self.bytes_read += length
+        return zlib.decompress(self.map[offset:offset + length])
+
+    def dictionary(self, column):
+        """Distinct values of a column, indexed by code"""
+        return json.loads(self.segment(column, "dictionary"))
+
+    def codes(self, column):
+        """Per-row dictionary codes of a column"""
+        codes = array(self.columns[column]["typecode"])
+        codes.frombytes(self.segment(column, "codes"))
+        if sys.byteorder != "little":
+            codes.byteswap()
+        return codes
+
+    def column(self, column):
+        """Decoded values of one column, in row order"""
+        if column not in self.columns:
+            return [None] * self.row_count
+        values = self.dictionary(column)
+        return [values[code] for code in self.codes(column)]
+
+    def value_counts(self, column):
+        """Count rows per distinct value straight from the codes; {} for a column the snapshot lacks"""
+        if column not in self.columns:
+            return {}
+        values = self.dictionary(column)
+        counts = [0] * len(values)
+        for code in self.codes(column):
+            counts[code] += 1
+        return {str(values[code]): count for code, count in enumerate(counts) if count}
+
+    def rows(self, columns=None):
+        """Reassemble rows, optionally projecting to a subset of columns"""
+        names = [c for c in (columns or self.columns) if c in self.columns]
+        decoded = [self.column(name) for name in names]
+        return [
+            {name: value for name, value in zip(names, values) if value is not None}
+            for values in zip(*decoded)
+        ] if names else [{} for _ in range(self.row_count)]
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+        telemetry.record("snapshot.read", time.perf_counter() - self.opened, labels={"format": "snap"},
+                         attrs={"bytesRead": getattr(self, "bytes_read", 0)})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def snapshot_time(name):
+    """Parse the timestamp from a smartsheet-YYYY-MM-DD-HH-MM.* file name"""
+    stem = name.split(".", 1)[0]
+    return datetime.strptime(stem[len("smartsheet-"):], "%Y-%m-%d-%H-%M").replace(tzinfo=timezone.utc)
+
+def list_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    """Snapshot file names oldest first, one per timestamp, preferring the columnar copy"""
+    best = {}
+    for name in os.listdir(snapshot_dir):
+        if not name.startswith("smartsheet-") or not name.endswith(EXTENSIONS):
+            continue
+        stem, extension = name.split(".", 1)
+        rank = EXTENSIONS.index("." + extension)
+        if stem not in best or rank < best[stem][0]:
+            best[stem] = (rank, name)
+    return [best[stem][1] for stem in sorted(best)]
+
+def read_ndjson(path):
+    """Load an NDJSON snapshot (header line, then one row per line)"""
+    with telemetry.span("snapshot.read", format="ndjson") as attrs:
+        with open(path) as f:
+            snapshot = json.loads(f.readline())
+            snapshot["rows"] = [json.loads(line) for line in f if line.strip()]
+        attrs["bytesRead"] = os.path.getsize(path)
+    return snapshot
+
+def load_snapshot(snapshot_dir, name):
+    """Load any stored snapshot format into the data/snapshots JSON shape"""
+    path = os.path.join(snapshot_dir, name)
+    if name.endswith(".snap"):
+        with SnapshotReader(path) as reader:
+            return {**reader.header, "rows": reader.rows()}
+    if name.endswith(".ndjson"):
+        return read_ndjson(path)
+    with open(path) as f:
+        return json.load(f)
+
+class SnapshotStore:
+    """Columnar snapshot directory with automatic retention pruning"""
+
+    def __init__(self, snapshot_dir=SNAPSHOT_DIR, retention_days=RETENTION_DAYS):
+        self.snapshot_dir = snapshot_dir
+        self.retention_days = retention_days
+        os.makedirs(snapshot_dir, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.snapshot_dir, name)
+
+    def write(self, snapshot, name=None, now=None):
+        """Store a snapshot dict, then prune; the name defaults to its timestamp"""
+        if name is None:
+            timestamp = datetime.strptime(snapshot["timestamp"], "%Y-%m-%dT%H:%M:%SZ")
+            name = f"smartsheet-{timestamp:%Y-%m-%d-%H-%M}.snap"
+        header = {key: value for key, value in snapshot.items() if key != "rows"}
+        result = write_snapshot(self.path(name), header, snapshot.get("rows", []))
+        result["pruned"] = self.prune(now)
+        return result
+
+    def import_file(self, name, remove=False):
+        """Convert a JSON or NDJSON snapshot in place to .snap"""
+        stem = name.split(".", 1)[0]
+        if name.endswith(".ndjson"):
+            # Stream rows so the NDJSON file is never fully materialized
+            with open(self.path(name)) as f:
+                header = json.loads(f.readline())
+                result = write_snapshot(self.path(stem + ".snap"), header, (json.loads(line) for line in f if line.strip()))
+        else:
+            snapshot = load_snapshot(self.snapshot_dir, name)
+            header = {key: value for key, value in snapshot.items() if key != "rows"}
+            result = write_snapshot(self.path(stem + ".snap"), header, snapshot["rows"])
+        if remove:
+            os.remove(self.path(name))
+        return result
+
+    def migrate(self, remove=False):
+        """Convert every legacy .json/.ndjson snapshot that has no .snap copy yet"""
+        existing = {name.split(".", 1)[0] for name in os.listdir(self.snapshot_dir) if name.endswith(".snap")}
+        results = []
+        for name in sorted(os.listdir(self.snapshot_dir)):
+            if name.startswith("smartsheet-") and name.endswith((".json", ".ndjson")) and name.split(".", 1)[0] not in existing:
+                results.append({"source": name, **self.import_file(name, remove=remove)})
+        return results
+
+    def drop_working_copies(self, keep=None):
+        """Delete NDJSON snapshots that already have a .snap copy, except `keep`"""
+        names = os.listdir(self.snapshot_dir)
+        stored = {name.split(".", 1)[0] for name in names if name.endswith(".snap")}
+        removed = sorted(name for name in names
+                         if name.endswith(".ndjson") and name != keep and name.split(".", 1)[0] in stored)
+        for name in removed:
+            os.remove(self.path(name))
+        return removed
+
+    def list(self):
+        return list_snapshots(self.snapshot_dir)
+
+    def read(self, name, columns=None):
+        """Read a snapshot, optionally projecting to a subset of columns"""
+        if not name.endswith(".snap"):
+            return load_snapshot(self.snapshot_dir, name)
+        with SnapshotReader(self.path(name)) as reader:
+            return {**reader.header, "rows": reader.rows(columns)}
+
+    def read_column(self, name, column):
+        """Read one column of one snapshot without decoding the others"""
+        with SnapshotReader(self.path(name)) as reader:
+            return reader.column(column)
+
+    def value_counts(self, name, column):
+        with SnapshotReader(self.path(name)) as reader:
+            return reader.value_counts(column)
+
+    def prune(self, now=None):
+        """Delete snapshots older than the retention window; returns removed names"""
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=self.retention_days)
+        removed = []
+        for name in os.listdir(self.snapshot_dir):
+            if name.startswith("smartsheet-") and name.endswith(EXTENSIONS) and snapshot_time(name) < cutoff:
+                os.remove(self.path(name))
+                removed.append(name)
+        return sorted(removed)
+
+def handle_request(payload):
+    """Tool entry point: list, read, column, write or migrate snapshots"""
+    store = SnapshotStore(payload.get("snapshotDir", SNAPSHOT_DIR))
+    action = payload.get("action", "list")
+    names = store.list()
+    name = payload.get("snapshot") or (names[-1] if names else None)
+
+    if action == "list":
+        return {"snapshots": names}
+    if action == "write":
+        return store.write(payload["content"])
+    if action == "migrate":
+        return {"migrated": store.migrate(remove=payload.get("remove", False))}
+    if name is None:
+        return {"error": "No snapshots stored yet"}
+    if action == "column":
+        if not payload.get("column"):
+            return {"error": "action=column needs a column name, e.g. \"status\"", "snapshot": name}
+        # Value counts keep the tool result small; pass values=true for the raw column
+        if payload.get("values"):
+            return {"snapshot": name, "column": payload["column"], "values": store.read_column(name, payload["column"])}
+        return {"snapshot": name, "column": payload["column"], "counts": store.value_counts(name, payload["column"])}
+    if action == "read":
+        return store.read(name, payload.get("columns"))
+    return {"error": f"Unknown action: {action}"}
+
+if __name__ == "__main__":
+    import tempfile
+
+    if sys.argv[1:2] == ["migrate"]:
+        snapshot_dir = sys.argv[2] if len(sys.argv) > 2 else SNAPSHOT_DIR
+        results = SnapshotStore(snapshot_dir).migrate(remove="--remove" in sys.argv)
+        for result in results:
+            print(f"✅ {result['source']} → {os.path.basename(result['path'])} ({result['rows']} rows, {result['bytes'] / 1024:.0f} KB)")
+        print(f"✅ Migrated {len(results)} snapshots in {snapshot_dir}")
+        sys.exit(0)
+
+    from synthetic import make_snapshot
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    workdir = tempfile.mkdtemp()
+
+    print(f"📊 Snapshot store benchmark (pretty JSON vs columnar .snap):")
+    for n_rows in sizes:
+        snapshot = make_snapshot(n_rows)
+        json_path = os.path.join(workdir, "smartsheet-2025-01-14-06-00.json")
+        store = SnapshotStore(workdir, retention_days=365_000)
+
+        start = time.perf_counter()
+        with open(json_path, "w") as f:
+            json.dump(snapshot, f, indent=2)
+        json_write = time.perf_counter() - start
+        start = time.perf_counter()
+        result = store.write(snapshot)
+        snap_write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with open(json_path) as f:
+            statuses = [row["status"] for row in json.load(f)["rows"]]
+        json_column = time.perf_counter() - start
+        start = time.perf_counter()
+        snap_statuses = store.read_column(os.path.basename(result["path"]), "status")
+        snap_column = time.perf_counter() - start
+        start = time.perf_counter()
+        store.read(os.path.basename(result["path"]))
+        snap_full = time.perf_counter() - start
+
+        json_kb = os.path.getsize(json_path) / 1024
+        print(f"   {n_rows:>7} rows: size {json_kb:8.0f} KB → {result['bytes'] / 1024:6.0f} KB ({json_kb * 1024 / result['bytes']:.0f}x), "
+              f"write {json_write * 1000:6.0f} → {snap_write * 1000:5.0f} ms, "
+              f"Status column {json_column * 1000:6.0f} → {snap_column * 1000:5.1f} ms, full read {snap_full * 1000:5.0f} ms")
+        os.remove(json_path)
+
+    # Validation
+    snapshot = make_snapshot(500)
+    snapshot["rows"][3]["labels"] = ["ui", "p1"]  # Column present on one row only
+    store = SnapshotStore(tempfile.mkdtemp())
+    name = os.path.basename(store.write(snapshot, now=datetime(2025, 1, 14, 12, tzinfo=timezone.utc))["path"])
+    roundtrip_ok = store.read(name) == snapshot
+    counts_ok = store.value_counts(name, "status") == {
+        status: sum(1 for row in snapshot["rows"] if row["status"] == status) for status in {row["status"] for row in snapshot["rows"]}
+    }
+
+    with open(store.path("smartsheet-2025-01-13-06-00.json"), "w") as f:
+        json.dump(snapshot, f, indent=2)
+    migrated = store.migrate(remove=True)
+    migrate_ok = store.list() == ["smartsheet-2025-01-13-06-00.snap", name]
+
+    pruned = store.prune(now=datetime(2025, 2, 13, tzinfo=timezone.utc))
+
+    print(f"\n📊 Validation:")
+    print(f"   Round trip (incl. sparse column): {'✅' if roundtrip_ok else '❌'}")
+    print(f"   Status value counts from codes: {'✅' if counts_ok else '❌'}")
+    print(f"   Migration: {len(migrated)} JSON snapshot {'✅' if migrate_ok else '❌'}")
+    print(f"   Retention (30 days): pruned {len(pruned)} {'✅' if pruned == ['smartsheet-2025-01-13-06-00.snap'] else '❌'}")
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Incremental status-transition aggregates for Agent.StatusTransitionTracker
+Maintains a transition-count matrix, time-in-status histograms and a stuck-issue index,
+updated from each change set instead of recomputed from history.
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from event_log import METRICS_DIR
+
+STATE_FILE = "status-metrics.json"
+STATUS_ORDER = ["New", "In Progress", "Blocked", "Resolved", "Closed"]
+CLOSED_STATUSES = {"Resolved", "Closed"}
+STUCK_DAYS = 7
+# Time-in-status histogram bucket upper bounds, in days
+BUCKETS = [1, 3, 7, 14, 30]
+BUCKET_LABELS = ["<1d", "1-3d", "3-7d", "7-14d", "14-30d", ">30d"]
+DAY = 86_400
+
+def parse_time(timestamp):
+    """Epoch seconds from an ISO timestamp or date"""
+    if len(timestamp) == 10:
+        timestamp += "T00:00:00"
+    return int(datetime.fromisoformat(timestamp[:19]).replace(tzinfo=timezone.utc).timestamp())
+
+def bucket(seconds):
+    days = seconds / DAY
+    for position, bound in enumerate(BUCKETS):
+        if days < bound:
+            return position
+    return len(BUCKETS)
+
+class StatusMetrics:
+    """Transition matrix, time-in-status histograms and current status per issue"""
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.transitions = state.get("transitions", {})
+        self.histograms = state.get("histograms", {})
+        self.durations = state.get("durations", {})   # status -> [total seconds, count]
+        self.current = state.get("current", {})       # issueId -> [status, since epoch]
+        self.last_timestamp = state.get("lastTimestamp")
+
+    def to_state(self):
+        return {
+            "transitions": self.transitions,
+            "histograms": self.histograms,
+            "durations": self.durations,
+            "current": self.current,
+            "lastTimestamp": self.last_timestamp
+        }
+
+    def seed(self, snapshot):
+        """Start tracking every issue in a snapshot at its current status"""
+        for row in snapshot.get("rows", []):
+            since = row.get("updatedDate") or row.get("createdDate") or snapshot["timestamp"]
+            self.current[row["issueId"]] = [row.get("status"), parse_time(since)]
+        self.last_timestamp = snapshot.get("timestamp")
+
+    def leave(self, issue_id, status, at):
+        """Close out the time an issue spent in `status`"""
+        entry = self.current.get(issue_id)
+        if entry is None or entry[0] != status:
+            return
+        seconds = max(0, at - entry[1])
+        histogram = self.histograms.setdefault(status, [0] * len(BUCKET_LABELS))
+        histogram[bucket(seconds)] += 1
+        total = self.durations.setdefault(status, [0, 0])
+        total[0] += seconds
+        total[1] += 1
+
+    def transition(self, issue_id, from_status, to_status, at):
+        row = self.transitions.setdefault(str(from_status), {})
+        row[str(to_status)] = row.get(str(to_status), 0) + 1
+        self.leave(issue_id, from_status, at)
+        self.current[issue_id] = [to_status, at]
+
+    def apply(self, delta):
+        """Fold one change_detector result into the aggregates; replays are skipped"""
+        at_default = delta.get("currentTimestamp")
+        if self.last_timestamp and at_default and at_default <= self.last_timestamp:
+            return False
+        changes = delta["changes"]
+        for item in changes["new"]:
+            since = item.get("createdDate") or at_default
+            self.current[item["issueId"]] = [item.get("status"), parse_time(since)]
+        for item in changes["status"]:
+            at = parse_time(item.get("updatedDate") or at_default)
+            self.transition(item["issueId"], item["from"], item["to"], at)
+        for item in changes["deleted"]:
+            self.current.pop(item["issueId"], None)
+        self.last_timestamp = at_default
+        return True
+
+    def stuck(self, now, days=STUCK_DAYS):
+        """Open issues whose current status is older than `days`, longest first"""
+        cutoff = now - days * DAY
+        stuck = [
+            (since, issue_id, status) for issue_id, (status, since) in self.current.items()
+            if since < cutoff and status not in CLOSED_STATUSES
+        ]
+        stuck.sort()
+        return [{"issueId": issue_id, "status": status, "days": round((now - since) / DAY, 1)}
+                for since, issue_id, status in stuck]
+
+    def summary(self, now, top_n=10):
+        """Compact result for the agent"""
+        backward = sum(
+            count for from_status, row in self.transitions.items() for to_status, count in row.items()
+            if from_status in STATUS_ORDER and to_status in STATUS_ORDER
+            and STATUS_ORDER.index(to_status) < STATUS_ORDER.index(from_status)
+        )
+        reopened = sum(count for from_status in CLOSED_STATUSES
+                       for to_status, count in self.transitions.get(from_status, {}).items()
+                       if to_status not in CLOSED_STATUSES)
+        by_status = {}
+        for status, _ in self.current.values():
+            by_status[str(status)] = by_status.get(str(status), 0) + 1
+        stuck = self.stuck(now)
+        return {
+            "asOf": datetime.fromtimestamp(now, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "transitions": self.transitions,
+            "totalTransitions": sum(sum(row.values()) for row in self.transitions.values()),
+            "backwardTransitions": backward,
+            "reopened": reopened,
+            "avgDaysInStatus": {status: round(total / count / DAY, 2) for status, (total, count) in self.durations.items() if count},
+            "timeInStatusHistogram": {status: dict(zip(BUCKET_LABELS, counts)) for status, counts in self.histograms.items()},
+            "issuesByStatus": by_status,
+            "stuckCount": len(stuck),
+            "stuck": stuck[:top_n]
+        }
+
+def load(metrics_dir=METRICS_DIR):
+    try:
+        with open(os.path.join(metrics_dir, STATE_FILE)) as f:
+            return StatusMetrics(json.load(f))
+    except FileNotFoundError:
+        return StatusMetrics()
+
+def save(metrics, metrics_dir=METRICS_DIR):
+    os.makedirs(metrics_dir, exist_ok=True)
+    path = os.path.join(metrics_dir, STATE_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(metrics.to_state(), f)
+    os.replace(path + ".tmp", path)
+
+def record(delta, previous, metrics_dir=METRICS_DIR):
+    """Update persisted aggregates from a change set, seeding from `previous` on first use"""
+    metrics = load(metrics_dir)
+    if metrics.last_timestamp is None:
+        metrics.seed(previous)
+    applied = metrics.apply(delta)
+    if applied:
+        save(metrics, metrics_dir)
+    return {"applied": applied, "lastTimestamp": metrics.last_timestamp}
+
+def recompute(snapshots):
+    """Full recomputation straight from a snapshot sequence (reference for validation)"""
+    metrics = StatusMetrics()
+    metrics.seed(snapshots[0])
+    statuses = {row["issueId"]: row.get("status") for row in snapshots[0]["rows"]}
+    for snapshot in snapshots[1:]:
+        seen = set()
+        for row in snapshot["rows"]:
+            issue_id, status = row["issueId"], row.get("status")
+            seen.add(issue_id)
+            if issue_id not in statuses:
+                metrics.current[issue_id] = [status, parse_time(row.get("createdDate") or snapshot["timestamp"])]
+            elif statuses[issue_id] != status:
+                metrics.transition(issue_id, statuses[issue_id], status, parse_time(row.get("updatedDate") or snapshot["timestamp"]))
+            statuses[issue_id] = status
+        for issue_id in set(statuses) - seen:
+            del statuses[issue_id]
+            metrics.current.pop(issue_id, None)
+        metrics.last_timestamp = snapshot["timestamp"]
+    return metrics
+
+def handle_request(payload):
+    """Tool entry point: transition matrix, time in status and stuck issues"""
+    now = parse_time(payload["now"]) if payload.get("now") else int(time.time())
+    return load(payload.get("metricsDir", METRICS_DIR)).summary(now, payload.get("topN") or 10)
+
+if __name__ == "__main__":
+    from change_detector import diff_snapshots
+    from synthetic import make_snapshot, mutate_snapshot
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    n_runs = 28  # one week at 4 runs per day
+
+    snapshots = [make_snapshot(n_rows, timestamp="2025-01-01T00:00:00Z")]
+    for run in range(1, n_runs + 1):
+        hours = run * 6
+        timestamp = f"2025-01-{1 + hours // 24:02d}T{hours % 24:02d}:00:00Z"
+        snapshots.append(mutate_snapshot(snapshots[-1], change_rate=0.03, seed=run, timestamp=timestamp))
+    deltas = [diff_snapshots(a, b) for a, b in zip(snapshots, snapshots[1:])]
+
+    incremental = StatusMetrics()
+    incremental.seed(snapshots[0])
+    start = time.perf_counter()
+    for delta in deltas:
+        incremental.apply(delta)
+    incremental_ms = (time.perf_counter() - start) / len(deltas) * 1000
+
+    start = time.perf_counter()
+    full = recompute(snapshots)
+    full_ms = (time.perf_counter() - start) * 1000
+
+    now = parse_time(snapshots[-1]["timestamp"])
+    summary = incremental.summary(now)
+    print(f"📊 Status metrics benchmark ({n_rows} rows, {n_runs} runs):")
+    print(f"   Incremental update: {incremental_ms:8.2f} ms per change set")
+    print(f"   Full recomputation: {full_ms:8.1f} ms over {len(snapshots)} snapshots")
+    print(f"   Summary: {summary['totalTransitions']} transitions, {summary['stuckCount']} stuck, {len(json.dumps(summary)) / 1024:.1f} KB")
+
+    # Validation
+    replayed = StatusMetrics(json.loads(json.dumps(incremental.to_state())))
+    replay_skipped = not replayed.apply(deltas[-1])
+
+    print(f"\n📊 Validation:")
+    print(f"   Transition matrix matches full recompute: {'✅' if incremental.transitions == full.transitions else '❌'}")
+    print(f"   Time-in-status histograms match: {'✅' if incremental.histograms == full.histograms and incremental.durations == full.durations else '❌'}")
+    print(f"   Stuck-issue index matches: {'✅' if incremental.stuck(now) == full.stuck(now) else '❌'}")
+    print(f"   Replayed change set skipped: {'✅' if replay_skipped else '❌'}")
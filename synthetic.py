@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Synthetic SmartSheets snapshots for benchmarks
+Produces snapshots in the data/snapshots format documented in INTEGRATION_GUIDE.md.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+STATUSES = ["New", "In Progress", "Blocked", "Resolved", "Closed"]
+PRIORITIES = ["High", "Medium", "Low"]
+PEOPLE = [f"user{i}@example.com" for i in range(40)]
+
+def make_row(index, rng, base_time):
+    """Create a single synthetic issue row"""
+    created = base_time - timedelta(days=rng.randint(1, 60))
+    age_hours = int((base_time - created).total_seconds() // 3600)
+    updated = created + timedelta(hours=rng.randint(0, min(age_hours - 1, 24 * 30)))
+    return {
+        "issueId": f"ISS{index:06d}",
+        "title": f"Issue {index} - {rng.choice(['login', 'export', 'sync', 'billing', 'search'])} problem",
+        "status": rng.choice(STATUSES),
+        "assignee": rng.choice(PEOPLE),
+        "priority": rng.choice(PRIORITIES),
+        "createdDate": created.strftime("%Y-%m-%d"),
+        "updatedDate": updated.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "updatedBy": rng.choice(PEOPLE)
+    }
+
+def make_snapshot(n_rows, seed=0, timestamp="2025-01-14T06:00:00Z"):
+    """Create a synthetic snapshot with n_rows issues"""
+    rng = random.Random(seed)
+    base_time = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%SZ")
+    return {
+        "timestamp": timestamp,
+        "sheetId": "12345678",
+        "sheetName": "Issue Tracker",
+        "totalRows": n_rows,
+        "rows": [make_row(i, rng, base_time) for i in range(n_rows)],
+        "columnMetadata": {
+            "status": STATUSES,
+            "priority": PRIORITIES
+        }
+    }
+
+def mutate_snapshot(snapshot, change_rate=0.05, seed=1, timestamp=None):
+    """Return a copy of snapshot with a fraction of rows changed, added and deleted"""
+    rng = random.Random(seed)
+    timestamp = timestamp or snapshot["timestamp"]
+    base_time = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%SZ")
+    rows = []
+    for row in snapshot["rows"]:
+        roll = rng.random()
+        if roll < change_rate * 0.1:
+            continue  # deleted
+        if roll < change_rate:
+            row = dict(row)
+            field = rng.choice(["status", "assignee", "priority", "title"])
+            if field == "status":
+                row["status"] = rng.choice([s for s in STATUSES if s != row["status"]])
+            elif field == "assignee":
+                row["assignee"] = rng.choice([p for p in PEOPLE if p != row["assignee"]])
+            elif field == "priority":
+                row["priority"] = rng.choice([p for p in PRIORITIES if p != row["priority"]])
+            else:
+                row["title"] = row["title"] + " (updated)"
+            row["updatedDate"] = timestamp
+            row["updatedBy"] = rng.choice(PEOPLE)
+        rows.append(row)
+
+    # New issues continue the ID sequence
+    next_index = max((int(r["issueId"][3:]) for r in snapshot["rows"]), default=-1) + 1
+    for i in range(max(1, int(len(snapshot["rows"]) * change_rate * 0.1))):
+        row = make_row(next_index + i, rng, base_time)
+        row["updatedDate"] = timestamp
+        rows.append(row)
+
+    return {
+        **snapshot,
+        "timestamp": timestamp,
+        "totalRows": len(rows),
+        "rows": rows
+    }
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Tracing and metrics for the hot paths: SmartSheets fetches, snapshot file I/O, diff and analytics
+tools, and agent LLM calls
+Every span is timed into a per-name histogram with byte and token counters, exported as Prometheus
+text (a textfile-collector file, or GET /metrics on the tool server). Spans opened inside run() are
+also kept for that run and written as a JSON profile under data/metrics/profiles.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, suppress
+from itertools import accumulate
+
+METRICS_DIR = "data/metrics"
+PROFILE_DIR = "profiles"
+PROMETHEUS_FILE = "issue-monitor.prom"
+MAX_PROFILES = 200          # newest per-run profiles kept per metrics directory
+MAX_RUN_SPANS = 10_000      # spans kept per run profile; metrics still count the rest
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+# Span attributes that are also exported as counters
+COUNTERS = {
+    "bytesRead": ("issue_monitor_bytes_read_total", "Bytes read (HTTP bodies, snapshot segments, files)"),
+    "bytesWritten": ("issue_monitor_bytes_written_total", "Bytes written (HTTP bodies, snapshot files)"),
+    "promptTokens": ("issue_monitor_prompt_tokens_total", "LLM prompt tokens"),
+    "completionTokens": ("issue_monitor_completion_tokens_total", "LLM completion tokens")
+}
+
+def label_text(labels):
+    """{key="value",...} with Prometheus escaping"""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+class Telemetry:
+    """Span histograms and counters for the process, plus the spans of each open run"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}   # (span name, labels) -> [per-bucket counts..., count, sum]
+        self.counters = {}     # (counter name, span name, labels) -> total
+        self.runs = {}         # run id -> span dicts
+        self.label_keys = {}   # label items as passed -> sorted metric labels, one per series
+        self.local = threading.local()
+
+    def current_run(self):
+        return getattr(self.local, "run", None)
+
+    def record(self, name, seconds, run=None, labels=None, attrs=None):
+        """Add one finished span; `labels` become metric labels, `attrs` only go to the run profile"""
+        items = tuple(labels.items()) if labels else ()
+        attrs = attrs or {}
+        run = run or self.current_run()
+        bucket = bisect_left(BUCKETS, seconds)   # first bound >= seconds; len(BUCKETS) is +Inf only
+        with self.lock:
+            labels = self.label_keys.get(items)
+            if labels is None:
+                labels = self.label_keys[items] = tuple(sorted((key, str(value)) for key, value in items if value is not None))
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[(name, labels)] = [0] * (len(BUCKETS) + 2)
+            if bucket < len(BUCKETS):
+                histogram[bucket] += 1
+            histogram[-2] += 1
+            histogram[-1] += seconds
+            for key, value in attrs.items():
+                if value and key in COUNTERS:
+                    self.counters[(key, name, labels)] = self.counters.get((key, name, labels), 0) + value
+            spans = self.runs.get(run)
+            if spans is not None and len(spans) < MAX_RUN_SPANS:
+                spans.append({"name": name, **dict(labels), "seconds": round(seconds, 6), "end": time.time(), **attrs})
+
+    @contextmanager
+    def span(self, name, run=None, **labels):
+        """Time a block; the yielded dict takes attributes such as bytesRead or promptTokens"""
+        attrs = {}
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except Exception as error:
+            attrs["error"] = type(error).__name__
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, run, labels, attrs)
+
+    @contextmanager
+    def run(self, run_id, metrics_dir=METRICS_DIR, **meta):
+        """Collect this thread's spans (and spans passed run=run_id) into one JSON profile"""
+        with self.lock:
+            self.runs[run_id] = []
+        previous = self.current_run()
+        self.local.run = run_id
+        began, start = time.time(), time.perf_counter()
+        try:
+            yield run_id
+        finally:
+            self.local.run = previous
+            seconds = time.perf_counter() - start
+            with self.lock:
+                spans = self.runs.pop(run_id)
+            if metrics_dir is not None:
+                write_profile(profile(run_id, spans, seconds, began, meta), metrics_dir)
+
+    @contextmanager
+    def attach(self, run_id):
+        """Attribute this thread's spans to a run opened elsewhere (e.g. a tool call made during it)"""
+        previous = self.current_run()
+        self.local.run = run_id or previous
+        try:
+            yield
+        finally:
+            self.local.run = previous
+
+    def prometheus(self):
+        """Prometheus text exposition of every span histogram and counter"""
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        lines = ["# HELP issue_monitor_span_seconds Time spent in instrumented spans",
+                 "# TYPE issue_monitor_span_seconds histogram"]
+        for (name, labels), values in histograms:
+            labels = (("span", name),) + labels
+            cumulative = list(accumulate(values[:len(BUCKETS)])) + [values[-2]]   # Prometheus buckets are cumulative
+            for bound, count in zip(BUCKETS + ("+Inf",), cumulative):
+                lines.append(f"issue_monitor_span_seconds_bucket{label_text(labels + (('le', bound),))} {count}")
+            lines.append(f"issue_monitor_span_seconds_sum{label_text(labels)} {values[-1]:.6f}")
+            lines.append(f"issue_monitor_span_seconds_count{label_text(labels)} {values[-2]}")
+        for key, (metric, help_text) in COUNTERS.items():
+            rows = [(name, labels, total) for (counter, name, labels), total in counters if counter == key]
+            if rows:
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                lines += [f"{metric}{label_text((('span', name),) + labels)} {total}" for name, labels, total in rows]
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+def profile(run_id, spans, seconds, began, meta):
+    """Run profile: totals per span name and node/agent/tool, slowest spans, then every span"""
+    totals = {}
+    for span in spans:
+        key = " ".join([span["name"]] + [span[label] for label in ("node", "agent", "tool") if label in span])
+        total = totals.setdefault(key, {"count": 0, "seconds": 0.0})
+        total["count"] += 1
+        total["seconds"] += span["seconds"]
+        for attr in COUNTERS:
+            if span.get(attr):
+                total[attr] = total.get(attr, 0) + span[attr]
+    for total in totals.values():
+        total["seconds"] = round(total["seconds"], 6)
+    return {
+        "runId": run_id,
+        **meta,
+        "startedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(began)),
+        "seconds": round(seconds, 6),
+        "totals": dict(sorted(totals.items(), key=lambda item: -item[1]["seconds"])),
+        "slowest": sorted(spans, key=lambda span: -span["seconds"])[:10],
+        "spans": spans
+    }
+
+def write_profile(data, metrics_dir=METRICS_DIR):
+    """Write one run profile and keep only the newest MAX_PROFILES"""
+    directory = os.path.join(metrics_dir, PROFILE_DIR)
+    os.makedirs(directory, exist_ok=True)
+    name = "".join(c if c.isalnum() or c in "-_." else "-" for c in str(data["runId"])) + ".json"
+    path = os.path.join(directory, name)
+    with open(path + ".tmp", "w") as f:
+        json.dump(data, f, indent=1)
+    os.replace(path + ".tmp", path)
+    with _profiles_lock:
+        profiles = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".json"):
+                with suppress(FileNotFoundError):   # pruned by another process
+                    profiles.append((entry.stat().st_mtime, entry.path))
+        for _, stale in sorted(profiles)[:-MAX_PROFILES]:
+            with suppress(FileNotFoundError):
+                os.remove(stale)
+    return path
+
+def write_prometheus(metrics_dir=METRICS_DIR):
+    """Write the Prometheus text file atomically, for node_exporter's textfile collector"""
+    os.makedirs(metrics_dir, exist_ok=True)
+    path = os.path.join(metrics_dir, PROMETHEUS_FILE)
+    with open(path + ".tmp", "w") as f:
+        f.write(_telemetry.prometheus())
+    os.replace(path + ".tmp", path)
+    return path
+
+# One registry for the lifetime of the process (tool server, scheduler or load test)
+_telemetry = Telemetry()
+_profiles_lock = threading.Lock()
+
+def span(name, run=None, **labels):
+    return _telemetry.span(name, run, **labels)
+
+def record(name, seconds, run=None, labels=None, attrs=None):
+    _telemetry.record(name, seconds, run, labels, attrs)
+
+def run(run_id, metrics_dir=METRICS_DIR, **meta):
+    return _telemetry.run(run_id, metrics_dir, **meta)
+
+def attach(run_id):
+    return _telemetry.attach(run_id)
+
+def current_run():
+    return _telemetry.current_run()
+
+def prometheus():
+    return _telemetry.prometheus()
+
+if __name__ == "__main__":
+    import tempfile
+
+    n_spans = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    telemetry = Telemetry()
+
+    start = time.perf_counter()
+    for _ in range(n_spans):
+        pass
+    empty = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(n_spans):
+        with telemetry.span("tool", tool="heat-map") as attrs:
+            attrs["bytesRead"] = 100
+    traced = time.perf_counter() - start
+    overhead_us = (traced - empty) / n_spans * 1e6
+
+    with tempfile.TemporaryDirectory() as metrics_dir:
+        with telemetry.run("run-1", metrics_dir, sheetId="123") as run_id:
+            with telemetry.span("smartsheets.get") as attrs:
+                attrs["bytesRead"] = 4096
+            with telemetry.span("llm", agent="Agent.ReportGenerator") as attrs:
+                attrs.update(promptTokens=1200, completionTokens=300)
+            worker = threading.Thread(target=lambda: telemetry.record("tool", 0.01, run_id, {"tool": "change-detector"}))
+            worker.start()
+            worker.join()
+            try:
+                with telemetry.span("snapshot.read"):
+                    raise OSError("missing snapshot")
+            except OSError:
+                pass
+        with open(os.path.join(metrics_dir, PROFILE_DIR, "run-1.json")) as f:
+            run_profile = json.load(f)
+        for i in range(MAX_PROFILES + 5):
+            write_profile({"runId": f"extra-{i}"}, metrics_dir)
+        kept = len(os.listdir(os.path.join(metrics_dir, PROFILE_DIR)))
+    text = telemetry.prometheus()
+
+    print(f"📊 Telemetry benchmark ({n_spans:,} spans):")
+    print(f"   Overhead: {overhead_us:.2f} µs/span, {len(text):,} bytes of Prometheus text")
+
+    lines = set(text.splitlines())
+    counted = f'issue_monitor_span_seconds_count{{span="tool",tool="heat-map"}} {n_spans}' in lines
+    bucketed = f'issue_monitor_span_seconds_bucket{{span="tool",tool="heat-map",le="+Inf"}} {n_spans}' in lines
+    tokens = 'issue_monitor_prompt_tokens_total{span="llm",agent="Agent.ReportGenerator"} 1200' in lines
+    read = f'issue_monitor_bytes_read_total{{span="tool",tool="heat-map"}} {100 * n_spans}' in lines
+
+    print(f"\n📊 Validation:")
+    print(f"   Histogram count and +Inf bucket: {'✅' if counted and bucketed else '❌'}")
+    print(f"   Token and byte counters: {'✅' if tokens and read else '❌'}")
+    print(f"   Profile: {len(run_profile['spans'])} spans incl. other thread, error kept {'✅' if len(run_profile['spans']) == 4 and run_profile['sheetId'] == '123' and any(span.get('error') == 'OSError' for span in run_profile['spans']) else '❌'}")
+    print(f"   Profile totals per agent: {'✅' if run_profile['totals']['llm Agent.ReportGenerator']['promptTokens'] == 1200 else '❌'}")
+    print(f"   Profiles bounded: {kept} kept (max {MAX_PROFILES}) {'✅' if kept == MAX_PROFILES else '❌'}")
+    print(f"   Overhead under 10 µs/span: {'✅' if overhead_us < 10 else '❌'}")
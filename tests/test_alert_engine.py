@@ -0,0 +1,90 @@
+import json
+import threading
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import status_metrics
+from alert_engine import Cooldowns, run
+from change_detector import diff_snapshots, handle_request
+from snapshot_store import SnapshotStore
+from synthetic import make_snapshot, mutate_snapshot
+
+ALERT = {"rule": "blocked", "issueId": "A"}
+
+def test_cooldown_suppresses_until_expiry(tmp_path):
+    cooldowns = Cooldowns(str(tmp_path))
+    assert cooldowns.filter([ALERT], now=1_000, cooldown_seconds=3600) == ([ALERT], [])
+
+    cooldowns.record([ALERT], now=1_000)
+    cooldowns.save()
+    reloaded = Cooldowns(str(tmp_path))
+    assert reloaded.filter([ALERT], now=2_000, cooldown_seconds=3600) == ([], [ALERT])
+    assert reloaded.filter([ALERT], now=5_000, cooldown_seconds=3600) == ([ALERT], [])
+
+def test_filter_does_not_record(tmp_path):
+    cooldowns = Cooldowns(str(tmp_path))
+    cooldowns.filter([ALERT], now=1_000, cooldown_seconds=3600)
+    assert cooldowns.filter([ALERT], now=1_001, cooldown_seconds=3600) == ([ALERT], [])
+
+@pytest.fixture
+def webhook():
+    statuses, received = [200], []
+
+    class Sink(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(statuses[0])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Sink)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/hook", statuses, received
+    server.shutdown()
+
+def test_cooldowns_start_only_when_delivered(tmp_path, webhook):
+    url, statuses, received = webhook
+    snapshot_dir, metrics_dir = str(tmp_path / "snapshots"), str(tmp_path / "metrics")
+    store = SnapshotStore(snapshot_dir, retention_days=365_000)
+    previous = make_snapshot(2_000, timestamp="2025-01-14T06:00:00Z")
+    current = mutate_snapshot(previous, change_rate=0.05, seed=1, timestamp="2025-01-14T12:00:00Z")
+    store.write(previous)
+    store.write(current)
+    status_metrics.record(diff_snapshots(previous, current), previous, metrics_dir)
+    now = status_metrics.parse_time("2025-01-14T12:00:00Z")
+
+    dry_run = run(snapshot_dir, metrics_dir, now=now)
+    assert dry_run["newAlerts"] > 0 and dry_run["notificationStatus"] is None
+
+    statuses[0] = 500
+    with pytest.raises(urllib.error.HTTPError):
+        run(snapshot_dir, metrics_dir, webhook_url=url, now=now)
+    statuses[0] = 200
+    delivered = run(snapshot_dir, metrics_dir, webhook_url=url, now=now)
+    repeat = run(snapshot_dir, metrics_dir, webhook_url=url, now=now)
+
+    assert delivered["newAlerts"] == dry_run["newAlerts"] and delivered["notificationStatus"] == 200
+    assert repeat["newAlerts"] == 0 and repeat["suppressed"] == dry_run["newAlerts"]
+    assert len(received) == 2
+
+def test_status_change_at_every_snapshot_is_thrashing(tmp_path):
+    dirs = {"snapshotDir": str(tmp_path / "snapshots"), "metricsDir": str(tmp_path / "metrics"), "reportsDir": str(tmp_path / "reports")}
+    store = SnapshotStore(dirs["snapshotDir"], retention_days=365_000)
+    base = make_snapshot(50, timestamp="2025-01-14T00:00:00Z")
+    issue_id = base["rows"][0]["issueId"]
+    # Snapshots 6 hours apart show at most 4 status changes in a day
+    timestamps = ["2025-01-14T00:00:00Z", "2025-01-14T06:00:00Z", "2025-01-14T12:00:00Z",
+                  "2025-01-14T18:00:00Z", "2025-01-15T00:00:00Z"]
+    for step, status in enumerate(["New", "In Progress", "Blocked", "In Progress", "Resolved"]):
+        store.write({**base, "timestamp": timestamps[step], "rows": [{**base["rows"][0], "status": status, "updatedDate": timestamps[step]}] + base["rows"][1:]})
+        if step:
+            handle_request(dirs)
+
+    result = run(dirs["snapshotDir"], dirs["metricsDir"], now=status_metrics.parse_time("2025-01-15T00:00:00Z"))
+    thrashing = [alert for alert in result["alerts"] if alert["rule"] == "thrashing"]
+    assert [(alert["issueId"], alert["statusChanges24h"]) for alert in thrashing] == [(issue_id, 4)]
@@ -0,0 +1,57 @@
+from change_detector import diff_snapshots, handle_request
+from snapshot_store import SnapshotStore
+from synthetic import make_snapshot, mutate_snapshot
+
+def snapshot(timestamp, *rows):
+    return {"timestamp": timestamp, "rows": [dict(row) for row in rows]}
+
+def row(issue_id, **fields):
+    return {"issueId": issue_id, "title": "t", "status": "New", "assignee": "a", "priority": "Low", **fields}
+
+def test_changes_grouped_by_category():
+    previous = snapshot("2025-01-14T06:00:00Z", row("A"), row("B"), row("C"))
+    current = snapshot("2025-01-14T12:00:00Z", row("A", status="In Progress", assignee="b"), row("B"), row("D"))
+    delta = diff_snapshots(previous, current)
+
+    assert delta["summary"] == {"new": 1, "status": 1, "assignee": 1, "priority": 0, "description": 0, "deleted": 1}
+    assert delta["totalChanges"] == 4
+    assert delta["changes"]["status"][0]["from"] == "New" and delta["changes"]["status"][0]["to"] == "In Progress"
+    assert [change["issueId"] for change in delta["changes"]["new"]] == ["D"]
+    assert [change["issueId"] for change in delta["changes"]["deleted"]] == ["C"]
+    assert (delta["previousTimestamp"], delta["currentTimestamp"]) == ("2025-01-14T06:00:00Z", "2025-01-14T12:00:00Z")
+
+def test_values_compared_not_hashes():
+    # hash(-1) == hash(-2) in CPython; a hash-based diff would miss this change
+    previous = snapshot("2025-01-14T06:00:00Z", row("A", priority=-1))
+    current = snapshot("2025-01-14T12:00:00Z", row("A", priority=-2))
+
+    changes = diff_snapshots(previous, current)["changes"]["priority"]
+    assert [(change["from"], change["to"]) for change in changes] == [(-1, -2)]
+
+def test_identical_snapshots_have_no_changes():
+    base = make_snapshot(500)
+    assert diff_snapshots(base, base)["totalChanges"] == 0
+
+def test_mutated_snapshot_changes_are_found():
+    base = make_snapshot(1_000)
+    current = mutate_snapshot(base, change_rate=0.05, seed=3, timestamp="2025-01-14T12:00:00Z")
+    delta = diff_snapshots(base, current)
+
+    before = {row["issueId"]: row for row in base["rows"]}
+    after = {row["issueId"]: row for row in current["rows"]}
+    status_changed = {issue_id for issue_id in before.keys() & after.keys() if before[issue_id]["status"] != after[issue_id]["status"]}
+    assert {change["issueId"] for change in delta["changes"]["status"]} == status_changed
+    assert {change["issueId"] for change in delta["changes"]["new"]} == after.keys() - before.keys()
+    assert {change["issueId"] for change in delta["changes"]["deleted"]} == before.keys() - after.keys()
+
+def test_previous_and_current_named_together(tmp_path):
+    store = SnapshotStore(str(tmp_path), retention_days=365_000)
+    store.write(snapshot("2025-01-14T06:00:00Z", row("A")))
+    store.write(snapshot("2025-01-14T12:00:00Z", row("A", status="Blocked")))
+    previous, current = store.list()
+
+    for names in ({"previous": previous}, {"current": current}, {"previous": previous, "current": ""}):
+        assert "error" in handle_request({"snapshotDir": str(tmp_path), "record": False, **names})
+    both = handle_request({"snapshotDir": str(tmp_path), "record": False, "previous": previous, "current": current})
+    neither = handle_request({"snapshotDir": str(tmp_path), "record": False, "previous": "", "current": ""})
+    assert both["summary"]["status"] == neither["summary"]["status"] == 1
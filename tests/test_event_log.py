@@ -0,0 +1,28 @@
+from change_detector import diff_snapshots
+from event_log import EventLog
+from synthetic import make_snapshot, mutate_snapshot
+
+def test_replayed_change_set_is_skipped(tmp_path):
+    base = make_snapshot(500, timestamp="2025-01-14T06:00:00Z")
+    delta = diff_snapshots(base, mutate_snapshot(base, change_rate=0.1, seed=1, timestamp="2025-01-14T12:00:00Z"))
+    log = EventLog(str(tmp_path))
+
+    first = log.append(delta)
+    replay = log.append(delta)
+
+    assert first["appended"] == delta["totalChanges"] > 0 and not first["skipped"]
+    assert replay == {"appended": 0, "skipped": True, "lastTimestamp": "2025-01-14T12:00:00Z"}
+    assert log.state["events"] == delta["totalChanges"]
+
+def test_history_sees_appends_from_another_instance(tmp_path):
+    base = make_snapshot(500, timestamp="2025-01-14T06:00:00Z")
+    later = mutate_snapshot(base, change_rate=0.1, seed=1, timestamp="2025-01-14T12:00:00Z")
+    reader = EventLog(str(tmp_path))
+    delta = diff_snapshots(base, later)
+
+    EventLog(str(tmp_path)).append(delta)   # stands in for another process
+
+    issue_id = delta["changes"]["status"][0]["issueId"]
+    history = reader.history(issue_id)
+    assert history and all(event["issueId"] == issue_id and event["at"] == "2025-01-14T12:00:00Z" for event in history)
+    assert reader.state["lastTimestamp"] == "2025-01-14T12:00:00Z"
@@ -0,0 +1,52 @@
+import json
+import os
+
+import pytest
+
+import heat_map
+from change_detector import diff_snapshots
+from event_log import LOG_FILE, EventLog
+from synthetic import make_snapshot, mutate_snapshot
+
+def logged_updates(metrics_dir):
+    """Non-deleted events in the log, counted by a full read"""
+    with open(os.path.join(metrics_dir, LOG_FILE)) as f:
+        return sum(1 for line in f if json.loads(line)["type"] != "deleted")
+
+@pytest.fixture
+def metrics_dir(tmp_path):
+    yield str(tmp_path)
+    heat_map._loaded.pop(os.path.join(str(tmp_path), LOG_FILE), None)
+
+def test_incremental_loads_across_deletions(metrics_dir):
+    log = EventLog(metrics_dir)
+    snapshot = make_snapshot(1_000, timestamp="2025-01-01T00:00:00Z")
+    deletions = 0
+    for run in range(1, 6):
+        current = mutate_snapshot(snapshot, change_rate=0.05, seed=run, timestamp=f"2025-01-0{1 + run}T00:00:00Z")
+        delta = diff_snapshots(snapshot, current)
+        deletions += delta["summary"]["deleted"]
+        log.append(delta)
+        snapshot = current
+
+        updates = heat_map.load_event_log(metrics_dir)
+        assert len(updates.ts) == logged_updates(metrics_dir)
+        assert updates.offset == os.path.getsize(os.path.join(metrics_dir, LOG_FILE))
+    assert deletions > 0
+
+def test_uncommitted_bytes_are_not_read(metrics_dir):
+    log = EventLog(metrics_dir)
+    base = make_snapshot(500, timestamp="2025-01-01T00:00:00Z")
+    later = mutate_snapshot(base, change_rate=0.05, seed=1, timestamp="2025-01-02T00:00:00Z")
+    log.append(diff_snapshots(base, later))
+    committed = logged_updates(metrics_dir)
+
+    # An append that wrote events but died before committing its state
+    with open(os.path.join(metrics_dir, LOG_FILE), "a") as f:
+        f.write(json.dumps({"at": "2025-01-03T00:00:00Z", "type": "status", "issueId": "CRASHED", "from": "New", "to": "Blocked"}) + "\n")
+    assert len(heat_map.load_event_log(metrics_dir).ts) == committed
+
+    # The next append truncates those bytes; the loader continues from the committed offset
+    log.append(diff_snapshots(later, mutate_snapshot(later, change_rate=0.05, seed=2, timestamp="2025-01-03T00:00:00Z")))
+    updates = heat_map.load_event_log(metrics_dir)
+    assert len(updates.ts) == logged_updates(metrics_dir) and "CRASHED" not in updates.codes
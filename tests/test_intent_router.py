@@ -0,0 +1,23 @@
+import re
+
+import pytest
+
+from intent_router import INTENT_PATTERNS, flowise_condition_pattern, load_corpus, route
+
+CORPUS = load_corpus()
+FLOWISE = {scenario: re.compile(flowise_condition_pattern(scenario)) for scenario in INTENT_PATTERNS}
+
+@pytest.mark.parametrize("query", [item["query"] for item in CORPUS] + ["What CHANGED since the last fetch?", "ISS-000123", ""])
+def test_flowise_regexes_agree_with_router(query):
+    expected = route(query)
+    assert [scenario for scenario, pattern in FLOWISE.items() if pattern.search(query)] == ([] if expected is None else [expected])
+
+def test_resolved_queries_are_accurate():
+    resolved = [(route(item["query"]), item["scenario"]) for item in CORPUS if route(item["query"]) is not None]
+    assert resolved
+    assert sum(got == expected for got, expected in resolved) >= 0.95 * len(resolved)
+
+def test_unambiguous_and_ambiguous_queries():
+    assert route("Show me hot issues") == 2
+    assert route("Tell me about ISS-000123") == 5
+    assert route("What changed and which issues are hot?") is None
@@ -0,0 +1,51 @@
+import threading
+
+from response_cache import ResponseCache
+
+def test_normalized_query_hit():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.put("Show hot issues", "a.snap", "first", now=0)
+    assert cache.get("  show HOT issues? ", "a.snap", now=1) == "first"
+
+def test_lru_eviction_keeps_recently_used():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.put("hot issues", "a.snap", "first", now=0)
+    cache.put("daily report", "a.snap", "second", now=1)
+    cache.get("hot issues", "a.snap", now=2)
+    cache.put("trends", "a.snap", "third", now=3)
+
+    assert cache.get("daily report", "a.snap", now=4) is None
+    assert cache.get("hot issues", "a.snap", now=4) == "first"
+    assert cache.stats()["evictions"] == 1
+
+def test_ttl_expiry():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.put("trends", "a.snap", "third", now=0)
+    assert cache.get("trends", "a.snap", now=59) == "third"
+    assert cache.get("trends", "a.snap", now=60) is None
+    assert cache.stats()["expirations"] == 1
+
+def test_new_snapshot_invalidates():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.put("trends", "a.snap", "third", now=0)
+    assert cache.get("trends", "b.snap", now=1) is None
+    assert not cache.entries and cache.stats()["invalidations"] == 1
+
+def test_shared_between_threads():
+    cache = ResponseCache(max_entries=50, ttl_seconds=60)
+    errors = []
+
+    def worker():
+        try:
+            for i in range(5_000):
+                cache.put(f"q{i % 200}", "a.snap", i)
+                cache.get(f"q{i * 7 % 200}", "a.snap")
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors and len(cache.entries) == 50
@@ -0,0 +1,39 @@
+from collections import deque
+
+import smartsheets_fetcher
+from scheduler import Scheduler
+from smartsheets_fetcher import SmartSheetsClient, quota_bucket, shared_limiter
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(seconds, 1e-6)  # A real sleep always lets the clock move on
+
+def test_no_minute_exceeds_the_quota(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(smartsheets_fetcher.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(smartsheets_fetcher.time, "sleep", clock.sleep)
+    limiter = quota_bucket(300)
+
+    window, peak = deque(), 0
+    while clock.now < 300:
+        limiter.acquire()
+        window.append(clock.now)
+        while window[0] <= clock.now - 60:
+            window.popleft()
+        peak = max(peak, len(window))
+
+    assert peak <= 300
+    assert peak >= 290
+
+def test_tool_calls_and_scheduler_share_one_limiter():
+    scheduler = Scheduler([], requests_per_minute=300)
+    scheduler.pool.shutdown()
+
+    assert SmartSheetsClient().limiter is shared_limiter(300) is scheduler.limiter
+    assert SmartSheetsClient(requests_per_minute=60).limiter is not scheduler.limiter
@@ -0,0 +1,49 @@
+import copy
+
+import status_metrics
+from change_detector import diff_snapshots
+from status_metrics import StatusMetrics, parse_time, recompute
+from synthetic import make_snapshot, mutate_snapshot
+
+def week_of_snapshots(n_rows=1_000, n_runs=12):
+    snapshots = [make_snapshot(n_rows, timestamp="2025-01-01T00:00:00Z")]
+    for run in range(1, n_runs + 1):
+        hours = run * 6
+        timestamp = f"2025-01-{1 + hours // 24:02d}T{hours % 24:02d}:00:00Z"
+        snapshots.append(mutate_snapshot(snapshots[-1], change_rate=0.05, seed=run, timestamp=timestamp))
+    return snapshots
+
+def test_incremental_matches_recompute():
+    snapshots = week_of_snapshots()
+    incremental = StatusMetrics()
+    incremental.seed(snapshots[0])
+    for previous, current in zip(snapshots, snapshots[1:]):
+        incremental.apply(diff_snapshots(previous, current))
+    full = recompute(snapshots)
+    now = parse_time(snapshots[-1]["timestamp"])
+
+    assert incremental.transitions == full.transitions
+    assert incremental.histograms == full.histograms
+    assert incremental.durations == full.durations
+    assert incremental.stuck(now) == full.stuck(now)
+
+def test_replayed_change_set_is_skipped():
+    snapshots = week_of_snapshots(n_runs=2)
+    metrics = StatusMetrics()
+    metrics.seed(snapshots[0])
+    deltas = [diff_snapshots(a, b) for a, b in zip(snapshots, snapshots[1:])]
+    for delta in deltas:
+        assert metrics.apply(delta)
+    state = copy.deepcopy(metrics.to_state())
+
+    assert not metrics.apply(deltas[-1])
+    assert metrics.to_state() == state
+
+def test_persisted_record_matches_recompute(tmp_path):
+    snapshots = week_of_snapshots(n_runs=8)
+    for previous, current in zip(snapshots, snapshots[1:]):
+        assert status_metrics.record(diff_snapshots(previous, current), previous, str(tmp_path))["applied"]
+    persisted = status_metrics.load(str(tmp_path))
+    now = parse_time(snapshots[-1]["timestamp"])
+
+    assert persisted.summary(now) == recompute(snapshots).summary(now)
@@ -0,0 +1,39 @@
+from trend_rollups import TrendRollups
+
+def steady_change_set(timestamp, run):
+    """The same activity every run: two new issues, three status changes (one resolution)"""
+    new = [{"issueId": f"N{run}-{i}", "status": "New", "assignee": "ann", "createdDate": "2025-01-01"} for i in range(2)]
+    status = [
+        {"issueId": f"S{run}-0", "field": "status", "from": "New", "to": "In Progress", "updatedDate": timestamp},
+        {"issueId": f"S{run}-1", "field": "status", "from": "In Progress", "to": "Blocked", "updatedDate": timestamp},
+        {"issueId": f"S{run}-2", "field": "status", "from": "In Progress", "to": "Resolved", "updatedDate": timestamp,
+         "assignee": "ann", "createdDate": "2025-01-01"}
+    ]
+    changes = {"new": new, "status": status, "assignee": [], "priority": [], "description": [], "deleted": []}
+    return {"currentTimestamp": timestamp, "changes": changes, "totalChanges": 5}
+
+def timestamp(run):
+    hours = run * 6
+    return f"2025-{1 + hours // 24 // 31:02d}-{1 + hours // 24 % 31:02d}T{hours % 24:02d}:00:00Z"
+
+def test_steady_workload_has_no_anomalies():
+    rollups = TrendRollups()
+    for run in range(1, 4 * 40):   # 40 days, every 6 hours; the first day and week are partial
+        rollups.apply(steady_change_set(timestamp(run), run))
+        for resolution in ("day", "week"):
+            assert rollups.anomalies(resolution) == [], (timestamp(run), resolution)
+
+def test_spike_is_flagged_while_open_and_once_closed():
+    rollups = TrendRollups()
+    runs = 4 * 30
+    for run in range(1, runs):
+        rollups.apply(steady_change_set(timestamp(run), run))
+    spike = steady_change_set(timestamp(runs), runs)
+    spike["changes"]["new"] *= 20
+    spike["totalChanges"] += len(spike["changes"]["new"]) - 2
+    rollups.apply(spike)
+    assert {(a["metric"], a["open"]) for a in rollups.anomalies("day")} == {("new", True), ("changes", True)}
+
+    for run in range(runs + 1, runs + 5):   # the rest of the spike's day, then into the next
+        rollups.apply(steady_change_set(timestamp(run), run))
+    assert {(a["metric"], a["open"]) for a in rollups.anomalies("day")} == {("new", False), ("changes", False)}
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Local HTTP tool server for the SmartSheets Issue Monitor data tools
+Each tool is a POST endpoint at /tools/{name} taking and returning JSON; GET /metrics serves the
+process's tool, fetch and snapshot I/O metrics as Prometheus text.
+"""
+
+import json
+import sys
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import alert_engine
+import change_detector
+import context_packer
+import event_log
+import heat_map
+import intent_router
+import report_facts
+import response_cache
+import smartsheets_fetcher
+import snapshot_store
+import status_metrics
+import telemetry
+import trend_rollups
+
+# Tool name -> handler(payload) -> JSON-serializable result
+TOOL_HANDLERS = {
+    "change-detector": change_detector.handle_request,
+    "smartsheets-fetch": smartsheets_fetcher.handle_request,
+    "snapshot-store": snapshot_store.handle_request,
+    "issue-history": event_log.handle_request,
+    "heat-map": heat_map.handle_request,
+    "status-transitions": status_metrics.handle_request,
+    "alert-evaluator": alert_engine.handle_request,
+    "intent-router": intent_router.handle_request,
+    "response-cache": response_cache.handle_request,
+    "report-facts": report_facts.handle_request,
+    "trend-rollups": trend_rollups.handle_request
+}
+
+# Tools that rewrite shared files under data/ (snapshots, event log, cooldowns, report facts) run one
+# at a time per data directory, so concurrent agents cannot interleave read-modify-write cycles or
+# temp-file renames, while flows for different sheets still write in parallel
+WRITE_TOOLS = {"change-detector", "smartsheets-fetch", "snapshot-store", "alert-evaluator", "report-facts"}
+_write_locks = {}
+_write_locks_guard = threading.Lock()
+
+def write_lock(payload):
+    key = (payload.get("snapshotDir", snapshot_store.SNAPSHOT_DIR), payload.get("metricsDir", event_log.METRICS_DIR),
+           payload.get("reportsDir", report_facts.REPORTS_DIR))
+    with _write_locks_guard:
+        return _write_locks.setdefault(key, threading.Lock())
+
+class ToolRequestHandler(BaseHTTPRequestHandler):
+    """Dispatch POST /tools/{name} to the matching tool handler"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            return self.send_json(404, {"error": "Not found", "path": self.path})
+        data = telemetry.prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        name = self.path.rstrip("/").rsplit("/", 1)[-1]
+        handler = TOOL_HANDLERS.get(name)
+        if not self.path.startswith("/tools/") or handler is None:
+            return self.send_json(404, {"error": "Unknown tool", "path": self.path})
+
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as error:
+            return self.send_json(400, {"error": "Invalid JSON body", "detail": str(error)})
+
+        # Spans are labelled with the calling agent from the generated tool body's trace context
+        trace = payload.get("trace") or {}
+        with telemetry.attach(trace.get("run")), telemetry.span("tool", tool=name, agent=trace.get("agent")) as attrs:
+            attrs["bytesRead"] = length
+            try:
+                if name in WRITE_TOOLS:
+                    lock = write_lock(payload)
+                    with telemetry.span("tool.lockWait", tool=name):
+                        lock.acquire()
+                    try:
+                        result = handler(payload)
+                    finally:
+                        lock.release()
+                else:
+                    result = handler(payload)
+                # Fit the result to the calling agent's token budget (context settings come from the generated tool body)
+                result = context_packer.handle_result(result, payload.get("context"))
+            except Exception as error:   # a bug in one tool must still answer the agent, not drop the connection
+                traceback.print_exc()
+                attrs["error"] = type(error).__name__
+                attrs["bytesWritten"] = self.send_json(500, {"error": type(error).__name__, "detail": str(error)})
+                return
+            attrs["bytesWritten"] = self.send_json(200, result)
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        return len(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(host="127.0.0.1", port=5001):
+    """Run the tool server until interrupted"""
+    server = ThreadingHTTPServer((host, port), ToolRequestHandler)
+    print(f"✅ Tool server on http://{host}:{port}/tools/ ({', '.join(TOOL_HANDLERS)}), metrics at /metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    serve(port=int(sys.argv[1]) if len(sys.argv) > 1 else 5001)
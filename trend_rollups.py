@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Streaming time-series rollups for Agent.TrendAnalyzer
+Hourly, daily and weekly aggregates per metric and per assignee, folded in as each change set
+arrives with online (Welford) mean and variance, so trend queries read a few hundred points
+instead of replaying 30 days of snapshots.
+"""
+
+import json
+import math
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import status_metrics
+from event_log import METRICS_DIR
+
+STATE_FILE = "trend-rollups.json"
+RESOLUTIONS = {"hour": 3600, "day": 86_400, "week": 7 * 86_400}
+# Points kept per resolution: one week of hours, a quarter of days, a year of weeks
+RETENTION = {"hour": 168, "day": 90, "week": 52}
+COUNT_METRICS = ["new", "resolved", "reopened", "statusChanges", "changes", "deleted"]
+ANOMALY_SIGMA = 2.0
+
+class Welford:
+    """Online count, mean and variance; mergeable across buckets (Chan et al.)"""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count, self.mean, self.m2 = count, mean, m2
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def remove(self, value):
+        """Undo add(value)"""
+        if self.count <= 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        mean = (self.count * self.mean - value) / (self.count - 1)
+        self.m2 = max(0.0, self.m2 - (value - mean) * (value - self.mean))
+        self.count -= 1
+        self.mean = mean
+
+    def merge(self, other):
+        if not other.count:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        return self
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+    def to_list(self):
+        return [self.count, self.mean, self.m2]
+
+def period_start(at, resolution):
+    """Epoch start of the hour, day or ISO week (Monday) containing `at`"""
+    if resolution == "week":
+        days = at // 86_400
+        return (days - (days + 3) % 7) * 86_400   # 1970-01-01 was a Thursday
+    return at - at % RESOLUTIONS[resolution]
+
+def period_key(start, resolution):
+    moment = datetime.fromtimestamp(start, timezone.utc)
+    if resolution == "hour":
+        return moment.strftime("%Y-%m-%dT%H")
+    if resolution == "day":
+        return moment.strftime("%Y-%m-%d")
+    year, week, _ = moment.isocalendar()
+    return f"{year}-W{week:02d}"
+
+class TrendRollups:
+    """Per-resolution counters and Welford distributions, plus baselines over closed periods
+
+    counts[resolution][metric][period] is a sum for that period; dists[resolution][metric][period]
+    is a Welford state of individual observations (resolution hours overall and per assignee).
+    When a period closes its totals are folded into baselines[resolution][metric], including
+    zero periods in gaps, which is what the >2σ anomaly check compares against.
+    """
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.counts = state.get("counts", {r: {} for r in RESOLUTIONS})
+        self.dists = state.get("dists", {r: {} for r in RESOLUTIONS})
+        self.baselines = state.get("baselines", {r: {} for r in RESOLUTIONS})
+        self.open = state.get("open", {})   # resolution -> epoch start of the current period
+        self.last_timestamp = state.get("lastTimestamp")
+
+    def to_state(self):
+        return {
+            "counts": self.counts,
+            "dists": self.dists,
+            "baselines": self.baselines,
+            "open": self.open,
+            "lastTimestamp": self.last_timestamp
+        }
+
+    def close_periods(self, resolution, start):
+        """Fold every period before `start` into the baselines, gaps as zeros"""
+        current = self.open.get(resolution)
+        if current is None or current >= start:
+            self.open.setdefault(resolution, start)
+            return
+        counts = self.counts[resolution]
+        metrics = set(COUNT_METRICS) | set(counts) | set(self.baselines[resolution])
+        while current < start:
+            key = period_key(current, resolution)
+            for metric in metrics:
+                baseline = Welford(*self.baselines[resolution].get(metric, [0, 0.0, 0.0]))
+                baseline.add(counts.get(metric, {}).get(key, 0))
+                self.baselines[resolution][metric] = baseline.to_list()
+            current = period_start(current + RESOLUTIONS[resolution], resolution)
+        self.open[resolution] = start
+        self.prune(resolution, start)
+
+    def prune(self, resolution, start):
+        oldest = period_key(start - RETENTION[resolution] * RESOLUTIONS[resolution], resolution)
+        for table in (self.counts[resolution], self.dists[resolution]):
+            for series in table.values():
+                for key in [key for key in series if key < oldest]:
+                    del series[key]
+
+    def count(self, resolution, key, metric, amount=1):
+        series = self.counts[resolution].setdefault(metric, {})
+        series[key] = series.get(key, 0) + amount
+
+    def observe(self, resolution, key, metric, value):
+        series = self.dists[resolution].setdefault(metric, {})
+        state = Welford(*series.get(key, [0, 0.0, 0.0]))
+        state.add(value)
+        series[key] = state.to_list()
+
+    def apply(self, delta):
+        """Fold one change_detector result into every resolution; replays are skipped"""
+        timestamp = delta.get("currentTimestamp")
+        if self.last_timestamp and timestamp and timestamp <= self.last_timestamp:
+            return False
+        at = status_metrics.parse_time(timestamp)
+        changes = delta["changes"]
+
+        observations = []   # (metric, value)
+        tallies = {
+            "new": len(changes["new"]),
+            "statusChanges": len(changes["status"]),
+            "changes": delta.get("totalChanges", sum(len(items) for items in changes.values())),
+            "deleted": len(changes["deleted"]),
+            "resolved": 0,
+            "reopened": 0
+        }
+        for item in changes["new"]:
+            if item.get("assignee"):
+                tallies[f"new:{item['assignee']}"] = tallies.get(f"new:{item['assignee']}", 0) + 1
+        for item in changes["status"]:
+            was_closed = item["from"] in status_metrics.CLOSED_STATUSES
+            is_closed = item["to"] in status_metrics.CLOSED_STATUSES
+            if is_closed and not was_closed:
+                tallies["resolved"] += 1
+                assignee = item.get("assignee")
+                if assignee:
+                    tallies[f"resolved:{assignee}"] = tallies.get(f"resolved:{assignee}", 0) + 1
+                if item.get("createdDate"):
+                    resolved_at = status_metrics.parse_time(item.get("updatedDate") or timestamp)
+                    hours = max(0, resolved_at - status_metrics.parse_time(item["createdDate"])) / 3600
+                    observations.append(("resolutionHours", hours))
+                    if assignee:
+                        observations.append((f"resolutionHours:{assignee}", hours))
+            elif was_closed and not is_closed:
+                tallies["reopened"] += 1
+
+        for resolution in RESOLUTIONS:
+            start = period_start(at, resolution)
+            self.close_periods(resolution, start)
+            key = period_key(start, resolution)
+            for metric, amount in tallies.items():
+                self.count(resolution, key, metric, amount)
+            for metric, value in observations:
+                self.observe(resolution, key, metric, value)
+        self.last_timestamp = timestamp
+        return True
+
+    # Query API
+
+    def series(self, metric, resolution="day", periods=None):
+        """[(period, value)] oldest first; distributions report mean, std and count"""
+        if metric in self.counts[resolution]:
+            points = sorted(self.counts[resolution][metric].items())
+        else:
+            points = [(key, {"mean": round(state[1], 2), "std": round(Welford(*state).std, 2), "count": state[0]})
+                      for key, state in sorted(self.dists[resolution].get(metric, {}).items())]
+        return points[-periods:] if periods else points
+
+    def window_total(self, metric, end, days):
+        """Sum of daily counts in the `days` days before `end` (epoch)"""
+        first = period_key(end - days * 86_400, "day")
+        last = period_key(end, "day")
+        return sum(value for key, value in self.counts["day"].get(metric, {}).items() if first <= key < last)
+
+    def week_over_week(self, now, metrics=COUNT_METRICS):
+        """Last 7 days vs the 7 before, per metric"""
+        end = period_start(now, "day") + 86_400
+        result = {}
+        for metric in metrics:
+            this_week = self.window_total(metric, end, 7)
+            last_week = self.window_total(metric, end - 7 * 86_400, 7)
+            change = round((this_week - last_week) / last_week * 100, 1) if last_week else None
+            result[metric] = {"thisWeek": this_week, "lastWeek": last_week, "changePct": change}
+        return result
+
+    def anomalies(self, resolution="day", sigma=ANOMALY_SIGMA, metrics=COUNT_METRICS):
+        """Metrics beyond `sigma` standard deviations of the closed periods before them
+
+        The last closed period is compared both ways against the periods before it. The open
+        period is only partly filled, so it is flagged only once its running total already exceeds
+        the upper bound; counts only grow, so that cannot be an artifact of the period being young.
+        """
+        found = []
+        start = self.open.get(resolution)
+        if start is None:
+            return found
+        closed_key = period_key(period_start(start - 1, resolution), resolution)
+        open_key = period_key(start, resolution)
+        for metric in metrics:
+            baseline = Welford(*self.baselines[resolution].get(metric, [0, 0.0, 0.0]))
+            series = self.counts[resolution].get(metric, {})
+            checks = [(open_key, True, baseline)]
+            if baseline.count:   # the last closed period, against the ones before it
+                before = Welford(*baseline.to_list())
+                before.remove(series.get(closed_key, 0))
+                checks.insert(0, (closed_key, False, before))
+            for key, is_open, reference in checks:
+                value = series.get(key, 0)
+                if reference.count < 3 or not reference.std:
+                    continue
+                deviation = value - reference.mean
+                if deviation > sigma * reference.std or (not is_open and -deviation > sigma * reference.std):
+                    found.append({
+                        "metric": metric, "period": key, "open": is_open, "value": value,
+                        "mean": round(reference.mean, 2), "std": round(reference.std, 2),
+                        "zScore": round(deviation / reference.std, 2)
+                    })
+        return found
+
+    def assignee_resolution(self, resolution="week", periods=4, min_resolved=3):
+        """Mean resolution hours per assignee over recent periods vs the team, fastest first"""
+        def merged(metric):
+            total = Welford()
+            for _, state in sorted(self.dists[resolution].get(metric, {}).items())[-periods:]:
+                total.merge(Welford(*state))
+            return total
+
+        team = merged("resolutionHours")
+        rows = []
+        for metric in self.dists[resolution]:
+            if not metric.startswith("resolutionHours:"):
+                continue
+            stats = merged(metric)
+            if stats.count >= min_resolved and team.mean:
+                rows.append({
+                    "assignee": metric.split(":", 1)[1], "resolved": stats.count,
+                    "meanHours": round(stats.mean, 1), "stdHours": round(stats.std, 1),
+                    "vsTeamPct": round((stats.mean - team.mean) / team.mean * 100, 1)
+                })
+        rows.sort(key=lambda row: row["meanHours"])
+        return {"teamMeanHours": round(team.mean, 1), "teamResolved": team.count, "assignees": rows}
+
+    def summary(self, now, top_n=5):
+        """Compact result for the agent"""
+        assignees = self.assignee_resolution()
+        return {
+            "asOf": self.last_timestamp,
+            "weekOverWeek": self.week_over_week(now),
+            "anomalies": {resolution: self.anomalies(resolution) for resolution in ("day", "week")},
+            "dailyNew": self.series("new", "day", 14),
+            "dailyResolved": self.series("resolved", "day", 14),
+            "resolution": {**assignees, "fastest": assignees["assignees"][:top_n], "slowest": assignees["assignees"][-top_n:][::-1]},
+        }
+
+def load(metrics_dir=METRICS_DIR):
+    try:
+        with open(os.path.join(metrics_dir, STATE_FILE)) as f:
+            return TrendRollups(json.load(f))
+    except FileNotFoundError:
+        return TrendRollups()
+
+def save(rollups, metrics_dir=METRICS_DIR):
+    os.makedirs(metrics_dir, exist_ok=True)
+    path = os.path.join(metrics_dir, STATE_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(rollups.to_state(), f, separators=(",", ":"))
+    os.replace(path + ".tmp", path)
+
+def record(delta, metrics_dir=METRICS_DIR):
+    """Update persisted rollups from a change set"""
+    rollups = load(metrics_dir)
+    applied = rollups.apply(delta)
+    if applied:
+        save(rollups, metrics_dir)
+    return {"applied": applied, "lastTimestamp": rollups.last_timestamp}
+
+def handle_request(payload):
+    """Tool entry point: trend summary, or one series, anomaly list or assignee comparison"""
+    rollups = load(payload.get("metricsDir", METRICS_DIR))
+    if payload.get("now"):
+        now = status_metrics.parse_time(payload["now"])
+    elif rollups.last_timestamp:
+        now = status_metrics.parse_time(rollups.last_timestamp)
+    else:
+        now = int(time.time())
+    action = payload.get("action") or "summary"
+    resolution = payload.get("resolution") or "day"
+    if action == "summary":
+        return rollups.summary(now, payload.get("topN") or 5)
+    if action == "series":
+        return {"metric": payload["metric"], "resolution": resolution,
+                "points": rollups.series(payload["metric"], resolution, payload.get("periods"))}
+    if action == "anomalies":
+        return {"resolution": resolution, "anomalies": rollups.anomalies(resolution, payload.get("sigma") or ANOMALY_SIGMA)}
+    if action == "assignees":
+        return rollups.assignee_resolution(payload.get("resolution") or "week", payload.get("periods") or 4)
+    raise ValueError(f"Unknown action: {action}")
+
+if __name__ == "__main__":
+    import statistics
+    import tempfile
+
+    from change_detector import diff_snapshots
+    from snapshot_store import SnapshotStore
+    from synthetic import make_snapshot, mutate_snapshot
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    n_runs = 120  # 30 days at 4 runs per day
+    store = SnapshotStore(os.path.join(tempfile.mkdtemp(), "snapshots"), retention_days=100_000)
+
+    snapshot = make_snapshot(n_rows, timestamp="2025-01-01T00:00:00Z")
+    store.write(snapshot)
+    rollups = TrendRollups()
+    deltas = []
+    update_seconds = 0.0
+    for run in range(1, n_runs + 1):
+        hours = run * 6
+        timestamp = f"2025-{1 + hours // 24 // 31:02d}-{1 + hours // 24 % 31:02d}T{hours % 24:02d}:00:00Z"
+        current = mutate_snapshot(snapshot, change_rate=0.02 if run != n_runs else 0.25, seed=run, timestamp=timestamp)
+        store.write(current)
+        deltas.append(diff_snapshots(snapshot, current))
+        start = time.perf_counter()
+        rollups.apply(deltas[-1])
+        update_seconds += time.perf_counter() - start
+        snapshot = current
+    rollups = TrendRollups(json.loads(json.dumps(rollups.to_state())))   # as loaded by the tool
+    now = status_metrics.parse_time(rollups.last_timestamp)
+
+    def recompute():
+        """Baseline: replay 30 days of stored snapshots and aggregate from scratch"""
+        fresh = TrendRollups()
+        names = store.list()
+        previous = store.read(names[0])
+        for name in names[1:]:
+            current = store.read(name)
+            fresh.apply(diff_snapshots(previous, current))
+            previous = current
+        return fresh.summary(now)
+
+    start = time.perf_counter()
+    full = recompute()
+    full_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for _ in range(20):
+        summary = rollups.summary(now)
+    query_ms = (time.perf_counter() - start) / 20 * 1000
+    points = sum(len(series) for table in (rollups.counts, rollups.dists) for by_metric in table.values() for series in by_metric.values())
+
+    print(f"📊 Trend rollup benchmark ({n_rows} rows, {n_runs} change sets = 30 days):")
+    print(f"   Incremental update: {update_seconds / n_runs * 1000:8.2f} ms per change set")
+    print(f"   Full recomputation: {full_ms:8.1f} ms from {len(store.list())} snapshots")
+    print(f"   Rollup query:       {query_ms:8.2f} ms ({full_ms / query_ms:.0f}x faster), {points} stored points")
+
+    # Validation
+    hours = [
+        (status_metrics.parse_time(item["updatedDate"]) - status_metrics.parse_time(item["createdDate"])) / 3600
+        for delta in deltas for item in delta["changes"]["status"]
+        if item["to"] in status_metrics.CLOSED_STATUSES and item["from"] not in status_metrics.CLOSED_STATUSES
+    ]
+    merged = Welford()
+    for state in rollups.dists["day"]["resolutionHours"].values():
+        merged.merge(Welford(*state))
+    daily_new = sum(value for _, value in rollups.series("new", "day"))
+    anomalies = [a["metric"] for a in summary["anomalies"]["day"]]
+
+    print(f"\n📊 Validation:")
+    print(f"   Summary matches full recompute: {'✅' if summary == full else '❌'}")
+    print(f"   Merged Welford mean/std: {merged.mean:.2f}/{merged.std:.2f} h (direct: {statistics.fmean(hours):.2f}/{statistics.pstdev(hours):.2f}) "
+          f"{'✅' if math.isclose(merged.mean, statistics.fmean(hours)) and math.isclose(merged.std, statistics.pstdev(hours)) else '❌'}")
+    print(f"   Daily new issues sum: {daily_new} (deltas: {sum(d['summary']['new'] for d in deltas)}) {'✅' if daily_new == sum(d['summary']['new'] for d in deltas) else '❌'}")
+    print(f"   Injected spike flagged >{ANOMALY_SIGMA:.0f}σ: {anomalies} {'✅' if 'changes' in anomalies else '❌'}")
+    print(f"   Replayed change set skipped: {'✅' if not rollups.apply(deltas[-1]) else '❌'}")